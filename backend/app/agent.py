@@ -0,0 +1,107 @@
+import os
+import json
+import uuid
+import socket
+import asyncio
+import logging
+import urllib.request
+import urllib.error
+from typing import Dict, Any, Optional, Tuple
+
+from .aggregator import AGENT_FIELDS
+
+logger = logging.getLogger("memory_monitor")
+
+
+class SnapshotAgent:
+    """Pushes compact snapshots or deltas to a central aggregator"""
+
+    def __init__(self, url: Optional[str] = None, host: Optional[str] = None):
+        self.url = url or os.getenv("AGGREGATOR_URL", "http://localhost:8000/api/agents/push")
+        self.host = host or os.getenv("AGENT_HOST_NAME") or socket.gethostname()
+        self.token = os.getenv("AGGREGATOR_TOKEN")
+        self.timeout = float(os.getenv("AGENT_TIMEOUT_SECONDS", "5"))
+        self.full_sync_every = int(os.getenv("AGENT_FULL_SYNC_EVERY", "60"))
+        self.agent_id = uuid.uuid4().hex
+        self.seq: int = 0
+        # Rows the aggregator has acknowledged, keyed by pid
+        self._acked: Dict[int, Tuple] = {}
+        self._acked_seq: Optional[int] = None
+        self._pushes_since_full: int = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def build_payload(self, snapshot: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[int, Tuple]]:
+        """Build the next payload and the row state it will leave on the aggregator"""
+        rows = {
+            p['pid']: tuple(p.get(field) for field in AGENT_FIELDS)
+            for p in snapshot.get('processes', [])
+        }
+
+        self.seq += 1
+        payload = {
+            'host': self.host,
+            'agent_id': self.agent_id,
+            'seq': self.seq,
+            'timestamp': snapshot.get('timestamp'),
+            'total_processes': snapshot.get('total_processes', len(rows)),
+            'system_memory': snapshot.get('system_memory', {}),
+        }
+
+        full = self._acked_seq is None or self._pushes_since_full >= self.full_sync_every
+        if full:
+            payload['base_seq'] = None
+            payload['upserts'] = [list(row) for row in rows.values()]
+            payload['removed'] = []
+        else:
+            payload['base_seq'] = self._acked_seq
+            payload['upserts'] = [
+                list(row) for pid, row in rows.items() if self._acked.get(pid) != row
+            ]
+            payload['removed'] = [pid for pid in self._acked if pid not in rows]
+
+        return payload, rows
+
+    def _post(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        body = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+        request = urllib.request.Request(self.url, data=body, method='POST')
+        request.add_header('Content-Type', 'application/json')
+        if self.token:
+            request.add_header('X-Agent-Token', self.token)
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            return json.loads(response.read().decode('utf-8'))
+
+    async def push(self, snapshot: Dict[str, Any]) -> bool:
+        """Push one snapshot; returns True when the aggregator accepted it"""
+        payload, rows = self.build_payload(snapshot)
+
+        try:
+            result = await asyncio.to_thread(self._post, payload)
+        except (urllib.error.URLError, OSError, ValueError) as e:
+            logger.warning(f"Failed to push snapshot to aggregator: {e}")
+            self._acked_seq = None
+            return False
+
+        if not result.get('accepted'):
+            # Aggregator lost our state (restart, missed delta); next push is a full one
+            self._acked_seq = None
+            return False
+
+        self._acked = rows
+        self._acked_seq = payload['seq']
+        self._pushes_since_full = 0 if payload['base_seq'] is None else self._pushes_since_full + 1
+        return True
+
+    def submit(self, snapshot: Dict[str, Any]) -> None:
+        """Start a push unless the previous one is still in flight"""
+        if self._task is not None and not self._task.done():
+            logger.debug("Previous snapshot push still in flight, skipping tick")
+            return
+        self._task = asyncio.create_task(self.push(snapshot))
+
+    async def shutdown(self):
+        """Wait for an in-flight push to finish"""
+        if self._task is not None and not self._task.done():
+            try:
+                await asyncio.wait_for(self._task, timeout=self.timeout)
+            except asyncio.TimeoutError:
+                self._task.cancel()
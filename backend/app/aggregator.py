@@ -0,0 +1,194 @@
+import os
+import time
+import logging
+from datetime import datetime
+from typing import List, Dict, Any, Optional
+
+from .search import make_matcher
+
+logger = logging.getLogger("memory_monitor")
+
+# Fields carried in the compact row format exchanged between agents and the aggregator.
+# Derived fields (memory_rss_mb, start_time) are rebuilt on the receiving side.
+AGENT_FIELDS = [
+    'pid', 'name', 'username', 'status',
+    'memory_rss', 'memory_percent', 'cpu_percent', 'create_time'
+]
+
+
+def expand_row(row: List[Any], host: str) -> Dict[str, Any]:
+    """Turn a compact agent row back into the process dict used by the API"""
+    process = dict(zip(AGENT_FIELDS, row))
+    rss = process.get('memory_rss') or 0
+    create_time = process.get('create_time') or 0
+    process['memory_rss_mb'] = round(rss / (1024 * 1024), 2)
+    process['start_time'] = datetime.fromtimestamp(create_time).strftime('%Y-%m-%d %H:%M:%S')
+    process['host'] = host
+    return process
+
+
+class _HostState:
+    """Last known process table for a single host"""
+
+    def __init__(self, host: str, agent_id: str):
+        self.host = host
+        self.agent_id = agent_id
+        self.seq: int = 0
+        self.processes: Dict[int, Dict[str, Any]] = {}
+        self.system_memory: Dict[str, Any] = {}
+        self.total_processes: int = 0
+        self.timestamp: float = 0
+        self.last_seen: float = 0
+
+
+class HostAggregator:
+    """Merges snapshots pushed by agents into a host-tagged process view"""
+
+    def __init__(self):
+        self.hosts: Dict[str, _HostState] = {}
+        self.host_ttl: float = float(os.getenv("AGGREGATOR_HOST_TTL", "30"))
+        self.sort_desc: bool = True
+        self.version: int = 0
+        self._merged: List[Dict[str, Any]] = []
+        self._merged_version: int = -1
+
+    def apply_update(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Apply a full snapshot or a delta pushed by an agent"""
+        host = payload['host']
+        agent_id = payload.get('agent_id', '')
+        seq = payload['seq']
+        base_seq = payload.get('base_seq')
+        state = self.hosts.get(host)
+
+        if base_seq is None:
+            # Full snapshot replaces whatever we had for this host
+            state = _HostState(host, agent_id)
+            self.hosts[host] = state
+        elif state is None or state.agent_id != agent_id or state.seq != base_seq:
+            # Delta against a state we don't have; ask the agent for a full snapshot
+            logger.debug(f"Delta from {host} does not match stored state, requesting resync")
+            return {'accepted': False, 'resync': True}
+
+        for row in payload.get('upserts', []):
+            process = expand_row(row, host)
+            state.processes[process['pid']] = process
+        for pid in payload.get('removed', []):
+            state.processes.pop(pid, None)
+
+        state.seq = seq
+        state.system_memory = payload.get('system_memory', {})
+        state.total_processes = payload.get('total_processes', len(state.processes))
+        state.timestamp = payload.get('timestamp') or time.time()
+        state.last_seen = time.time()
+        self.version += 1
+
+        return {'accepted': True, 'seq': seq}
+
+    def apply_local(self, host: str, snapshot: Dict[str, Any]) -> None:
+        """Record the aggregator's own snapshot as one of the hosts"""
+        state = self.hosts.get(host)
+        if state is None:
+            state = _HostState(host, 'local')
+            self.hosts[host] = state
+
+        state.processes = {}
+        for process in snapshot.get('processes', []):
+            tagged = dict(process)
+            tagged['host'] = host
+            state.processes[tagged['pid']] = tagged
+
+        state.seq += 1
+        state.system_memory = snapshot.get('system_memory', {})
+        state.total_processes = snapshot.get('total_processes', len(state.processes))
+        state.timestamp = snapshot.get('timestamp') or time.time()
+        state.last_seen = time.time()
+        self.version += 1
+
+    def _is_live(self, state: _HostState, now: float) -> bool:
+        return now - state.last_seen <= self.host_ttl
+
+    def get_hosts(self) -> List[Dict[str, Any]]:
+        """Summary of every known host"""
+        now = time.time()
+        return [
+            {
+                'host': state.host,
+                'seq': state.seq,
+                'last_seen': state.last_seen,
+                'stale': not self._is_live(state, now),
+                'total_processes': state.total_processes,
+                'system_memory': state.system_memory,
+            }
+            for state in sorted(self.hosts.values(), key=lambda s: s.host)
+        ]
+
+    def has_host(self, host: str) -> bool:
+        return host in self.hosts
+
+    def _merged_processes(self) -> List[Dict[str, Any]]:
+        """All live hosts' processes in one list, rebuilt only when something changed"""
+        if self._merged_version != self.version:
+            now = time.time()
+            merged = []
+            for state in self.hosts.values():
+                if self._is_live(state, now):
+                    merged.extend(state.processes.values())
+            self._merged = merged
+            self._merged_version = self.version
+        return self._merged
+
+    def get_snapshot(self, top: Optional[int] = None,
+                     sort_by: Optional[str] = None,
+                     min_mem_percent: Optional[float] = None,
+                     host: Optional[str] = None,
+                     name: Optional[str] = None,
+                     username: Optional[str] = None,
+                     match: str = 'substring',
+                     case_sensitive: bool = False) -> Dict[str, Any]:
+        """Cross-host snapshot in the same shape as ProcessMonitor.get_snapshot"""
+        if host is not None:
+            state = self.hosts.get(host)
+            processes = list(state.processes.values()) if state else []
+            system_memory = state.system_memory if state else {}
+        else:
+            processes = self._merged_processes()
+            system_memory = self._combined_system_memory()
+
+        total = len(processes)
+
+        # Agents do not send command lines, and rows change host by host, so filter linearly
+        for field, pattern in (('name', name), ('username', username)):
+            if pattern:
+                matcher = make_matcher(pattern, match, case_sensitive)
+                processes = [p for p in processes if matcher(p.get(field) or '')]
+
+        sort_key = sort_by or 'memory_percent'
+        processes = sorted(processes, key=lambda x: x.get(sort_key, 0), reverse=self.sort_desc)
+
+        if min_mem_percent is not None:
+            processes = [p for p in processes if p.get('memory_percent', 0) >= min_mem_percent]
+
+        if top is not None and top > 0:
+            processes = processes[:top]
+
+        return {
+            'timestamp': time.time(),
+            'datetime': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'host': host,
+            'hosts': self.get_hosts(),
+            'total_processes': total,
+            'filtered_processes': len(processes),
+            'system_memory': system_memory,
+            'processes': processes
+        }
+
+    def _combined_system_memory(self) -> Dict[str, Any]:
+        """Sum of memory across live hosts"""
+        now = time.time()
+        total = available = 0
+        for state in self.hosts.values():
+            if self._is_live(state, now):
+                total += state.system_memory.get('total', 0)
+                available += state.system_memory.get('available', 0)
+        percent = round((total - available) / total * 100, 1) if total else 0.0
+        return {'total': total, 'available': available, 'percent': percent}
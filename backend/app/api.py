@@ -1,10 +1,18 @@
-from fastapi import APIRouter, HTTPException, Depends, Query, BackgroundTasks
+import os
+import json
+import time
+import asyncio
+from fastapi import APIRouter, HTTPException, Depends, Query, BackgroundTasks, Header, Response
+from fastapi.responses import StreamingResponse
 from typing import List, Dict, Any, Optional
 from pydantic import BaseModel, Field
 import logging
 
 # Import the process monitor
 from .monitor import ProcessMonitor
+from .stats import pipeline_stats
+from .profiler import SamplingProfiler
+from .pagination import CursorExpiredError
 
 # Setup logger
 logger = logging.getLogger("memory_monitor")
@@ -12,6 +20,9 @@ logger = logging.getLogger("memory_monitor")
 # Create router
 router = APIRouter()
 
+# On-demand sampling profiler (only one session at a time)
+profiler = SamplingProfiler()
+
 # Get process monitor instance
 def get_process_monitor():
     from .main import process_monitor
@@ -23,6 +34,42 @@ def get_process_logger():
     return process_logger
 
 
+# Get host aggregator instance (if running in aggregator mode)
+def get_process_aggregator():
+    from .main import process_aggregator
+    return process_aggregator
+
+
+# Get system sampler instance (if enabled)
+def get_system_sampler():
+    from .main import system_sampler
+    return system_sampler
+
+
+# Get cgroup collector instance (if available)
+def get_cgroup_collector():
+    from .main import cgroup_collector
+    return cgroup_collector
+
+
+# Get the shared SSE snapshot stream
+def get_snapshot_stream():
+    from .main import snapshot_stream
+    return snapshot_stream
+
+
+# Get burst capture instance (if enabled)
+def get_burst_capture():
+    from .main import burst_capture
+    return burst_capture
+
+
+# Get memory forecaster instance (if enabled)
+def get_memory_forecaster():
+    from .main import memory_forecaster
+    return memory_forecaster
+
+
 # Models
 class ProcessKillRequest(BaseModel):
     pid: int = Field(..., description="Process ID to terminate")
@@ -34,20 +81,101 @@ class ProcessKillResponse(BaseModel):
     message: str
 
 
+class AgentPushRequest(BaseModel):
+    host: str = Field(..., description="Name of the host the snapshot comes from")
+    agent_id: str = Field("", description="Identifier of the agent run, changes on restart")
+    seq: int = Field(..., description="Sequence number of this push")
+    base_seq: Optional[int] = Field(None, description="Sequence the delta applies to, null for a full snapshot")
+    timestamp: Optional[float] = None
+    total_processes: Optional[int] = None
+    system_memory: Dict[str, Any] = Field(default_factory=dict)
+    upserts: List[List[Any]] = Field(default_factory=list, description="Compact rows of new or changed processes")
+    removed: List[int] = Field(default_factory=list, description="PIDs that exited since base_seq")
+
+
 # Endpoints
 @router.get("/processes", response_model=Dict[str, Any])
 async def get_processes(
     top: Optional[int] = Query(None, description="Limit to top N processes"),
     sort_by: Optional[str] = Query(None, description="Field to sort by"),
     min_mem_percent: Optional[float] = Query(None, description="Minimum memory percentage"),
-    monitor: ProcessMonitor = Depends(get_process_monitor)
+    host: Optional[str] = Query(None, description="Restrict to one host (aggregator mode)"),
+    name: Optional[str] = Query(None, description="Filter by process name"),
+    username: Optional[str] = Query(None, description="Filter by user"),
+    cmdline: Optional[str] = Query(None, description="Filter by command line"),
+    match: str = Query("substring", description="How filters match: substring, prefix or regex"),
+    case_sensitive: bool = Query(False, description="Match filters case-sensitively"),
+    limit: Optional[int] = Query(None, description="Page size; the response carries next_cursor"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    fields: Optional[str] = Query(None, description="Comma-separated process fields to return"),
+    monitor: ProcessMonitor = Depends(get_process_monitor),
+    aggregator = Depends(get_process_aggregator)
 ):
     """Get current process snapshot with optional filtering"""
+    paged = limit is not None or cursor is not None or fields is not None
+    if aggregator:
+        if paged:
+            raise HTTPException(status_code=400, detail="Pagination is not available in aggregator mode")
+        if host is not None and not aggregator.has_host(host):
+            raise HTTPException(status_code=404, detail=f"Unknown host: {host}")
+        if cmdline:
+            raise HTTPException(status_code=400, detail="Command line search is not available in aggregator mode")
+        try:
+            return aggregator.get_snapshot(top, sort_by, min_mem_percent, host=host,
+                                           name=name, username=username,
+                                           match=match, case_sensitive=case_sensitive)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    
+    if host is not None:
+        raise HTTPException(status_code=404, detail="Host aggregation is not enabled")
+    
     # Ensure monitor is up to date
     await monitor.update()
     
+    if paged:
+        try:
+            page = monitor.get_page(limit if limit is not None else top, cursor, fields, sort_by, min_mem_percent, name=name,
+                                    username=username, cmdline=cmdline, match=match,
+                                    case_sensitive=case_sensitive)
+        except CursorExpiredError as e:
+            raise HTTPException(status_code=410, detail=f"{e}, restart from the first page")
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        # Pages are plain JSON already; skip the response model's per-row encoding
+        with pipeline_stats.timer("page_serialize"):
+            content = json.dumps(page, separators=(',', ':'))
+        return Response(content=content, media_type="application/json")
+    
     # Get filtered snapshot
-    return monitor.get_snapshot(top, sort_by, min_mem_percent)
+    try:
+        return monitor.get_snapshot(top, sort_by, min_mem_percent, name=name, username=username,
+                                    cmdline=cmdline, match=match, case_sensitive=case_sensitive)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/processes/stream")
+async def stream_processes(
+    last_event_id: Optional[str] = Header(None),
+    monitor: ProcessMonitor = Depends(get_process_monitor),
+    aggregator = Depends(get_process_aggregator),
+    stream = Depends(get_snapshot_stream)
+):
+    """Server-Sent Events stream of full snapshots, one per tick"""
+    # Nothing was published while there were no clients: encode the current view once
+    if stream.latest is None:
+        await monitor.update()
+        view = aggregator.get_snapshot() if aggregator else monitor.get_snapshot()
+        with pipeline_stats.timer("serialize"):
+            stream.publish(json.dumps(view))
+    
+    return StreamingResponse(
+        stream.events(last_event_id),
+        media_type="text/event-stream",
+        # Proxies must pass events through as they are written
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 
 @router.post("/processes/kill", response_model=ProcessKillResponse)
@@ -73,6 +201,32 @@ async def kill_process(
     return result
 
 
+@router.post("/agents/push", response_model=Dict[str, Any])
+async def push_agent_snapshot(
+    request: AgentPushRequest,
+    x_agent_token: Optional[str] = Header(None),
+    aggregator = Depends(get_process_aggregator)
+):
+    """Receive a full snapshot or delta from an agent"""
+    if not aggregator:
+        raise HTTPException(status_code=404, detail="Host aggregation is not enabled")
+    
+    token = os.getenv("AGGREGATOR_TOKEN")
+    if token and x_agent_token != token:
+        raise HTTPException(status_code=403, detail="Invalid agent token")
+    
+    return aggregator.apply_update(request.dict())
+
+
+@router.get("/hosts", response_model=List[Dict[str, Any]])
+async def get_hosts(aggregator = Depends(get_process_aggregator)):
+    """List hosts known to the aggregator"""
+    if not aggregator:
+        raise HTTPException(status_code=404, detail="Host aggregation is not enabled")
+    
+    return aggregator.get_hosts()
+
+
 @router.get("/processes/{pid}/history", response_model=List[Dict[str, Any]])
 async def get_process_history(
     pid: int,
@@ -87,31 +241,171 @@ async def get_process_history(
     return history
 
 
+@router.get("/history/top", response_model=Dict[str, Any])
+async def get_history_top(
+    seconds: float = Query(6 * 3600, gt=0, description="Window length in seconds"),
+    end: Optional[float] = Query(None, description="Window end as a Unix timestamp (default now)"),
+    by: str = Query("peak_rss", description="peak_rss, avg_rss, peak_cpu or avg_cpu"),
+    top: int = Query(10, ge=1, le=1000, description="Number of processes to return"),
+    logger = Depends(get_process_logger)
+):
+    """Processes with the highest peak or average RSS/CPU over a logged window"""
+    if not logger:
+        raise HTTPException(status_code=404, detail="Process logging is not enabled")
+
+    end = end if end is not None else time.time()
+    start = end - seconds
+    try:
+        processes = await logger.get_top_processes(start, end, by, top)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {'start': start, 'end': end, 'by': by, 'processes': processes}
+
+
+@router.get("/events", response_model=Dict[str, Any])
+async def get_events(
+    type: Optional[List[str]] = Query(None, description="Event types to include (repeat for several)"),
+    start: Optional[float] = Query(None, description="Earliest event as a Unix timestamp"),
+    end: Optional[float] = Query(None, description="Events before this Unix timestamp"),
+    pid: Optional[int] = Query(None, description="Only events about this PID"),
+    limit: int = Query(100, ge=1, le=1000, description="Page size; the response carries next_cursor"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    logger = Depends(get_process_logger)
+):
+    """Logged events such as kill attempts and process exits, newest first"""
+    if not logger:
+        raise HTTPException(status_code=404, detail="Process logging is not enabled")
+    try:
+        return await logger.get_events(type, start, end, pid, limit, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/export")
+async def export_history(
+    table: str = Query("process_snapshots", description="process_snapshots or events"),
+    format: str = Query("csv", description="csv, ndjson or arrow"),
+    start: float = Query(0, description="Start of the range as a Unix timestamp"),
+    end: Optional[float] = Query(None, description="End of the range (exclusive, default now)"),
+    chunk_size: int = Query(5000, ge=100, le=100000, description="Rows read and sent per chunk"),
+    logger = Depends(get_process_logger)
+):
+    """Stream a time range of a logged table"""
+    from .export import EXPORT_FORMATS, check_export, stream_export
+    if not logger:
+        raise HTTPException(status_code=404, detail="Process logging is not enabled")
+    try:
+        check_export(table, format)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    # Fix the end so rows logged during the export do not extend it
+    end = end if end is not None else time.time()
+    media_type, extension = EXPORT_FORMATS[format]
+    return StreamingResponse(
+        stream_export(logger, table, format, start, end, chunk_size),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{table}.{extension}"'}
+    )
+
+
 @router.get("/system/memory", response_model=Dict[str, Any])
 async def get_system_memory(
     monitor: ProcessMonitor = Depends(get_process_monitor)
 ):
     """Get system memory information"""
-    import psutil
-    
-    memory = psutil.virtual_memory()
-    swap = psutil.swap_memory()
-    
-    return {
-        "memory": {
-            "total": memory.total,
-            "available": memory.available,
-            "used": memory.used,
-            "free": memory.free,
-            "percent": memory.percent
-        },
-        "swap": {
-            "total": swap.total,
-            "used": swap.used,
-            "free": swap.free,
-            "percent": swap.percent
-        }
-    }
+    return monitor.get_system_memory()
+
+
+def _sampler_fields(fields: Optional[str]) -> Optional[List[str]]:
+    return [field.strip() for field in fields.split(",") if field.strip()] if fields else None
+
+
+@router.get("/system/memory/history", response_model=Dict[str, Any])
+async def get_system_memory_history(
+    seconds: Optional[float] = Query(None, gt=0, description="Only samples from the last N seconds"),
+    fields: Optional[str] = Query(None, description="Comma-separated sample fields"),
+    sampler = Depends(get_system_sampler)
+):
+    """Recent system memory, vmstat and pressure samples from the ring buffer"""
+    if not sampler:
+        raise HTTPException(status_code=404, detail="System sampler is not enabled")
+    try:
+        history = sampler.history(seconds, _sampler_fields(fields))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return Response(content=json.dumps(history, separators=(',', ':')), media_type="application/json")
+
+
+@router.get("/system/memory/stats", response_model=Dict[str, Any])
+async def get_system_memory_stats(
+    seconds: Optional[float] = Query(60, gt=0, description="Window in seconds"),
+    fields: Optional[str] = Query(None, description="Comma-separated sample fields"),
+    sampler = Depends(get_system_sampler)
+):
+    """Summary statistics of the sampled system memory over a window"""
+    if not sampler:
+        raise HTTPException(status_code=404, detail="System sampler is not enabled")
+    try:
+        return sampler.stats(seconds, _sampler_fields(fields))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/cgroups", response_model=Dict[str, Any])
+async def get_cgroups(
+    kind: Optional[str] = Query(None, description="container, pod, service, user, scope, slice or other"),
+    top: Optional[int] = Query(None, description="Limit to the top N cgroups by memory"),
+    processes: int = Query(5, ge=0, description="Largest member processes to include per cgroup"),
+    monitor: ProcessMonitor = Depends(get_process_monitor),
+    collector = Depends(get_cgroup_collector)
+):
+    """Memory charged to each cgroup, joined with its processes"""
+    if not collector:
+        raise HTTPException(status_code=404, detail="cgroup v2 accounting is not enabled")
+    await collector.refresh()
+    return collector.get_view(monitor.get_process_map(), kind, top, processes)
+
+
+@router.get("/cgroups/{path:path}", response_model=Dict[str, Any])
+async def get_cgroup(
+    path: str,
+    monitor: ProcessMonitor = Depends(get_process_monitor),
+    collector = Depends(get_cgroup_collector)
+):
+    """One cgroup with all of its processes"""
+    if not collector:
+        raise HTTPException(status_code=404, detail="cgroup v2 accounting is not enabled")
+    await collector.refresh()
+    cgroup = collector.get_cgroup(path, monitor.get_process_map())
+    if cgroup is None:
+        raise HTTPException(status_code=404, detail=f"Unknown cgroup: /{path}")
+    return cgroup
+
+
+@router.get("/bursts", response_model=List[Dict[str, Any]])
+async def get_bursts(
+    limit: Optional[int] = Query(None, ge=1, description="Most recent N bursts"),
+    capture = Depends(get_burst_capture)
+):
+    """Recent high-resolution captures triggered by memory pressure, newest first"""
+    if not capture:
+        raise HTTPException(status_code=404, detail="Burst capture is not enabled")
+    return capture.get_recent(limit)
+
+
+@router.get("/forecast", response_model=Dict[str, Any])
+async def get_forecast(
+    top: Optional[int] = Query(None, ge=0, description="Processes closest to exhausting memory"),
+    monitor: ProcessMonitor = Depends(get_process_monitor),
+    forecaster = Depends(get_memory_forecaster)
+):
+    """Estimated time until memory is exhausted, for the system and the fastest-growing processes"""
+    if not forecaster:
+        raise HTTPException(status_code=404, detail="Forecasting is not enabled")
+    await monitor.update()
+    forecaster.observe(monitor)
+    return forecaster.get_forecast(top)
 
 
 @router.get("/system/info", response_model=Dict[str, Any])
@@ -133,4 +427,35 @@ async def get_system_info():
         "cpu_count": psutil.cpu_count(logical=True),
         "cpu_physical": psutil.cpu_count(logical=False),
         "boot_time": psutil.boot_time()
-    }
\ No newline at end of file
+    }
+
+
+@router.get("/internal/stats", response_model=Dict[str, Any])
+async def get_internal_stats(
+    reset: bool = Query(False, description="Clear all counters and histograms after reading"),
+    process_logger = Depends(get_process_logger)
+):
+    """Latency and throughput of the monitor's own pipeline stages"""
+    if process_logger:
+        pipeline_stats.set_gauge("logger_pending_writes", process_logger.pending_writes)
+    
+    stats = pipeline_stats.to_dict()
+    if reset:
+        pipeline_stats.reset()
+    return stats
+
+
+@router.get("/internal/profile", response_model=Dict[str, Any])
+async def get_internal_profile(
+    seconds: float = Query(5.0, gt=0, le=60, description="How long to sample"),
+    interval_ms: float = Query(10.0, ge=1, le=1000, description="Time between samples"),
+    top: int = Query(20, ge=1, le=200, description="Number of hottest stacks to return")
+):
+    """Capture the hottest stacks with the sampling profiler (requires ENABLE_PROFILER=true)"""
+    if os.getenv("ENABLE_PROFILER", "false").lower() != "true":
+        raise HTTPException(status_code=404, detail="Profiler is not enabled")
+    
+    try:
+        return await asyncio.to_thread(profiler.sample, seconds, interval_ms / 1000, top)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
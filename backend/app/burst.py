@@ -0,0 +1,220 @@
+import os
+import time
+import asyncio
+import logging
+from collections import deque
+from typing import List, Dict, Any, Optional, Callable, Awaitable
+
+import psutil
+
+from .stats import pipeline_stats
+
+logger = logging.getLogger("memory_monitor")
+
+
+def _map_details(proc: psutil.Process, entries: int) -> Dict[str, Any]:
+    """USS/PSS/swap and the largest mappings of one process"""
+    details: Dict[str, Any] = {'pid': proc.pid}
+    try:
+        full = proc.memory_full_info()
+        details.update({field: getattr(full, field) for field in ('rss', 'uss', 'pss', 'swap')
+                        if hasattr(full, field)})
+        maps = sorted(proc.memory_maps(grouped=True), key=lambda m: m.rss, reverse=True)[:entries]
+        details['maps'] = [{
+            'path': m.path,
+            'rss': m.rss,
+            'private': getattr(m, 'private_clean', 0) + getattr(m, 'private_dirty', 0),
+            'swap': getattr(m, 'swap', 0),
+        } for m in maps]
+    except (psutil.Error, OSError) as e:
+        details['error'] = type(e).__name__
+    return details
+
+
+def _capture_maps(procs: List[psutil.Process], entries: int, allowance: float):
+    """Map details in order until allowance CPU seconds are used; returns (details, CPU seconds).
+
+    Reading smaps is slow for large processes, so this runs in a worker thread and
+    measures that thread's own CPU time.
+    """
+    start = time.thread_time()
+    details = []
+    for proc in procs:
+        if time.thread_time() - start >= allowance:
+            break
+        details.append(_map_details(proc, entries))
+    return details, time.thread_time() - start
+
+
+class BurstCapture:
+    """Switches to high-resolution capture while memory is under pressure.
+
+    After every scan check() compares system memory, PSI and each process's RSS growth
+    against the BURST_* triggers. When one fires, the top offenders and the system
+    sampler are read every BURST_INTERVAL_MS for BURST_DURATION_SECONDS. Memory maps of
+    the offenders are captured at the start and the end of the burst. The burst is
+    handed to on_burst as one event. Capture time is kept under BURST_CPU_BUDGET_PERCENT
+    of one core. The map captures run in a worker thread and stop early once they use up
+    their share of the budget, and the sampling interval is stretched when needed.
+    """
+
+    def __init__(self, on_burst: Optional[Callable[[Dict[str, Any]], Awaitable[None]]] = None,
+                 sampler=None):
+        self.on_burst = on_burst
+        self.sampler = sampler
+        self.interval = float(os.getenv("BURST_INTERVAL_MS", "100")) / 1000
+        self.duration = float(os.getenv("BURST_DURATION_SECONDS", "10"))
+        self.cooldown = float(os.getenv("BURST_COOLDOWN_SECONDS", "60"))
+        self.cpu_budget = float(os.getenv("BURST_CPU_BUDGET_PERCENT", "5")) / 100
+        self.top_processes = int(os.getenv("BURST_TOP_PROCESSES", "5"))
+        self.map_entries = int(os.getenv("BURST_MAP_ENTRIES", "10"))
+        self.memory_percent = float(os.getenv("BURST_MEMORY_PERCENT", "90"))
+        self.psi_some_avg10 = float(os.getenv("BURST_PSI_SOME_AVG10", "10"))
+        self.rss_growth = float(os.getenv("BURST_RSS_GROWTH_MB", "256")) * 1024 * 1024
+        self.recent: deque = deque(maxlen=int(os.getenv("BURST_HISTORY", "20")))
+        self.last_burst_end: float = 0
+        self._last_rss: Dict[int, int] = {}
+        self._version: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def active(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def check(self, monitor) -> Optional[Dict[str, Any]]:
+        """Start a burst if a trigger fires for the monitor's latest scan; returns the trigger"""
+        if monitor.version == self._version:
+            return None
+        self._version = monitor.version
+        trigger = self._find_trigger(monitor)
+        if trigger is None or self.active or time.time() - self.last_burst_end < self.cooldown:
+            return None
+        self.start(trigger, monitor.processes)
+        return trigger
+
+    def _find_trigger(self, monitor) -> Optional[Dict[str, Any]]:
+        trigger = None
+        last_rss, self._last_rss = self._last_rss, {}
+        for process in monitor.processes:
+            pid, rss = process['pid'], process.get('memory_rss') or 0
+            self._last_rss[pid] = rss
+            growth = rss - last_rss.get(pid, rss)
+            if growth >= self.rss_growth and (trigger is None or growth > trigger['value']):
+                trigger = {'reason': 'rss_growth', 'pid': pid, 'name': process.get('name'),
+                           'value': growth, 'threshold': self.rss_growth}
+        if trigger is not None:
+            return trigger
+
+        latest = self.sampler.latest() if self.sampler is not None else None
+        psi = latest.get('psi_some_avg10') if latest else None
+        if psi is not None and psi >= self.psi_some_avg10:
+            return {'reason': 'memory_pressure', 'value': psi, 'threshold': self.psi_some_avg10}
+        percent = monitor.get_system_memory()['memory']['percent']
+        if percent >= self.memory_percent:
+            return {'reason': 'memory_percent', 'value': percent, 'threshold': self.memory_percent}
+        return None
+
+    def start(self, trigger: Dict[str, Any], processes: List[Dict[str, Any]]) -> None:
+        offenders = sorted(processes, key=lambda p: p.get('memory_rss') or 0, reverse=True)[:self.top_processes]
+        # The process that grew comes first, so it gets memory maps even on a small budget
+        pids = [p['pid'] for p in offenders]
+        if trigger.get('pid') is not None:
+            pids = [trigger['pid']] + [pid for pid in pids if pid != trigger['pid']]
+        names = {p['pid']: p.get('name') for p in processes}
+        logger.info(f"Memory burst capture started ({trigger['reason']}), tracking PIDs {pids}")
+        pipeline_stats.incr("bursts")
+        self._task = asyncio.create_task(self._run(trigger, pids, names))
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self, trigger: Dict[str, Any], pids: List[int], names: Dict[int, str]) -> None:
+        started = time.time()
+        # CPU time of the capture itself; other work on the event loop is not counted
+        cpu_start = time.thread_time()
+        procs = {}
+        for pid in pids:
+            try:
+                procs[pid] = psutil.Process(pid)
+            except psutil.Error:
+                continue
+        spent = time.thread_time() - cpu_start
+
+        # The opening maps may use half of the budget for the whole burst
+        budget = self.cpu_budget * self.duration
+        maps_start, cost = await asyncio.to_thread(
+            _capture_maps, list(procs.values()), self.map_entries, max(0.0, budget / 2 - spent))
+        spent += cost
+        times: List[float] = []
+        rss: Dict[int, List[Optional[int]]] = {pid: [] for pid in procs}
+        available: List[Optional[float]] = []
+        pressure: List[Optional[float]] = []
+        throttled = 0
+
+        while time.time() - started < self.duration:
+            step_start = time.thread_time()
+            times.append(round(time.time() - started, 3))
+            for pid, proc in procs.items():
+                try:
+                    rss[pid].append(proc.memory_info().rss)
+                except psutil.Error:
+                    rss[pid].append(None)
+            if self.sampler is not None:
+                self.sampler.sample()
+                latest = self.sampler.latest() or {}
+                available.append(latest.get('mem_available'))
+                pressure.append(latest.get('psi_some_avg10'))
+            else:
+                available.append(psutil.virtual_memory().available)
+
+            # Stretch the interval so capture stays within the CPU budget
+            cost = time.thread_time() - step_start
+            spent += cost
+            delay = self.interval
+            if self.cpu_budget > 0 and cost / self.cpu_budget > delay:
+                delay = cost / self.cpu_budget
+                throttled += 1
+            await asyncio.sleep(max(0.0, min(delay, started + self.duration - time.time())))
+
+        elapsed = time.time() - started
+        maps_end = None
+        if spent < self.cpu_budget * elapsed:
+            maps_end, cost = await asyncio.to_thread(
+                _capture_maps, list(procs.values()), self.map_entries, self.cpu_budget * elapsed - spent)
+            spent += cost
+        cpu_seconds = spent
+
+        event = {
+            'trigger': trigger,
+            'started': started,
+            'ended': time.time(),
+            'interval_ms': self.interval * 1000,
+            'samples': len(times),
+            'times': times,
+            'processes': [{'pid': pid, 'name': names.get(pid), 'rss': values} for pid, values in rss.items()],
+            'system': {'mem_available': available, 'psi_some_avg10': pressure if pressure else None},
+            'maps_start': maps_start,
+            'maps_end': maps_end,
+            'cpu_seconds': round(cpu_seconds, 4),
+            'cpu_budget_percent': self.cpu_budget * 100,
+            'throttled_samples': throttled,
+        }
+        self.recent.append(event)
+        self.last_burst_end = time.time()
+        pipeline_stats.observe("burst_cpu", cpu_seconds * 1000)
+        logger.info(f"Memory burst capture finished: {len(times)} samples, {cpu_seconds * 1000:.0f} ms CPU")
+        if self.on_burst is not None:
+            try:
+                await self.on_burst(event)
+            except Exception as e:
+                logger.error(f"Error handling memory burst: {e}")
+
+    def get_recent(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        bursts = list(self.recent)[::-1]
+        return bursts[:limit] if limit else bursts
@@ -0,0 +1,235 @@
+import os
+import re
+import time
+import asyncio
+import logging
+from typing import List, Dict, Any, Optional, Tuple
+
+from .stats import pipeline_stats
+
+logger = logging.getLogger("memory_monitor")
+
+# memory.stat keys reported per cgroup (bytes, except the fault counters)
+STAT_KEYS = ('anon', 'file', 'kernel', 'kernel_stack', 'slab', 'sock', 'shmem',
+             'file_mapped', 'file_dirty', 'file_writeback', 'pgfault', 'pgmajfault')
+EVENT_KEYS = ('low', 'high', 'max', 'oom', 'oom_kill')
+CGROUP_KINDS = ('container', 'pod', 'service', 'user', 'scope', 'slice', 'other')
+
+_CONTAINER_RE = re.compile(r'(?:docker|cri-containerd|crio|libpod|containerd)[-:]?([0-9a-f]{12,64})(?:\.scope)?$')
+_POD_RE = re.compile(r'pod[0-9a-f_-]{16,}(?:\.slice)?$')
+
+
+def classify(path: str) -> Tuple[str, str]:
+    """(kind, display name) of a cgroup from its path"""
+    base = path.rsplit('/', 1)[-1]
+    container = _CONTAINER_RE.search(base)
+    if container:
+        return 'container', container.group(1)[:12]
+    if _POD_RE.search(base):
+        return 'pod', base[:-len('.slice')] if base.endswith('.slice') else base
+    if base.endswith('.service'):
+        return 'service', base[:-len('.service')]
+    if base.startswith('user-') and base.endswith('.slice'):
+        return 'user', base[:-len('.slice')]
+    for suffix, kind in (('.scope', 'scope'), ('.slice', 'slice')):
+        if base.endswith(suffix):
+            return kind, base[:-len(suffix)]
+    return 'other', base
+
+
+def find_cgroup2_root() -> Optional[str]:
+    """Mount point of the unified hierarchy with the memory controller, if any"""
+    for root in ('/sys/fs/cgroup', '/sys/fs/cgroup/unified'):
+        try:
+            with open(os.path.join(root, 'cgroup.controllers')) as f:
+                if 'memory' in f.read().split():
+                    return root
+        except OSError:
+            continue
+    return None
+
+
+def _read_int(path: str) -> Optional[int]:
+    try:
+        with open(path) as f:
+            value = f.read().strip()
+        return None if value == 'max' else int(value)
+    except (OSError, ValueError):
+        # Missing, or truncated while the cgroup was being removed
+        return None
+
+
+def _read_keyed(path: str, keys) -> Dict[str, int]:
+    values = {}
+    try:
+        with open(path) as f:
+            for line in f:
+                key, _, value = line.partition(' ')
+                if key in keys:
+                    try:
+                        values[key] = int(value)
+                    except ValueError:
+                        continue
+    except OSError:
+        pass
+    return values
+
+
+def _read_pids(path: str) -> List[int]:
+    try:
+        with open(path) as f:
+            return [int(line) for line in f if line.strip().isdigit()]
+    except OSError:
+        return []
+
+
+class CgroupCollector:
+    """Per-cgroup memory accounting from the cgroup v2 hierarchy.
+
+    Reads a handful of small files per cgroup instead of walking every process, so a
+    container or service view costs far less than a process scan. Results are cached for
+    CGROUP_INTERVAL_SECONDS and joined with the monitor's process table on request.
+    """
+
+    def __init__(self, root: Optional[str] = None):
+        self.root = root or os.getenv("CGROUP_ROOT") or find_cgroup2_root()
+        self.interval = float(os.getenv("CGROUP_INTERVAL_SECONDS", "2.0"))
+        self.max_depth = int(os.getenv("CGROUP_MAX_DEPTH", "6"))
+        self.cgroups: List[Dict[str, Any]] = []
+        self.pid_cgroup: Dict[int, str] = {}
+        self.last_update: float = 0
+        self.last_attempt: float = 0
+        self._refresh: Optional[asyncio.Future] = None
+
+    @property
+    def available(self) -> bool:
+        return self.root is not None and os.path.exists(os.path.join(self.root, 'cgroup.controllers'))
+
+    async def refresh(self) -> None:
+        """Re-read the hierarchy in a worker thread if the cached view is stale"""
+        if self._refresh is None and time.time() - self.last_attempt >= self.interval:
+            # Concurrent requests share one read of the hierarchy
+            self.last_attempt = time.time()
+            self._refresh = asyncio.ensure_future(asyncio.to_thread(self._collect_or_keep))
+        if self._refresh is not None:
+            try:
+                await asyncio.shield(self._refresh)
+            finally:
+                if self._refresh is not None and self._refresh.done():
+                    self._refresh = None
+
+    def _collect_or_keep(self) -> None:
+        """collect(), serving the previous view until the next interval if that fails"""
+        try:
+            self.collect()
+        except Exception as e:
+            pipeline_stats.incr("cgroup_errors")
+            logger.error(f"Error reading the cgroup hierarchy, serving the cached view: {e}")
+
+    def collect(self) -> None:
+        with pipeline_stats.timer("cgroup_collect"):
+            cgroups = []
+            pid_cgroup = {}
+            stack = [(self.root, 0)]
+            while stack:
+                directory, depth = stack.pop()
+                try:
+                    entries = list(os.scandir(directory))
+                except OSError:
+                    continue
+                if depth > 0:
+                    cgroup = self._read_cgroup(directory)
+                    if cgroup is not None:
+                        cgroups.append(cgroup)
+                        for pid in cgroup['pids']:
+                            pid_cgroup[pid] = cgroup['path']
+                if depth < self.max_depth:
+                    stack.extend((entry.path, depth + 1) for entry in entries
+                                 if entry.is_dir(follow_symlinks=False))
+
+            self._add_descendant_pids(cgroups)
+            self.cgroups = cgroups
+            self.pid_cgroup = pid_cgroup
+            self.last_update = time.time()
+            pipeline_stats.set_gauge("cgroups", len(cgroups))
+
+    @staticmethod
+    def _add_descendant_pids(cgroups: List[Dict[str, Any]]) -> None:
+        """Give every cgroup the pids of its whole subtree, as memory.current charges them too"""
+        by_path = {cgroup['path']: cgroup for cgroup in cgroups}
+        for cgroup in cgroups:
+            cgroup['subtree_pids'] = list(cgroup['pids'])
+        # Deepest first, so a child's subtree is complete before it is added to its parent
+        for cgroup in sorted(cgroups, key=lambda c: c['path'].count('/'), reverse=True):
+            parent = cgroup['path'].rsplit('/', 1)[0]
+            while parent and parent not in by_path:
+                parent = parent.rsplit('/', 1)[0]
+            if parent:
+                by_path[parent]['subtree_pids'].extend(cgroup['subtree_pids'])
+
+    def _read_cgroup(self, directory: str) -> Optional[Dict[str, Any]]:
+        current = _read_int(os.path.join(directory, 'memory.current'))
+        if current is None:
+            return None
+        path = '/' + os.path.relpath(directory, self.root)
+        kind, name = classify(path)
+        limit = _read_int(os.path.join(directory, 'memory.max'))
+        return {
+            'path': path,
+            'name': name,
+            'kind': kind,
+            'memory_current': current,
+            'memory_max': limit,
+            'memory_limit_percent': round(current / limit * 100, 1) if limit else None,
+            'memory_peak': _read_int(os.path.join(directory, 'memory.peak')),
+            'swap_current': _read_int(os.path.join(directory, 'memory.swap.current')),
+            'stat': _read_keyed(os.path.join(directory, 'memory.stat'), STAT_KEYS),
+            'events': _read_keyed(os.path.join(directory, 'memory.events'), EVENT_KEYS),
+            'pids': _read_pids(os.path.join(directory, 'cgroup.procs')),
+        }
+
+    def cgroup_of(self, pid: int) -> Optional[str]:
+        return self.pid_cgroup.get(pid)
+
+    def get_view(self, processes_by_pid: Dict[int, Dict[str, Any]],
+                 kind: Optional[str] = None, top: Optional[int] = None,
+                 top_processes: int = 5) -> Dict[str, Any]:
+        """Cgroups sorted by charged memory, joined with the current process table"""
+        cgroups = [c for c in self.cgroups if kind is None or c['kind'] == kind]
+        cgroups = sorted(cgroups, key=lambda c: c['memory_current'], reverse=True)
+        if top is not None and top > 0:
+            cgroups = cgroups[:top]
+        return {
+            'timestamp': self.last_update,
+            'root': self.root,
+            'total_cgroups': len(self.cgroups),
+            'cgroups': [self._join(cgroup, processes_by_pid, top_processes) for cgroup in cgroups],
+        }
+
+    def get_cgroup(self, path: str, processes_by_pid: Dict[int, Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        path = '/' + path.strip('/')
+        for cgroup in self.cgroups:
+            if cgroup['path'] == path:
+                return self._join(cgroup, processes_by_pid, None)
+        return None
+
+    def _join(self, cgroup: Dict[str, Any], processes_by_pid: Dict[int, Dict[str, Any]],
+              top_processes: Optional[int]) -> Dict[str, Any]:
+        # Processes of the whole subtree, like memory_current
+        pids = cgroup.get('subtree_pids', cgroup['pids'])
+        members = [processes_by_pid[pid] for pid in pids if pid in processes_by_pid]
+        # Summed RSS double-counts shared pages and misses page cache; compare with memory_current
+        processes_rss = sum(p.get('memory_rss', 0) for p in members)
+        members.sort(key=lambda p: p.get('memory_rss', 0), reverse=True)
+        if top_processes is not None:
+            members = members[:top_processes]
+        result = {key: value for key, value in cgroup.items() if key not in ('pids', 'subtree_pids')}
+        result['process_count'] = len(pids)
+        result['direct_process_count'] = len(cgroup['pids'])
+        result['processes_rss'] = processes_rss
+        result['processes'] = [
+            {'pid': p['pid'], 'name': p['name'], 'memory_rss': p['memory_rss'],
+             'memory_percent': p['memory_percent']}
+            for p in members
+        ]
+        return result
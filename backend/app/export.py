@@ -0,0 +1,90 @@
+import io
+import csv
+import json
+from typing import List, AsyncIterator
+
+from .logger import ProcessLogger, EXPORT_TABLES
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+except ImportError:  # Arrow export is optional
+    pyarrow = None
+
+EXPORT_FORMATS = {
+    'csv': ('text/csv', 'csv'),
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+    'arrow': ('application/vnd.apache.arrow.stream', 'arrows'),
+}
+
+
+def check_export(table: str, fmt: str) -> None:
+    """Raise ValueError for an unknown table or format, or Arrow without pyarrow"""
+    if table not in EXPORT_TABLES:
+        raise ValueError(f"Unknown table: {table}. Use any of {', '.join(EXPORT_TABLES)}")
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown format: {fmt}. Use any of {', '.join(EXPORT_FORMATS)}")
+    if fmt == 'arrow' and pyarrow is None:
+        raise ValueError("Arrow export requires pyarrow to be installed")
+
+
+async def _csv_chunks(columns: List[str], chunks) -> AsyncIterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    async for rows in chunks:
+        writer.writerows(rows)
+        yield buffer.getvalue().encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate()
+    # Header only, for an empty range
+    if buffer.tell():
+        yield buffer.getvalue().encode('utf-8')
+
+
+async def _ndjson_chunks(columns: List[str], chunks) -> AsyncIterator[bytes]:
+    # Event payloads are stored as JSON text; embed them as objects
+    embed_data = 'data' in columns
+    async for rows in chunks:
+        lines = []
+        for row in rows:
+            record = dict(zip(columns, row))
+            if embed_data and record['data']:
+                record['data'] = json.loads(record['data'])
+            lines.append(json.dumps(record, separators=(',', ':')))
+        lines.append('')
+        yield '\n'.join(lines).encode('utf-8')
+
+
+def _arrow_schema(columns: List[str]):
+    types = {'timestamp': pyarrow.float64(), 'pid': pyarrow.int64(), 'memory_rss': pyarrow.int64(),
+             'memory_percent': pyarrow.float64(), 'cpu_percent': pyarrow.float64()}
+    return pyarrow.schema([(column, types.get(column, pyarrow.string())) for column in columns])
+
+
+async def _arrow_chunks(columns: List[str], chunks) -> AsyncIterator[bytes]:
+    schema = _arrow_schema(columns)
+    # One record batch per chunk, written to a sink that is emptied after every batch
+    sink = io.BytesIO()
+    writer = pyarrow.ipc.new_stream(sink, schema)
+    async for rows in chunks:
+        arrays = [pyarrow.array([row[i] for row in rows], type=schema.field(i).type)
+                  for i in range(len(columns))]
+        writer.write_batch(pyarrow.record_batch(arrays, schema=schema))
+        yield sink.getvalue()
+        sink.seek(0)
+        sink.truncate()
+    writer.close()
+    yield sink.getvalue()
+
+
+def stream_export(process_logger: ProcessLogger, table: str, fmt: str, start: float, end: float,
+                  chunk_size: int = 5000) -> AsyncIterator[bytes]:
+    """Encoded chunks of a logged table between start and end (call check_export first)"""
+    columns = EXPORT_TABLES[table]
+    chunks = process_logger.iter_rows(table, start, end, chunk_size)
+    if fmt == 'csv':
+        return _csv_chunks(columns, chunks)
+    if fmt == 'ndjson':
+        return _ndjson_chunks(columns, chunks)
+    return _arrow_chunks(columns, chunks)
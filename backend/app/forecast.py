@@ -0,0 +1,192 @@
+import os
+import math
+import time
+import logging
+from statistics import NormalDist
+from typing import List, Dict, Any, Optional
+
+from .stats import pipeline_stats
+
+logger = logging.getLogger("memory_monitor")
+
+
+class TrendEstimator:
+    """Exponentially weighted linear regression of a value over time.
+
+    Every sample costs O(1): the weighted means and (co)variances are updated in place,
+    and older samples are discounted by half every half_life seconds. Times are kept
+    relative to the first sample so large epoch values do not cost precision.
+    """
+
+    __slots__ = ('half_life', 'origin', 'last_time', 'last_value', 'weight', 'weight_sq',
+                 'mean_t', 'mean_y', 'var_t', 'cov_ty', 'var_y', 'samples')
+
+    def __init__(self, half_life: float):
+        self.half_life = half_life
+        self.origin: Optional[float] = None
+        self.last_time = 0.0
+        self.last_value = 0.0
+        self.weight = 0.0
+        self.weight_sq = 0.0
+        self.mean_t = 0.0
+        self.mean_y = 0.0
+        self.var_t = 0.0
+        self.cov_ty = 0.0
+        self.var_y = 0.0
+        self.samples = 0
+
+    def add(self, timestamp: float, value: float) -> None:
+        if self.origin is None:
+            self.origin = timestamp
+        t = timestamp - self.origin
+        if self.samples and t <= self.last_time:
+            return
+        decay = 0.5 ** ((t - self.last_time) / self.half_life) if self.samples else 0.0
+        self.weight = self.weight * decay + 1
+        self.weight_sq = self.weight_sq * decay * decay + 1
+        self.var_t *= decay
+        self.cov_ty *= decay
+        self.var_y *= decay
+        # Weighted Welford update
+        dt = t - self.mean_t
+        dy = value - self.mean_y
+        self.mean_t += dt / self.weight
+        self.mean_y += dy / self.weight
+        self.var_t += dt * (t - self.mean_t)
+        self.cov_ty += dt * (value - self.mean_y)
+        self.var_y += dy * (value - self.mean_y)
+        self.last_time = t
+        self.last_value = value
+        self.samples += 1
+
+    def effective_samples(self) -> float:
+        return self.weight * self.weight / self.weight_sq if self.weight_sq else 0.0
+
+    def slope(self) -> Optional[float]:
+        """Change per second, or None before two distinct times"""
+        if self.var_t <= 0:
+            return None
+        return self.cov_ty / self.var_t
+
+    def slope_error(self) -> Optional[float]:
+        """Standard error of the slope from the weighted residuals"""
+        n = self.effective_samples()
+        if self.var_t <= 0 or n <= 2:
+            return None
+        residual = max(0.0, self.var_y - self.cov_ty * self.cov_ty / self.var_t)
+        return math.sqrt(residual / ((n - 2) * self.var_t))
+
+    def level(self) -> float:
+        """Fitted value at the latest sample"""
+        slope = self.slope() or 0.0
+        return self.mean_y + slope * (self.last_time - self.mean_t)
+
+
+def time_to_exhaustion(remaining: float, rate: float, error: float, z: float) -> Dict[str, Any]:
+    """Seconds until remaining bytes are used up at rate bytes/s, with bounds for rate ± z·error.
+
+    The upper bound is None when the slower end of the interval does not consume memory.
+    """
+    remaining = max(0.0, remaining)
+    fast, slow = rate + z * error, rate - z * error
+    return {
+        'seconds': round(remaining / rate, 1) if rate > 0 else None,
+        'lower': round(remaining / fast, 1) if fast > 0 else None,
+        'upper': round(remaining / slow, 1) if slow > 0 and rate > 0 else None,
+    }
+
+
+class MemoryForecaster:
+    """Forecasts when system memory runs out from the monitor's own scans.
+
+    One TrendEstimator follows available system memory and one follows the RSS of each
+    process, so a scan costs O(1) per process. The system forecast extrapolates the
+    decline of available memory down to FORECAST_RESERVE_MB. A process forecast assumes
+    everything else stays put and asks when its growth alone would use up what is
+    available. Bounds come from the FORECAST_CONFIDENCE interval of the fitted slope.
+    """
+
+    def __init__(self):
+        self.half_life = float(os.getenv("FORECAST_HALF_LIFE_SECONDS", "300"))
+        self.confidence = float(os.getenv("FORECAST_CONFIDENCE", "0.9"))
+        self.z = NormalDist().inv_cdf((1 + self.confidence) / 2)
+        self.min_samples = int(os.getenv("FORECAST_MIN_SAMPLES", "10"))
+        self.reserve = float(os.getenv("FORECAST_RESERVE_MB", "0")) * 1024 * 1024
+        self.horizon = float(os.getenv("FORECAST_HORIZON_SECONDS", "86400"))
+        self.top = int(os.getenv("FORECAST_TOP_PROCESSES", "5"))
+        self.system = TrendEstimator(self.half_life)
+        # pid -> (create_time, name, estimator)
+        self._processes: Dict[int, tuple] = {}
+        self._available = 0.0
+        self._version: Optional[int] = None
+        self._forecast: Optional[Dict[str, Any]] = None
+
+    def observe(self, monitor) -> None:
+        """Feed the monitor's latest scan (once per version; restored snapshots are skipped)"""
+        if monitor.version == self._version or monitor.stale or not monitor.processes:
+            return
+        self._version = monitor.version
+        with pipeline_stats.timer("forecast"):
+            timestamp = monitor.data_timestamp if monitor.data_timestamp is not None else time.time()
+            self._available = monitor.get_system_memory()['memory']['available']
+            self.system.add(timestamp, self._available)
+
+            previous, self._processes = self._processes, {}
+            for process in monitor.processes:
+                pid = process['pid']
+                entry = previous.get(pid)
+                # A reused PID starts a new trend
+                if entry is None or entry[0] != process.get('create_time') or entry[1] != process.get('name'):
+                    entry = (process.get('create_time'), process.get('name'), TrendEstimator(self.half_life))
+                entry[2].add(timestamp, process.get('memory_rss') or 0)
+                self._processes[pid] = entry
+            self._forecast = None
+
+    def _system_forecast(self) -> Dict[str, Any]:
+        estimator = self.system
+        slope, error = estimator.slope(), estimator.slope_error()
+        forecast = {
+            'available': self._available,
+            'samples': estimator.samples,
+            'trend_bytes_per_second': round(slope, 1) if slope is not None else None,
+        }
+        if estimator.samples < self.min_samples or slope is None or error is None:
+            forecast.update({'seconds': None, 'lower': None, 'upper': None})
+        else:
+            forecast.update(time_to_exhaustion(estimator.level() - self.reserve, -slope, error, self.z))
+        return forecast
+
+    def _process_forecasts(self, limit: int) -> List[Dict[str, Any]]:
+        remaining = self._available - self.reserve
+        forecasts = []
+        for pid, (_, name, estimator) in self._processes.items():
+            if estimator.samples < self.min_samples:
+                continue
+            slope, error = estimator.slope(), estimator.slope_error()
+            if slope is None or error is None or slope <= 0 or remaining / slope > self.horizon:
+                continue
+            forecast = {
+                'pid': pid,
+                'name': name,
+                'memory_rss': estimator.last_value,
+                'trend_bytes_per_second': round(slope, 1),
+            }
+            forecast.update(time_to_exhaustion(remaining, slope, error, self.z))
+            forecasts.append(forecast)
+        forecasts.sort(key=lambda f: f['seconds'])
+        return forecasts[:limit]
+
+    def get_forecast(self, top: Optional[int] = None) -> Dict[str, Any]:
+        """System and per-process time to exhaustion (seconds, with lower/upper bounds)"""
+        if top is None and self._forecast is not None:
+            return self._forecast
+        forecast = {
+            'confidence': self.confidence,
+            'half_life_seconds': self.half_life,
+            'system': self._system_forecast(),
+            'processes': self._process_forecasts(top if top is not None else self.top),
+        }
+        # The default view goes into every snapshot, so build it once per scan
+        if top is None:
+            self._forecast = forecast
+        return forecast
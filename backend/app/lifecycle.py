@@ -0,0 +1,284 @@
+import os
+import time
+import errno
+import socket
+import struct
+import asyncio
+import logging
+from typing import List, Dict, Any, Optional, Tuple, Iterator
+
+import psutil
+
+from .stats import pipeline_stats
+
+logger = logging.getLogger("memory_monitor")
+
+# linux/connector.h and linux/cn_proc.h
+NETLINK_CONNECTOR = 11
+CN_IDX_PROC = 1
+CN_VAL_PROC = 1
+PROC_CN_MCAST_LISTEN = 1
+PROC_CN_MCAST_IGNORE = 2
+NLMSG_DONE = 3
+
+PROC_EVENT_FORK = 0x00000001
+PROC_EVENT_EXEC = 0x00000002
+PROC_EVENT_EXIT = 0x80000000
+
+NLMSG_HEADER = struct.Struct('=IHHII')       # len, type, flags, seq, pid
+CN_MSG_HEADER = struct.Struct('=IIIIHH')     # idx, val, seq, ack, len, flags
+PROC_EVENT_HEADER = struct.Struct('=IIQ')    # what, cpu, timestamp_ns
+FORK_EVENT = struct.Struct('=IIII')          # parent pid/tgid, child pid/tgid
+EXEC_EVENT = struct.Struct('=II')            # pid, tgid
+EXIT_EVENT = struct.Struct('=IIII')          # pid, tgid, exit_code, exit_signal
+
+
+def parse_events(data: bytes) -> List[Tuple]:
+    """Decode proc connector datagrams into ('fork'|'exec', pid) and ('exit', pid, exit_code).
+
+    Only thread-group leaders are reported, thread creation and exit are ignored.
+    """
+    events = []
+    offset = 0
+    while offset + NLMSG_HEADER.size <= len(data):
+        length = NLMSG_HEADER.unpack_from(data, offset)[0]
+        if length < NLMSG_HEADER.size:
+            break
+        body = offset + NLMSG_HEADER.size + CN_MSG_HEADER.size
+        if body + PROC_EVENT_HEADER.size <= offset + length:
+            what = PROC_EVENT_HEADER.unpack_from(data, body)[0]
+            event = body + PROC_EVENT_HEADER.size
+            if what == PROC_EVENT_FORK:
+                _, _, child_pid, child_tgid = FORK_EVENT.unpack_from(data, event)
+                if child_pid == child_tgid:
+                    events.append(('fork', child_tgid))
+            elif what == PROC_EVENT_EXEC:
+                pid, tgid = EXEC_EVENT.unpack_from(data, event)
+                if pid == tgid:
+                    events.append(('exec', tgid))
+            elif what == PROC_EVENT_EXIT:
+                pid, tgid, exit_code, _ = EXIT_EVENT.unpack_from(data, event)
+                if pid == tgid:
+                    events.append(('exit', tgid, exit_code))
+        # Messages are 4-byte aligned
+        offset += (length + 3) & ~3
+    return events
+
+
+class ProcConnector:
+    """Netlink socket subscribed to the kernel's process events (needs CAP_NET_ADMIN)"""
+
+    def __init__(self):
+        self.sock: Optional[socket.socket] = None
+
+    def open(self) -> None:
+        """Subscribe; raises OSError when netlink or the privilege is missing"""
+        if not hasattr(socket, 'AF_NETLINK'):
+            raise OSError(errno.EAFNOSUPPORT, "netlink is only available on Linux")
+        sock = socket.socket(socket.AF_NETLINK, socket.SOCK_DGRAM, NETLINK_CONNECTOR)
+        try:
+            sock.bind((0, CN_IDX_PROC))
+            sock.send(self._control_message(PROC_CN_MCAST_LISTEN))
+            sock.setblocking(False)
+        except OSError:
+            sock.close()
+            raise
+        self.sock = sock
+
+    def _control_message(self, operation: int) -> bytes:
+        payload = struct.pack('=I', operation)
+        cn_msg = CN_MSG_HEADER.pack(CN_IDX_PROC, CN_VAL_PROC, 0, 0, len(payload), 0) + payload
+        return NLMSG_HEADER.pack(NLMSG_HEADER.size + len(cn_msg), NLMSG_DONE, 0, 0, os.getpid()) + cn_msg
+
+    def fileno(self) -> int:
+        return self.sock.fileno()
+
+    def read_events(self) -> Tuple[List[Tuple], bool]:
+        """Drain the socket; returns (events, overflowed)"""
+        events = []
+        overflowed = False
+        while True:
+            try:
+                data = self.sock.recv(65536)
+            except BlockingIOError:
+                break
+            except OSError as e:
+                if e.errno == errno.ENOBUFS:
+                    # The kernel dropped events; the caller must rescan
+                    overflowed = True
+                    continue
+                raise
+            events.extend(parse_events(data))
+        return events, overflowed
+
+    def close(self) -> None:
+        if self.sock is not None:
+            try:
+                self.sock.send(self._control_message(PROC_CN_MCAST_IGNORE))
+            except OSError:
+                pass
+            self.sock.close()
+            self.sock = None
+
+
+class LifecycleTracker:
+    """Keeps the live PID set up to date from fork/exec/exit events between full rescans.
+
+    New processes are probed every LIFECYCLE_PROBE_MS, off the event loop, until the next scan picks them up, so
+    short-lived processes that start and exit between ticks still leave a memory reading
+    behind. The monitor falls back to a full psutil sweep every LIFECYCLE_RESCAN_SECONDS,
+    or right away if the kernel reports dropped events.
+    """
+
+    def __init__(self, rescan_interval: Optional[float] = None, probe_interval: Optional[float] = None):
+        self.rescan_interval = rescan_interval if rescan_interval is not None else \
+            float(os.getenv("LIFECYCLE_RESCAN_SECONDS", "30"))
+        self.probe_interval = probe_interval if probe_interval is not None else \
+            float(os.getenv("LIFECYCLE_PROBE_MS", "200")) / 1000
+        self.connector: Optional[ProcConnector] = None
+        self.procs: Dict[int, psutil.Process] = {}
+        # pid -> latest probe of a process not yet seen by a scan (None until probed)
+        self.young: Dict[int, Optional[Dict[str, Any]]] = {}
+        self.exits: Dict[int, Dict[str, Any]] = {}
+        # pids whose psutil handle must be (re)created by the next probe
+        self._pending: set = set()
+        self.last_rescan: float = 0
+        self.resync = True
+        self._probe_task: Optional[asyncio.Task] = None
+
+    @property
+    def active(self) -> bool:
+        return self.connector is not None
+
+    def start(self, connector: Optional[ProcConnector] = None) -> bool:
+        """Subscribe to process events; False (and full rescans only) if that is not possible"""
+        connector = connector or ProcConnector()
+        try:
+            if connector.sock is None:
+                connector.open()
+        except OSError as e:
+            logger.info(f"Process connector unavailable ({e}), discovering processes by full rescans")
+            return False
+        self.connector = connector
+        loop = asyncio.get_running_loop()
+        loop.add_reader(connector.fileno(), self.on_readable)
+        self._probe_task = asyncio.create_task(self._probe_loop())
+        logger.info("Tracking process lifecycle through the proc connector")
+        return True
+
+    async def stop(self) -> None:
+        if self._probe_task is not None:
+            self._probe_task.cancel()
+            try:
+                await self._probe_task
+            except asyncio.CancelledError:
+                pass
+            self._probe_task = None
+        if self.connector is not None:
+            asyncio.get_running_loop().remove_reader(self.connector.fileno())
+            self.connector.close()
+            self.connector = None
+
+    def on_readable(self) -> None:
+        try:
+            events, overflowed = self.connector.read_events()
+        except OSError as e:
+            logger.error(f"Error reading process events: {e}")
+            self.resync = True
+            return
+        if overflowed:
+            pipeline_stats.incr("lifecycle_overflows")
+            self.resync = True
+        self.apply(events)
+
+    def apply(self, events: List[Tuple]) -> None:
+        """Update the live set from decoded events; new processes are probed by the probe loop"""
+        now = time.time()
+        for event in events:
+            kind, pid = event[0], event[1]
+            pipeline_stats.incr(f"lifecycle_{kind}")
+            if kind == 'exit':
+                self.procs.pop(pid, None)
+                self._pending.discard(pid)
+                self.exits[pid] = {'exit_code': event[2], 'exit_time': now, 'last': self.young.pop(pid, None)}
+                continue
+            # exec keeps the pid but changes name and command line
+            self._pending.add(pid)
+            self.young.setdefault(pid, None)
+
+    @staticmethod
+    def _probe_all(targets: Dict[int, Optional[psutil.Process]]) -> Dict[int, Tuple[psutil.Process, Dict[str, Any]]]:
+        """Read the memory of each process, creating the psutil handles still missing (blocking)"""
+        results = {}
+        for pid, proc in targets.items():
+            try:
+                if proc is None:
+                    proc = psutil.Process(pid)
+                with proc.oneshot():
+                    results[pid] = (proc, {
+                        'pid': pid,
+                        'name': proc.name(),
+                        'username': proc.username(),
+                        'memory_rss': proc.memory_info().rss,
+                        'memory_percent': round(proc.memory_percent(), 2),
+                        'create_time': proc.create_time(),
+                    })
+            except psutil.Error:
+                continue
+        return results
+
+    async def probe(self) -> None:
+        """Probe every process not yet seen by a scan in one worker thread round trip"""
+        if not self.young:
+            return
+        pending, self._pending = self._pending, set()
+        targets = {pid: None if pid in pending else self.procs.get(pid) for pid in self.young}
+        with pipeline_stats.timer("lifecycle_probe"):
+            results = await asyncio.to_thread(self._probe_all, targets)
+        for pid, (proc, probe) in results.items():
+            # Exited or picked up by a scan while the thread ran
+            if pid not in self.young:
+                continue
+            if pid in pending:
+                self.procs[pid] = proc
+            previous = self.young[pid]
+            # Keep the peak so a short-lived hog is reported at its largest
+            rss = probe['memory_rss']
+            probe['peak_rss'] = max(rss, previous['peak_rss']) if previous else rss
+            self.young[pid] = probe
+
+    async def _probe_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.probe_interval)
+            try:
+                await self.probe()
+            except Exception as e:
+                logger.error(f"Error probing new processes: {e}")
+
+    def needs_rescan(self, now: float) -> bool:
+        return self.resync or now - self.last_rescan >= self.rescan_interval
+
+    def process_iter(self, attrs: List[str]) -> Iterator[psutil.Process]:
+        """Like psutil.process_iter, over the tracked PIDs only"""
+        for pid, proc in list(self.procs.items()):
+            try:
+                proc.info = proc.as_dict(attrs)
+            except psutil.NoSuchProcess:
+                self.procs.pop(pid, None)
+                continue
+            yield proc
+
+    def reconcile(self, procs: List[psutil.Process]) -> None:
+        """Replace the live set with the result of a full rescan"""
+        self.procs = {proc.pid: proc for proc in procs}
+        self.last_rescan = time.time()
+        self.resync = False
+
+    def scanned(self, live_pids) -> None:
+        """Stop probing processes the monitor now samples itself"""
+        for pid in [pid for pid in self.young if pid in live_pids]:
+            del self.young[pid]
+
+    def drain_exits(self) -> Dict[int, Dict[str, Any]]:
+        exits, self.exits = self.exits, {}
+        return exits
@@ -4,11 +4,33 @@ import json
 import time
 from datetime import datetime
 import asyncio
-from typing import List, Dict, Any, Optional, Union
-import aiosqlite
+from typing import List, Dict, Any, Optional, Union, AsyncIterator
 import csv
+import heapq
+from itertools import islice
 from pathlib import Path
 
+from .stats import pipeline_stats
+from .rollups import RollupBuffer, TOP_METRICS, plan_window, rollup_row
+from .pagination import query_key, encode_keyset_cursor, decode_keyset_cursor
+
+# Logged tables that can be exported, with their columns in storage order
+EXPORT_TABLES = {
+    'process_snapshots': ['timestamp', 'datetime', 'pid', 'name', 'username',
+                          'status', 'memory_rss', 'memory_percent', 'cpu_percent'],
+    'events': ['timestamp', 'datetime', 'event_type', 'data'],
+}
+
+# Types of the numeric columns, to restore them from CSV storage
+_COLUMN_TYPES = {'timestamp': float, 'pid': int, 'memory_rss': int, 'memory_percent': float, 'cpu_percent': float}
+
+
+
+def _event_pid(data: Dict[str, Any]) -> Optional[int]:
+    """PID an event is about, stored in its own column so it can be indexed"""
+    pid = data.get('pid')
+    return pid if isinstance(pid, int) and not isinstance(pid, bool) else None
+
 # Setup application logger
 def setup_logger():
     """Configure the application logger"""
@@ -47,6 +69,19 @@ class ProcessLogger:
         self.max_rows = int(os.getenv("MAX_LOG_ROWS", "10000"))
         self.db_connection = None
         self.initialized = False
+        # Snapshot writes started but not yet finished
+        self.pending_writes = 0
+        # Per-minute/per-hour process aggregates not yet written (SQLite only)
+        self.rollups = RollupBuffer()
+        # Serializes SQLite writes and retention so VACUUM never lands inside an open transaction
+        self._write_lock: Optional[asyncio.Lock] = None
+    
+    @property
+    def write_lock(self) -> asyncio.Lock:
+        # Created on first use, inside the running loop
+        if self._write_lock is None:
+            self._write_lock = asyncio.Lock()
+        return self._write_lock
     
     async def initialize(self):
         """Initialize the logger based on storage type"""
@@ -70,6 +105,8 @@ class ProcessLogger:
     async def _init_sqlite(self):
         """Initialize SQLite database"""
         # Create database connection
+        # Imported here so services that never log do not pay for it at startup
+        import aiosqlite
         self.db_connection = await aiosqlite.connect(self.db_path)
         
         # Create tables if they don't exist
@@ -94,7 +131,28 @@ class ProcessLogger:
                 timestamp REAL NOT NULL,
                 datetime TEXT NOT NULL,
                 event_type TEXT NOT NULL,
-                data TEXT NOT NULL
+                data TEXT NOT NULL,
+                pid INTEGER
+            )
+        """)
+        await self._migrate_events()
+        
+        # Peak and sum of RSS/CPU per process and minute or hour, for windowed top-N queries
+        await self.db_connection.execute("""
+            CREATE TABLE IF NOT EXISTS process_rollups (
+                resolution INTEGER NOT NULL,
+                bucket REAL NOT NULL,
+                pid INTEGER NOT NULL,
+                name TEXT NOT NULL,
+                username TEXT,
+                samples INTEGER NOT NULL,
+                rss_max INTEGER NOT NULL,
+                rss_sum REAL NOT NULL,
+                cpu_max REAL NOT NULL,
+                cpu_sum REAL NOT NULL,
+                first_seen REAL NOT NULL,
+                last_seen REAL NOT NULL,
+                PRIMARY KEY (resolution, bucket, pid, name)
             )
         """)
         
@@ -108,8 +166,43 @@ class ProcessLogger:
             ON process_snapshots(timestamp)
         """)
         
+        # Event queries filter on type, PID and time and return the newest first
+        await self.db_connection.execute("""
+            CREATE INDEX IF NOT EXISTS idx_events_type_timestamp
+            ON events(event_type, timestamp)
+        """)
+        
+        await self.db_connection.execute("""
+            CREATE INDEX IF NOT EXISTS idx_events_pid_timestamp
+            ON events(pid, timestamp)
+        """)
+        
+        await self.db_connection.execute("""
+            CREATE INDEX IF NOT EXISTS idx_events_timestamp
+            ON events(timestamp)
+        """)
+        
         await self.db_connection.commit()
     
+    async def _migrate_events(self):
+        """Add the pid column to an events table created by an earlier version"""
+        async with self.db_connection.execute("PRAGMA table_info(events)") as cursor:
+            columns = [row[1] for row in await cursor.fetchall()]
+        if 'pid' in columns:
+            return
+        
+        self.logger.info("Adding pid column to the events table")
+        await self.db_connection.execute("ALTER TABLE events ADD COLUMN pid INTEGER")
+        try:
+            await self.db_connection.execute("""
+                UPDATE events
+                SET pid = json_extract(data, '$.pid')
+                WHERE json_valid(data) AND json_type(data, '$.pid') = 'integer'
+            """)
+        except Exception as e:
+            # SQLite without JSON functions: older events stay unindexed by PID
+            self.logger.warning(f"Could not fill in the PID of existing events: {e}")
+    
     async def _init_csv(self):
         """Initialize CSV storage"""
         # Create directory if it doesn't exist
@@ -136,6 +229,8 @@ class ProcessLogger:
     async def shutdown(self):
         """Clean up resources"""
         if self.storage_type == "sqlite" and self.db_connection:
+            async with self.write_lock:
+                await self._flush_rollups()
             await self.db_connection.close()
             self.db_connection = None
         
@@ -150,21 +245,37 @@ class ProcessLogger:
         timestamp = snapshot.get('timestamp', time.time())
         datetime_str = snapshot.get('datetime', datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
         
+        self.pending_writes += 1
+        pipeline_stats.set_gauge("logger_pending_writes", self.pending_writes)
+        start = time.perf_counter()
         try:
             if self.storage_type == "sqlite":
-                await self._log_snapshot_sqlite(snapshot, timestamp, datetime_str)
+                async with self.write_lock:
+                    await self._log_snapshot_sqlite(snapshot, timestamp, datetime_str)
             elif self.storage_type == "csv":
                 await self._log_snapshot_csv(snapshot, timestamp, datetime_str)
+            pipeline_stats.incr("logger_rows_written", len(snapshot.get('processes', [])))
         except Exception as e:
+            pipeline_stats.incr("logger_errors")
             self.logger.error(f"Error logging snapshot: {e}")
+        finally:
+            self.pending_writes -= 1
+            pipeline_stats.set_gauge("logger_pending_writes", self.pending_writes)
+            pipeline_stats.observe("logger_write", (time.perf_counter() - start) * 1000)
     
     async def _log_snapshot_sqlite(self, snapshot: Dict[str, Any], timestamp: float, datetime_str: str):
         """Log snapshot to SQLite"""
         if not self.db_connection:
             return
         
+        # A new minute closes the pending aggregates
+        processes = snapshot.get('processes', [])
+        if self.rollups.rolls_over(timestamp):
+            await self._flush_rollups(commit=False)
+        self.rollups.add(timestamp, processes)
+        
         # Insert each process as a separate row
-        for process in snapshot.get('processes', []):
+        for process in processes:
             await self.db_connection.execute("""
                 INSERT INTO process_snapshots (
                     timestamp, datetime, pid, name, username, status,
@@ -209,45 +320,322 @@ class ProcessLogger:
     
     async def log_event(self, event_type: str, data: Dict[str, Any]):
         """Log an event"""
+        await self.log_events(event_type, [data])
+    
+    async def log_events(self, event_type: str, items: List[Dict[str, Any]]):
+        """Log several events of one type in a single write"""
+        if not items:
+            return
         if not self.initialized:
             await self.initialize()
         
         timestamp = time.time()
         datetime_str = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        data_json = json.dumps(data)
+        rows = [(timestamp, datetime_str, event_type, json.dumps(data), _event_pid(data)) for data in items]
         
         try:
             if self.storage_type == "sqlite":
-                await self._log_event_sqlite(event_type, data_json, timestamp, datetime_str)
+                async with self.write_lock:
+                    await self._log_events_sqlite(rows)
             elif self.storage_type == "csv":
-                await self._log_event_csv(event_type, data_json, timestamp, datetime_str)
+                await self._log_events_csv(rows)
         except Exception as e:
             self.logger.error(f"Error logging event: {e}")
     
-    async def _log_event_sqlite(self, event_type: str, data_json: str, timestamp: float, datetime_str: str):
-        """Log event to SQLite"""
+    async def _log_events_sqlite(self, rows: List[tuple]):
+        """Log events to SQLite"""
         if not self.db_connection:
             return
         
-        await self.db_connection.execute("""
-            INSERT INTO events (timestamp, datetime, event_type, data)
-            VALUES (?, ?, ?, ?)
-        """, (timestamp, datetime_str, event_type, data_json))
+        await self.db_connection.executemany("""
+            INSERT INTO events (timestamp, datetime, event_type, data, pid)
+            VALUES (?, ?, ?, ?, ?)
+        """, rows)
         
         await self.db_connection.commit()
     
-    async def _log_event_csv(self, event_type: str, data_json: str, timestamp: float, datetime_str: str):
-        """Log event to CSV"""
+    async def _log_events_csv(self, rows: List[tuple]):
+        """Log events to CSV"""
         csv_path = Path(self.csv_dir) / "events.csv"
         
         # Use asyncio to run file operations in a thread pool
         def write_to_csv():
             with open(csv_path, 'a', newline='') as f:
                 writer = csv.writer(f)
-                writer.writerow([timestamp, datetime_str, event_type, data_json])
+                # The PID stays inside data; the CSV layout is unchanged
+                writer.writerows(row[:4] for row in rows)
         
         await asyncio.to_thread(write_to_csv)
     
+    async def get_events(self, event_types: Optional[List[str]] = None,
+                         start: Optional[float] = None, end: Optional[float] = None,
+                         pid: Optional[int] = None, limit: int = 100,
+                         cursor: Optional[str] = None) -> Dict[str, Any]:
+        """Logged events matching every given filter, newest first.
+        
+        Pages are keyed on (timestamp, id) of the last event returned, so paging is
+        stable while new events are logged. Send the same filters with every page.
+        Raises ValueError on a malformed cursor or one issued for other filters.
+        """
+        if not self.initialized:
+            await self.initialize()
+        
+        event_types = sorted(set(event_types)) if event_types else None
+        query = query_key((event_types, start, end, pid))
+        position = None
+        if cursor:
+            decoded = decode_keyset_cursor(cursor)
+            if decoded['q'] != query or len(decoded['k']) != 2:
+                raise ValueError("Cursor was issued for a different query")
+            position = tuple(decoded['k'])
+        
+        with pipeline_stats.timer("event_query"):
+            # One extra row tells whether there is another page
+            if self.storage_type == "sqlite":
+                rows = await self._get_events_sqlite(event_types, start, end, pid, position, limit + 1)
+            else:
+                rows = await self._get_events_csv(event_types, start, end, pid, position, limit + 1)
+        
+        events = [{
+            'id': row[0],
+            'timestamp': row[1],
+            'datetime': row[2],
+            'event_type': row[3],
+            'pid': row[4],
+            'data': json.loads(row[5]) if row[5] else None,
+        } for row in rows[:limit]]
+        more = len(rows) > limit
+        next_cursor = encode_keyset_cursor((events[-1]['timestamp'], events[-1]['id']), query) if more else None
+        return {'events': events, 'next_cursor': next_cursor}
+    
+    async def _get_events_sqlite(self, event_types: Optional[List[str]], start: Optional[float],
+                                 end: Optional[float], pid: Optional[int],
+                                 position: Optional[tuple], limit: int) -> List[tuple]:
+        if not self.db_connection:
+            return []
+        
+        conditions, params = [], []
+        if event_types:
+            conditions.append(f"event_type IN ({', '.join('?' * len(event_types))})")
+            params.extend(event_types)
+        if pid is not None:
+            conditions.append("pid = ?")
+            params.append(pid)
+        if start is not None:
+            conditions.append("timestamp >= ?")
+            params.append(start)
+        if end is not None:
+            conditions.append("timestamp < ?")
+            params.append(end)
+        if position is not None:
+            conditions.append("(timestamp, id) < (?, ?)")
+            params.extend(position)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        
+        async with self.db_connection.execute(f"""
+            SELECT id, timestamp, datetime, event_type, pid, data
+            FROM events
+            {where}
+            ORDER BY timestamp DESC, id DESC
+            LIMIT ?
+        """, (*params, limit)) as cursor:
+            return await cursor.fetchall()
+    
+    async def _get_events_csv(self, event_types: Optional[List[str]], start: Optional[float],
+                              end: Optional[float], pid: Optional[int],
+                              position: Optional[tuple], limit: int) -> List[tuple]:
+        """Scan the events file; the line number stands in for the id"""
+        csv_path = Path(self.csv_dir) / "events.csv"
+        if not csv_path.exists():
+            return []
+        
+        def read_from_csv():
+            matches = []
+            with open(csv_path, 'r', newline='') as f:
+                reader = csv.reader(f)
+                next(reader, None)
+                for line, row in enumerate(reader, start=1):
+                    timestamp = float(row[0])
+                    if event_types and row[2] not in event_types:
+                        continue
+                    if (start is not None and timestamp < start) or (end is not None and timestamp >= end):
+                        continue
+                    if position is not None and (timestamp, line) >= position:
+                        continue
+                    event_pid = _event_pid(json.loads(row[3])) if row[3] else None
+                    if pid is not None and event_pid != pid:
+                        continue
+                    matches.append((line, timestamp, row[1], row[2], event_pid, row[3]))
+            return heapq.nlargest(limit, matches, key=lambda match: (match[1], match[0]))
+        
+        return await asyncio.to_thread(read_from_csv)
+    
+    async def _flush_rollups(self, commit: bool = True):
+        """Add the pending aggregates to the minute and hour rows"""
+        rows = self.rollups.drain()
+        if not rows or not self.db_connection:
+            return
+        
+        with pipeline_stats.timer("rollup_flush"):
+            await self.db_connection.executemany("""
+                INSERT INTO process_rollups (
+                    resolution, bucket, pid, name, username, samples,
+                    rss_max, rss_sum, cpu_max, cpu_sum, first_seen, last_seen
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (resolution, bucket, pid, name) DO UPDATE SET
+                    username = excluded.username,
+                    samples = samples + excluded.samples,
+                    rss_max = MAX(rss_max, excluded.rss_max),
+                    rss_sum = rss_sum + excluded.rss_sum,
+                    cpu_max = MAX(cpu_max, excluded.cpu_max),
+                    cpu_sum = cpu_sum + excluded.cpu_sum,
+                    first_seen = MIN(first_seen, excluded.first_seen),
+                    last_seen = MAX(last_seen, excluded.last_seen)
+            """, rows)
+            if commit:
+                await self.db_connection.commit()
+    
+    async def get_top_processes(self, start: float, end: float, by: str = 'peak_rss',
+                                limit: int = 10) -> List[Dict[str, Any]]:
+        """Processes ranked by peak or average RSS/CPU between start and end.
+        
+        With SQLite storage this reads one hourly row per process for each whole hour in the
+        window, plus minute rows for the partial hours at its edges. The cost is therefore
+        bounded per hour of window and does not depend on how many snapshots were logged.
+        Raises ValueError for an unknown metric.
+        """
+        if by not in TOP_METRICS:
+            raise ValueError(f"Unknown metric: {by}. Use any of {', '.join(TOP_METRICS)}")
+        if not self.initialized:
+            await self.initialize()
+        
+        with pipeline_stats.timer("history_top"):
+            if self.storage_type == "sqlite":
+                return await self._get_top_processes_sqlite(start, end, by, limit)
+            elif self.storage_type == "csv":
+                return await self._get_top_processes_csv(start, end, by, limit)
+        
+        return []
+    
+    async def _get_top_processes_sqlite(self, start: float, end: float, by: str, limit: int) -> List[Dict[str, Any]]:
+        """Top-N from the rollup table"""
+        if not self.db_connection:
+            return []
+        
+        # Make the current minute visible to the query
+        async with self.write_lock:
+            await self._flush_rollups()
+        
+        ranges = plan_window(start, end)
+        where = " OR ".join("(resolution = ? AND bucket >= ? AND bucket <= ?)" for _ in ranges)
+        params = [value for window in ranges for value in window]
+        async with self.db_connection.execute(f"""
+            SELECT pid, name, MAX(username), SUM(samples), MAX(rss_max), SUM(rss_sum),
+                   MAX(cpu_max), SUM(cpu_sum), MIN(first_seen), MAX(last_seen)
+            FROM process_rollups
+            WHERE {where}
+            GROUP BY pid, name
+            ORDER BY {TOP_METRICS[by]} DESC
+            LIMIT ?
+        """, params + [limit]) as cursor:
+            rows = await cursor.fetchall()
+        
+        return [rollup_row(row) for row in rows]
+    
+    async def _get_top_processes_csv(self, start: float, end: float, by: str, limit: int) -> List[Dict[str, Any]]:
+        """Top-N by scanning the CSV log (no aggregates are kept for CSV storage)"""
+        csv_path = Path(self.csv_dir) / "process_snapshots.csv"
+        if not csv_path.exists():
+            return []
+        
+        def read_from_csv():
+            buffer = RollupBuffer()
+            with open(csv_path, 'r', newline='') as f:
+                for row in csv.DictReader(f):
+                    timestamp = float(row['timestamp'])
+                    if start <= timestamp <= end:
+                        buffer.add(timestamp, [{
+                            'pid': int(row['pid']),
+                            'name': row['name'],
+                            'username': row['username'],
+                            'memory_rss': int(row['memory_rss']) if row['memory_rss'] else 0,
+                            'cpu_percent': float(row['cpu_percent']) if row['cpu_percent'] else 0.0,
+                        }])
+            rows = [rollup_row((pid, name, *values)) for (pid, name), values in buffer.rows.items()]
+            rows.sort(key=lambda r: r[by], reverse=True)
+            return rows[:limit]
+        
+        return await asyncio.to_thread(read_from_csv)
+    
+    async def iter_rows(self, table: str, start: float, end: float,
+                        chunk_size: int = 5000) -> AsyncIterator[List[tuple]]:
+        """Rows of a logged table with start <= timestamp < end, in chunks of chunk_size.
+        
+        Each chunk is read on its own (keyset on timestamp and id for SQLite, the open file
+        position for CSV), so memory stays constant and writers are never blocked for
+        the length of an export. Raises ValueError for an unknown table.
+        """
+        if table not in EXPORT_TABLES:
+            raise ValueError(f"Unknown table: {table}. Use any of {', '.join(EXPORT_TABLES)}")
+        if not self.initialized:
+            await self.initialize()
+        
+        if self.storage_type == "sqlite":
+            rows = self._iter_rows_sqlite(table, start, end, chunk_size)
+        else:
+            rows = self._iter_rows_csv(table, start, end, chunk_size)
+        async for chunk in rows:
+            pipeline_stats.incr("export_rows", len(chunk))
+            yield chunk
+    
+    async def _iter_rows_sqlite(self, table: str, start: float, end: float,
+                                chunk_size: int) -> AsyncIterator[List[tuple]]:
+        if not self.db_connection:
+            return
+        
+        columns = ", ".join(EXPORT_TABLES[table])
+        position = (start, -1)
+        while True:
+            async with self.db_connection.execute(f"""
+                SELECT id, {columns}
+                FROM {table}
+                WHERE (timestamp, id) > (?, ?) AND timestamp < ?
+                ORDER BY timestamp, id
+                LIMIT ?
+            """, (*position, end, chunk_size)) as cursor:
+                rows = await cursor.fetchall()
+            if not rows:
+                return
+            position = (rows[-1][1], rows[-1][0])
+            yield [row[1:] for row in rows]
+            if len(rows) < chunk_size:
+                return
+    
+    async def _iter_rows_csv(self, table: str, start: float, end: float,
+                             chunk_size: int) -> AsyncIterator[List[tuple]]:
+        csv_path = Path(self.csv_dir) / f"{table}.csv"
+        if not csv_path.exists():
+            return
+        
+        with open(csv_path, 'r', newline='') as f:
+            reader = csv.reader(f)
+            header = next(reader, None)
+            if header is None:
+                return
+            timestamp_index = header.index('timestamp')
+            converters = [_COLUMN_TYPES.get(column, str) for column in EXPORT_TABLES[table]]
+            
+            while True:
+                rows = await asyncio.to_thread(lambda: list(islice(reader, chunk_size)))
+                if not rows:
+                    return
+                chunk = [
+                    tuple(convert(value) if value != '' else None for convert, value in zip(converters, row))
+                    for row in rows if start <= float(row[timestamp_index]) < end
+                ]
+                if chunk:
+                    yield chunk
+    
     async def get_process_history(self, pid: int, limit: int = 100) -> List[Dict[str, Any]]:
         """Get historical data for a specific process"""
         if not self.initialized:
@@ -329,13 +717,18 @@ class ProcessLogger:
     async def _retention_task(self):
         """Background task to enforce data retention policy"""
         while True:
+            start = time.perf_counter()
             try:
                 if self.storage_type == "sqlite":
-                    await self._enforce_sqlite_retention()
+                    async with self.write_lock:
+                        await self._enforce_sqlite_retention()
                 elif self.storage_type == "csv":
                     await self._enforce_csv_retention()
+                pipeline_stats.incr("retention_runs")
             except Exception as e:
+                pipeline_stats.incr("retention_errors")
                 self.logger.error(f"Error in retention task: {e}")
+            pipeline_stats.observe("retention_run", (time.perf_counter() - start) * 1000)
             
             # Run once a day
             await asyncio.sleep(24 * 60 * 60)
@@ -358,6 +751,12 @@ class ProcessLogger:
             WHERE timestamp < ?
         """, (retention_timestamp,))
         
+        # Aggregates are small, so they follow the retention period but not MAX_LOG_ROWS
+        await self.db_connection.execute("""
+            DELETE FROM process_rollups
+            WHERE bucket < ?
+        """, (retention_timestamp,))
+        
         # Enforce maximum row count
         await self.db_connection.execute("""
             DELETE FROM process_snapshots
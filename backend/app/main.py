@@ -1,15 +1,27 @@
 import asyncio
 import os
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Depends, HTTPException, BackgroundTasks
+import json
+import time
+import socket
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Depends, HTTPException, BackgroundTasks, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from typing import List, Optional, Dict, Any
+from fastapi.responses import JSONResponse, Response
+from typing import List, Optional, Dict, Any, TYPE_CHECKING
 import logging
 
 # Import local modules
 from .monitor import ProcessMonitor
 from .api import router as api_router
 from .logger import setup_logger, ProcessLogger
+from .stats import pipeline_stats
+from .sampler import SystemSampler
+from .stream import SnapshotStream
+
+# Mode-specific modules are imported when they are first used to keep startup short
+if TYPE_CHECKING:
+    from .aggregator import HostAggregator
+    from .agent import SnapshotAgent
+    from .metrics import MetricsExporter
 
 # Setup logging
 logger = logging.getLogger("memory_monitor")
@@ -33,26 +45,129 @@ app.add_middleware(
 # Include API router
 app.include_router(api_router, prefix="/api")
 
-# Process monitor instance
-process_monitor = ProcessMonitor()
+# Process monitor instance (replays a recording instead of scanning when REPLAY_FILE is set,
+# or shares one collector between uvicorn workers when SHARED_SNAPSHOT is enabled)
+if os.getenv("REPLAY_FILE"):
+    from .recorder import ReplayMonitor
+    process_monitor: ProcessMonitor = ReplayMonitor()
+elif os.getenv("SHARED_SNAPSHOT", "false").lower() == "true":
+    from .shared import SharedSnapshotMonitor
+    process_monitor = SharedSnapshotMonitor()
+else:
+    process_monitor = ProcessMonitor()
+
+# Optional snapshot recorder
+snapshot_recorder = None
 
 # Optional process logger
 process_logger: Optional[ProcessLogger] = None
 
+# Deployment mode: "standalone", "agent" (push to a central instance) or "aggregator"
+monitor_mode = os.getenv("MONITOR_MODE", "standalone").lower()
+
+# Agent pushing snapshots to the aggregator (agent mode only)
+snapshot_agent: Optional["SnapshotAgent"] = None
+
+# Merged multi-host view (aggregator mode only)
+process_aggregator: Optional["HostAggregator"] = None
+local_host_name = os.getenv("AGENT_HOST_NAME") or socket.gethostname()
+
+# High-rate system memory/pressure sampler (disabled when replaying a recording)
+system_sampler: Optional[SystemSampler] = None
+
+# Process lifecycle feed from the kernel's proc connector (optional, needs CAP_NET_ADMIN)
+lifecycle_tracker = None
+log_process_exits = os.getenv("LOG_PROCESS_EXITS", "false").lower() == "true"
+
+# cgroup v2 memory accounting (None when the hierarchy is not available)
+cgroup_collector = None
+
+# High-resolution capture while memory is under pressure (collector only)
+burst_capture = None
+
+# Time-to-exhaustion forecasts from the scans of this worker
+memory_forecaster = None
+
+# Prometheus exporter (created on the first scrape)
+metrics_exporter: Optional["MetricsExporter"] = None
+
+# Serve the previous run's last snapshot while the first scan is running
+warm_start = os.getenv("WARM_START", "true").lower() == "true" and not os.getenv("REPLAY_FILE")
+
 # Connected WebSocket clients
 active_connections: List[WebSocket] = []
 
+# Server-Sent Events clients share the frame encoded for WebSocket clients
+snapshot_stream = SnapshotStream()
+
 
 @app.on_event("startup")
 async def startup_event():
     """Initialize components on application startup"""
-    global process_logger
+    global process_logger, snapshot_agent, process_aggregator, snapshot_recorder, system_sampler, cgroup_collector, lifecycle_tracker, burst_capture, memory_forecaster
     
     # Setup application logger
     setup_logger()
     
-    # Initialize process monitor
-    await process_monitor.initialize()
+    # Multi-host mode
+    if monitor_mode == "agent":
+        from .agent import SnapshotAgent
+        snapshot_agent = SnapshotAgent(host=local_host_name)
+        logger.info(f"Agent mode: pushing snapshots as '{snapshot_agent.host}' to {snapshot_agent.url}")
+    elif monitor_mode == "aggregator":
+        from .aggregator import HostAggregator
+        process_aggregator = HostAggregator()
+        logger.info("Aggregator mode: accepting snapshots from agents")
+    
+    # Sample system memory and pressure between scans (in every worker, shared-snapshot readers too)
+    if os.getenv("ENABLE_SYSTEM_SAMPLER", "true").lower() == "true" and not os.getenv("REPLAY_FILE"):
+        system_sampler = SystemSampler()
+        system_sampler.sample()
+        system_sampler.start()
+        process_monitor.system_sampler = system_sampler
+    
+    # Container and service views from the cgroup v2 hierarchy, read on request only
+    if os.getenv("ENABLE_CGROUPS", "true").lower() == "true":
+        from .cgroups import CgroupCollector
+        collector = CgroupCollector()
+        if collector.available:
+            cgroup_collector = collector
+            logger.info(f"Reading cgroup memory accounting from {collector.root}")
+        else:
+            logger.info("cgroup v2 memory controller not found, cgroup views disabled")
+    
+    # Track process starts and exits between full rescans
+    if os.getenv("ENABLE_PROC_CONNECTOR", "false").lower() == "true" and process_monitor.is_collector \
+            and not os.getenv("REPLAY_FILE"):
+        from .lifecycle import LifecycleTracker
+        tracker = LifecycleTracker()
+        if tracker.start():
+            lifecycle_tracker = tracker
+            process_monitor.lifecycle = tracker
+    
+    # Capture short spikes at a high rate when a pressure or growth trigger fires
+    if os.getenv("ENABLE_BURST_CAPTURE", "true").lower() == "true" and not os.getenv("REPLAY_FILE"):
+        from .burst import BurstCapture
+        burst_capture = BurstCapture(on_burst=log_burst, sampler=system_sampler)
+    
+    # Forecast when memory runs out from the trend of available memory and per-process RSS
+    if os.getenv("ENABLE_FORECAST", "true").lower() == "true":
+        from .forecast import MemoryForecaster
+        memory_forecaster = MemoryForecaster()
+        process_monitor.forecaster = memory_forecaster
+    
+    # Restore the last snapshot and CPU baselines; the first scan runs in the background task
+    # (a shared-snapshot worker is not elected yet; it restores when it wins the collector lock)
+    if warm_start and process_monitor.is_collector:
+        from .warmstart import restore
+        restore(process_monitor)
+    elif warm_start and os.getenv("SHARED_SNAPSHOT", "false").lower() == "true":
+        process_monitor.warm_start = True
+    
+    # Record raw snapshots for offline analysis if requested
+    if os.getenv("RECORD_FILE"):
+        from .recorder import SnapshotRecorder
+        snapshot_recorder = SnapshotRecorder()
     
     # Start the background monitoring task
     asyncio.create_task(background_monitor_task())
@@ -68,38 +183,126 @@ async def startup_event():
 @app.on_event("shutdown")
 async def shutdown_event():
     """Clean up resources on application shutdown"""
+    # Keep the last scan for a warm start (only the collecting worker has one of its own)
+    if warm_start and process_monitor.is_collector and not process_monitor.stale:
+        from .warmstart import save_state
+        save_state(process_monitor)
+    
     await process_monitor.shutdown()
     
+    if system_sampler:
+        await system_sampler.stop()
+    
+    if lifecycle_tracker:
+        await lifecycle_tracker.stop()
+    
+    if burst_capture:
+        await burst_capture.stop()
+    
+    if snapshot_agent:
+        await snapshot_agent.shutdown()
+    
+    if snapshot_recorder:
+        snapshot_recorder.close()
+    
     if process_logger:
         await process_logger.shutdown()
 
 
+async def log_burst(event: Dict[str, Any]):
+    """Write a finished burst as one event"""
+    if process_logger:
+        await process_logger.log_events("memory_burst", [event])
+
+
+async def broadcast_snapshot(snapshot: Dict[str, Any]):
+    """Send the snapshot to every WebSocket and SSE client, encoding it once per distinct view"""
+    encoded: Dict[Optional[str], str] = {}
+    
+    with pipeline_stats.timer("broadcast"):
+        if snapshot_stream.subscribers:
+            view = process_aggregator.get_snapshot() if process_aggregator else snapshot
+            with pipeline_stats.timer("serialize"):
+                encoded[None] = json.dumps(view)
+            snapshot_stream.publish(encoded[None])
+        
+        for connection in active_connections.copy():
+            host = connection.query_params.get("host") if process_aggregator else None
+            if host not in encoded:
+                view = process_aggregator.get_snapshot(host=host) if process_aggregator else snapshot
+                with pipeline_stats.timer("serialize"):
+                    encoded[host] = json.dumps(view)
+            
+            start = time.perf_counter()
+            try:
+                await connection.send_text(encoded[host])
+                pipeline_stats.incr("ws_messages_sent")
+            except Exception as e:
+                pipeline_stats.incr("ws_send_errors")
+                logger.error(f"Error sending data to WebSocket: {e}")
+                active_connections.remove(connection)
+            pipeline_stats.observe("fanout_client", (time.perf_counter() - start) * 1000)
+    
+    pipeline_stats.set_gauge("ws_clients", len(active_connections))
+
+
+async def deliver_snapshot(snapshot: Dict[str, Any]):
+    """Broadcast a tick's snapshot; the SSE frame is dropped on every tick that does not publish one"""
+    if active_connections or snapshot_stream.subscribers:
+        await broadcast_snapshot(snapshot)
+    # Without SSE subscribers nothing was published, so the last frame is out of date
+    if not snapshot_stream.subscribers:
+        snapshot_stream.expire()
+
+
 async def background_monitor_task():
     """Background task to update process information periodically"""
+    # First full scan, off the event loop so requests are served meanwhile
+    await process_monitor.initialize()
+    
     while True:
         try:
+            tick_start = time.perf_counter()
+            
             # Update process information
             await process_monitor.update()
+            snapshot = process_monitor.get_snapshot()
+            
+            # With shared snapshots only the collecting worker records, logs and pushes
+            collector = process_monitor.is_collector
+            
+            # Append to the recording if enabled
+            if snapshot_recorder and collector:
+                await snapshot_recorder.record(process_monitor)
+            
+            # Switch to high-resolution capture if memory is under pressure
+            if burst_capture and collector:
+                burst_capture.check(process_monitor)
             
             # Log data if enabled
-            if process_logger:
-                await process_logger.log_snapshot(process_monitor.get_snapshot())
+            exits = process_monitor.drain_exits()
+            if process_logger and collector:
+                await process_logger.log_snapshot(snapshot)
+                if log_process_exits and exits:
+                    await process_logger.log_events("process_exit", exits)
+            
+            # Forward to the central instance or merge into the host view
+            if snapshot_agent and collector:
+                snapshot_agent.submit(snapshot)
+            if process_aggregator:
+                process_aggregator.apply_local(local_host_name, snapshot)
+            
+            # Broadcast to WebSocket and SSE clients
+            await deliver_snapshot(snapshot)
             
-            # Broadcast to WebSocket clients
-            if active_connections:
-                snapshot = process_monitor.get_snapshot()
-                for connection in active_connections.copy():
-                    try:
-                        await connection.send_json(snapshot)
-                    except Exception as e:
-                        logger.error(f"Error sending data to WebSocket: {e}")
-                        active_connections.remove(connection)
+            pipeline_stats.observe("tick", (time.perf_counter() - tick_start) * 1000)
+            pipeline_stats.incr("ticks")
             
-            # Sleep interval (configurable)
-            interval = float(os.getenv("MONITOR_INTERVAL_SECONDS", "1.0"))
-            await asyncio.sleep(interval)
+            # Sleep interval (configurable, paced by the recording when replaying)
+            await asyncio.sleep(process_monitor.update_interval)
             
         except Exception as e:
+            pipeline_stats.incr("tick_errors")
             logger.error(f"Error in background monitor task: {e}")
             await asyncio.sleep(5)  # Longer sleep on error
 
@@ -112,7 +315,10 @@ async def websocket_endpoint(websocket: WebSocket):
     
     try:
         # Send initial data
-        snapshot = process_monitor.get_snapshot()
+        if process_aggregator:
+            snapshot = process_aggregator.get_snapshot(host=websocket.query_params.get("host"))
+        else:
+            snapshot = process_monitor.get_snapshot()
         await websocket.send_json(snapshot)
         
         # Keep connection alive and handle client messages
@@ -130,15 +336,33 @@ async def websocket_endpoint(websocket: WebSocket):
             active_connections.remove(websocket)
 
 
+@app.get("/metrics")
+async def metrics(request: Request):
+    """Prometheus/OpenMetrics scrape endpoint"""
+    global metrics_exporter
+    from .metrics import MetricsExporter, PROMETHEUS_CONTENT_TYPE, OPENMETRICS_CONTENT_TYPE
+    if metrics_exporter is None:
+        metrics_exporter = MetricsExporter()
+    await process_monitor.update()
+    
+    openmetrics = "application/openmetrics-text" in request.headers.get("accept", "")
+    body = metrics_exporter.render(process_monitor, openmetrics=openmetrics)
+    media_type = OPENMETRICS_CONTENT_TYPE if openmetrics else PROMETHEUS_CONTENT_TYPE
+    return Response(content=body, media_type=media_type)
+
+
 @app.get("/")
 async def root():
     """Root endpoint with API information"""
     return {
         "app": "Memory Intensive Monitor",
         "version": "0.1.0",
+        "mode": monitor_mode,
         "api_docs": "/docs",
         "endpoints": {
             "processes": "/api/processes",
-            "websocket": "/ws/processes"
+            "websocket": "/ws/processes",
+            "stream": "/api/processes/stream",
+            "metrics": "/metrics"
         }
     }
\ No newline at end of file
@@ -0,0 +1,96 @@
+import os
+import heapq
+import logging
+from typing import List, Dict, Any, Tuple
+
+logger = logging.getLogger("memory_monitor")
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4"
+OPENMETRICS_CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+
+# (metric name, process field, help text) for the per-process series
+PROCESS_METRICS = [
+    ("memory_monitor_process_rss_bytes", "memory_rss", "Resident set size of the process"),
+    ("memory_monitor_process_memory_percent", "memory_percent", "Share of system memory used by the process"),
+    ("memory_monitor_process_cpu_percent", "cpu_percent", "CPU usage of the process"),
+]
+
+
+def _escape(value: Any) -> str:
+    """Escape a label value for the text exposition format"""
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _labels(pairs: List[Tuple[str, Any]]) -> str:
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in pairs) + "}"
+
+
+class MetricsExporter:
+    """Renders the monitor state in the Prometheus/OpenMetrics text format"""
+
+    def __init__(self):
+        # Per-process series are limited to the top N per metric; the rest go into an "other" bucket
+        self.top_n = int(os.getenv("METRICS_TOP_N", "20"))
+        self._cached_version = None
+        self._cached_body = ""
+
+    def render(self, monitor, openmetrics: bool = False) -> str:
+        """Render metrics, reusing the previous output if the snapshot has not changed"""
+        if self._cached_version != monitor.version:
+            self._cached_body = self._render_body(monitor)
+            self._cached_version = monitor.version
+
+        if openmetrics:
+            return self._cached_body + "# EOF\n"
+        return self._cached_body
+
+    def _render_body(self, monitor) -> str:
+        lines: List[str] = []
+        system = monitor.get_system_memory()
+
+        def gauge(name: str, help_text: str, samples: List[Tuple[str, Any]]):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} gauge")
+            for labels, value in samples:
+                lines.append(f"{name}{labels} {value}")
+
+        memory = system["memory"]
+        swap = system["swap"]
+        gauge("memory_monitor_system_memory_bytes", "System memory by type",
+              [(_labels([("type", key)]), memory[key]) for key in ("total", "available", "used", "free")])
+        gauge("memory_monitor_system_memory_percent", "System memory usage percentage",
+              [("", memory["percent"])])
+        gauge("memory_monitor_swap_bytes", "Swap usage by type",
+              [(_labels([("type", key)]), swap[key]) for key in ("total", "used", "free")])
+        gauge("memory_monitor_swap_percent", "Swap usage percentage",
+              [("", swap["percent"])])
+
+        processes = monitor.processes
+        gauge("memory_monitor_processes", "Number of processes seen in the last scan",
+              [("", len(processes))])
+        gauge("memory_monitor_snapshot_version", "Sequence number of the last scan",
+              [("", monitor.version)])
+        gauge("memory_monitor_last_update_timestamp_seconds", "Unix time of the last scan",
+              [("", monitor.last_update)])
+
+        for name, field, help_text in PROCESS_METRICS:
+            gauge(name, help_text, self._process_samples(processes, field))
+
+        return "\n".join(lines) + "\n"
+
+    def _process_samples(self, processes: List[Dict[str, Any]], field: str) -> List[Tuple[str, Any]]:
+        """Top N processes by the field, plus one "other" sample summing the rest"""
+        top = heapq.nlargest(self.top_n, processes, key=lambda p: p.get(field) or 0)
+        samples = [
+            (_labels([("pid", p['pid']), ("name", p['name']), ("username", p['username'])]), p.get(field) or 0)
+            for p in top
+        ]
+
+        total = sum(p.get(field) or 0 for p in processes)
+        top_total = sum(value for _, value in samples)
+        other = total - top_total
+        if isinstance(other, float):
+            other = round(other, 2)
+        samples.append((_labels([("pid", "other"), ("name", "other"), ("username", "")]), other))
+
+        return samples
@@ -4,8 +4,13 @@ import logging
 import asyncio
 from typing import List, Dict, Any, Optional
 import os
+from collections import OrderedDict, deque
 from datetime import datetime
 
+from .stats import pipeline_stats, PROCESS_COUNT_BUCKETS
+from .search import ProcessIndex
+from .pagination import CursorExpiredError, parse_fields, query_key, encode_cursor, decode_cursor, project
+
 logger = logging.getLogger("memory_monitor")
 
 class ProcessMonitor:
@@ -18,6 +23,33 @@ class ProcessMonitor:
         self.sort_by: str = os.getenv("DEFAULT_SORT", "memory_percent")
         self.sort_desc: bool = True
         self.initialized: bool = False
+        # False in workers that serve scans published by another process
+        self.is_collector: bool = True
+        # Incremented on every completed scan so consumers can cache per snapshot
+        self.version: int = 0
+        self.system_memory: Optional[Dict[str, Any]] = None
+        # High-rate SystemSampler whose latest reading replaces per-scan psutil calls
+        self.system_sampler = None
+        # LifecycleTracker feeding the live PID set between full rescans
+        self.lifecycle = None
+        # MemoryForecaster whose time-to-exhaustion estimates go into every snapshot
+        self.forecaster = None
+        # pid -> (create_time, cpu seconds, wall time) of the previous scan, for cpu_percent
+        self._cpu_baselines: Dict[int, tuple] = {}
+        # True while serving a snapshot restored from the previous run
+        self.stale: bool = False
+        self._scanned: bool = False
+        self._first_scan: Optional[asyncio.Future] = None
+        # Exited processes with their last known figures, until drain_exits() is called
+        self.exited: deque = deque(maxlen=10000)
+        # Time the current data was collected; None means "now" (live scans)
+        self.data_timestamp: Optional[float] = None
+        # Search index over name/username/cmdline and pid lookup for the current scan
+        self.index = ProcessIndex()
+        self._by_pid: Dict[int, Dict[str, Any]] = {}
+        # Ordered rows per (version, query) so paging through a snapshot stays stable
+        self.page_views = int(os.getenv("PAGE_CACHE_VIEWS", "8"))
+        self._views: "OrderedDict[tuple, List[Dict[str, Any]]]" = OrderedDict()
     
     async def initialize(self):
         """Initialize the process monitor"""
@@ -38,69 +70,283 @@ class ProcessMonitor:
         try:
             current_time = time.time()
             
+            # The first scan is still running: wait for it only if there is nothing to serve yet
+            if self._first_scan is not None:
+                if not self.processes:
+                    await asyncio.shield(self._first_scan)
+                return
+            
             # Skip if not enough time has passed since last update
             if current_time - self.last_update < self.update_interval and self.processes:
                 return
             
             self.last_update = current_time
-            processes = []
             
-            # Iterate through all processes
-            for proc in psutil.process_iter(['pid', 'name', 'username', 'status']):
+            # The first scan runs off the event loop so a warm-started service keeps answering
+            if self._scanned:
+                self._apply_scan(time.perf_counter(), *self._scan(current_time))
+            else:
+                self._first_scan = asyncio.ensure_future(self._scan_in_thread(current_time))
                 try:
-                    # Get process info
-                    proc_info = proc.info
-                    
-                    # Get memory info
-                    with proc.oneshot():
-                        memory_info = proc.memory_info()
-                        memory_percent = proc.memory_percent()
-                        cpu_percent = proc.cpu_percent(interval=None)  # Non-blocking
-                        create_time = proc.create_time()
-                    
-                    # Format process data
-                    process_data = {
-                        'pid': proc_info['pid'],
-                        'name': proc_info['name'],
-                        'username': proc_info['username'] or 'unknown',
-                        'status': proc_info['status'],
-                        'memory_rss': memory_info.rss,  # In bytes
-                        'memory_rss_mb': round(memory_info.rss / (1024 * 1024), 2),  # In MB
-                        'memory_percent': round(memory_percent, 2),
-                        'cpu_percent': round(cpu_percent, 2),
-                        'create_time': create_time,
-                        'start_time': datetime.fromtimestamp(create_time).strftime('%Y-%m-%d %H:%M:%S'),
-                    }
-                    
-                    processes.append(process_data)
-                    
-                except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess) as e:
-                    # Skip processes we can't access
-                    continue
-                except Exception as e:
-                    logger.error(f"Error processing PID {proc.pid}: {str(e)}")
-                    continue
-            
-            # Sort processes by the specified field
-            processes.sort(
-                key=lambda x: x.get(self.sort_by, 0), 
-                reverse=self.sort_desc
-            )
-            
-            self.processes = processes
-            logger.debug(f"Updated process list: {len(processes)} processes")
+                    await self._first_scan
+                finally:
+                    self._first_scan = None
             
         except Exception as e:
+            pipeline_stats.incr("scan_errors")
             logger.error(f"Error updating process list: {str(e)}")
     
+    async def _scan_in_thread(self, current_time: float) -> None:
+        scan_start = time.perf_counter()
+        self._apply_scan(scan_start, *await asyncio.to_thread(self._scan, current_time))
+    
+    def _apply_scan(self, scan_start: float, processes: List[Dict[str, Any]],
+                    new_cmdlines: Dict[int, str], swept: Optional[list]) -> None:
+        """Publish the result of a scan as the current snapshot"""
+        if swept is not None:
+            self.lifecycle.reconcile(swept)
+            pipeline_stats.incr("full_rescans")
+        
+        self.exited.extend(self._collect_exits(processes))
+        self.processes = processes
+        self._sync_index(processes, new_cmdlines)
+        self._sample_system_memory()
+        self.data_timestamp = None
+        self.stale = False
+        self._scanned = True
+        self.version += 1
+        
+        pipeline_stats.observe("scan", (time.perf_counter() - scan_start) * 1000)
+        pipeline_stats.observe("processes_per_scan", len(processes), PROCESS_COUNT_BUCKETS)
+        pipeline_stats.incr("scans")
+        logger.debug(f"Updated process list: {len(processes)} processes")
+    
+    def _scan(self, current_time: float):
+        """Read every process; returns (processes, new command lines, swept Process objects)"""
+        processes = []
+        new_cmdlines: Dict[int, str] = {}
+        cpu_baselines: Dict[int, tuple] = {}
+        
+        # Sweep /proc, or only the PIDs known from lifecycle events between full rescans
+        attrs = ['pid', 'name', 'username', 'status']
+        full_scan = self.lifecycle is None or self.lifecycle.needs_rescan(current_time)
+        if full_scan:
+            source = psutil.process_iter(attrs)
+            swept = [] if self.lifecycle is not None else None
+        else:
+            source = self.lifecycle.process_iter(attrs)
+            swept = None
+        
+        # Iterate through all processes
+        for proc in source:
+            if swept is not None:
+                swept.append(proc)
+            try:
+                # Get process info
+                proc_info = proc.info
+                
+                # Get memory info
+                with proc.oneshot():
+                    memory_info = proc.memory_info()
+                    memory_percent = proc.memory_percent()
+                    cpu_times = proc.cpu_times()
+                    create_time = proc.create_time()
+                
+                # CPU usage since the previous scan; baselines survive restarts via warm start
+                pid = proc_info['pid']
+                cpu_total = cpu_times.user + cpu_times.system
+                cpu_percent = 0.0
+                baseline = self._cpu_baselines.get(pid)
+                if baseline and baseline[0] == create_time and current_time > baseline[2]:
+                    cpu_percent = max(0.0, (cpu_total - baseline[1]) / (current_time - baseline[2]) * 100)
+                cpu_baselines[pid] = (create_time, cpu_total, current_time)
+                
+                # Format process data
+                process_data = {
+                    'pid': pid,
+                    'name': proc_info['name'],
+                    'username': proc_info['username'] or 'unknown',
+                    'status': proc_info['status'],
+                    'memory_rss': memory_info.rss,  # In bytes
+                    'memory_rss_mb': round(memory_info.rss / (1024 * 1024), 2),  # In MB
+                    'memory_percent': round(memory_percent, 2),
+                    'cpu_percent': round(cpu_percent, 2),
+                    'create_time': create_time,
+                    'start_time': datetime.fromtimestamp(create_time).strftime('%Y-%m-%d %H:%M:%S'),
+                }
+                
+                # Command lines rarely change, so read them only for processes new to the index
+                if self.index.needs_refresh(pid, create_time, process_data['name'], process_data['username']):
+                    try:
+                        new_cmdlines[pid] = ' '.join(proc.cmdline())
+                    except (psutil.AccessDenied, psutil.ZombieProcess):
+                        new_cmdlines[pid] = ''
+                
+                processes.append(process_data)
+                
+            except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess) as e:
+                # Skip processes we can't access
+                continue
+            except Exception as e:
+                logger.error(f"Error processing PID {proc.pid}: {str(e)}")
+                continue
+        
+        # Sort processes by the specified field
+        processes.sort(
+            key=lambda x: x.get(self.sort_by, 0), 
+            reverse=self.sort_desc
+        )
+        
+        self._cpu_baselines = cpu_baselines
+        return processes, new_cmdlines, swept
+    
+    def _collect_exits(self, processes: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Processes gone since the previous scan, joined with exit events when available"""
+        events = self.lifecycle.drain_exits() if self.lifecycle is not None else {}
+        live = {process['pid'] for process in processes}
+        if self.lifecycle is not None:
+            self.lifecycle.scanned(live)
+        
+        exits = []
+        for pid, last in self._by_pid.items():
+            if pid in live:
+                continue
+            # Restored processes that are gone exited while the service was down, at an unknown time
+            if self.stale and pid not in events:
+                continue
+            event = events.pop(pid, {})
+            exits.append(self._exit_record(last, event, seen_in_scan=True))
+        # Started and exited between two scans; only the lifecycle probe saw them
+        for pid, event in events.items():
+            if event.get('last') and pid not in live:
+                exits.append(self._exit_record(event['last'], event, seen_in_scan=False))
+        return exits
+    
+    def drain_exits(self) -> List[Dict[str, Any]]:
+        """Exits recorded since the previous call"""
+        exits = list(self.exited)
+        self.exited.clear()
+        return exits
+    
+    def _exit_record(self, last: Dict[str, Any], event: Dict[str, Any], seen_in_scan: bool) -> Dict[str, Any]:
+        exit_time = event.get('exit_time') or time.time()
+        return {
+            'pid': last['pid'],
+            'name': last.get('name'),
+            'username': last.get('username'),
+            'memory_rss': last.get('memory_rss'),
+            'memory_percent': last.get('memory_percent'),
+            'peak_rss': last.get('peak_rss', last.get('memory_rss')),
+            'create_time': last.get('create_time'),
+            'lifetime_seconds': round(exit_time - last['create_time'], 3) if last.get('create_time') else None,
+            'exit_code': event.get('exit_code'),
+            'seen_in_scan': seen_in_scan,
+        }
+    
+    def _sync_index(self, processes: List[Dict[str, Any]], cmdlines: Dict[int, str]) -> None:
+        """Apply appeared, changed and exited processes to the search index"""
+        for process in processes:
+            pid = process['pid']
+            if self.index.needs_refresh(pid, process['create_time'], process['name'], process['username']):
+                self.index.add(pid, process['create_time'], process['name'],
+                               process['username'], cmdlines.get(pid, ''))
+        self._by_pid = {process['pid']: process for process in processes}
+        self.index.retain(self._by_pid.keys())
+    
+    def get_process_map(self) -> Dict[int, Dict[str, Any]]:
+        """Processes of the current scan keyed by PID"""
+        return self._by_pid
+    
+    def _sample_system_memory(self) -> None:
+        """Take one system memory and swap reading shared by every consumer"""
+        if self.system_sampler is not None and self.system_sampler.latest() is not None:
+            self.system_memory = self.system_sampler.system_memory()
+            return
+        memory = psutil.virtual_memory()
+        swap = psutil.swap_memory()
+        self.system_memory = {
+            "memory": {
+                "total": memory.total,
+                "available": memory.available,
+                "used": memory.used,
+                "free": memory.free,
+                "percent": memory.percent
+            },
+            "swap": {
+                "total": swap.total,
+                "used": swap.used,
+                "free": swap.free,
+                "percent": swap.percent
+            }
+        }
+    
+    def get_system_memory(self) -> Dict[str, Any]:
+        """System memory and swap as of the latest sample (or scan without a sampler)"""
+        if self.system_sampler is not None and self.system_sampler.latest() is not None:
+            return self.system_sampler.system_memory()
+        if self.system_memory is None:
+            self._sample_system_memory()
+        return self.system_memory
+    
     def get_snapshot(self, top: Optional[int] = None, 
                     sort_by: Optional[str] = None, 
-                    min_mem_percent: Optional[float] = None) -> Dict[str, Any]:
-        """Get a snapshot of current processes with optional filtering"""
-        # Apply sorting if requested
+                    min_mem_percent: Optional[float] = None,
+                    name: Optional[str] = None,
+                    username: Optional[str] = None,
+                    cmdline: Optional[str] = None,
+                    match: str = 'substring',
+                    case_sensitive: bool = False) -> Dict[str, Any]:
+        """Get a snapshot of current processes with optional filtering.
+        
+        name, username and cmdline are matched as a substring, prefix or regex
+        (see match) through the search index; raises ValueError on an invalid pattern.
+        """
+        with pipeline_stats.timer("snapshot_build"):
+            return self._build_snapshot(top, sort_by, min_mem_percent,
+                                        name, username, cmdline, match, case_sensitive)
+    
+    def _build_snapshot(self, top: Optional[int],
+                        sort_by: Optional[str],
+                        min_mem_percent: Optional[float],
+                        name: Optional[str] = None,
+                        username: Optional[str] = None,
+                        cmdline: Optional[str] = None,
+                        match: str = 'substring',
+                        case_sensitive: bool = False) -> Dict[str, Any]:
+        processes = self._select(sort_by, min_mem_percent, name, username, cmdline, match, case_sensitive)
+        
+        # Apply top N limit if requested
+        if top is not None and top > 0:
+            processes = processes[:top]
+        
+        snapshot = self._snapshot_header()
+        snapshot['filtered_processes'] = len(processes)
+        snapshot['processes'] = processes
+        return snapshot
+    
+    def _select(self, sort_by: Optional[str],
+                min_mem_percent: Optional[float],
+                name: Optional[str] = None,
+                username: Optional[str] = None,
+                cmdline: Optional[str] = None,
+                match: str = 'substring',
+                case_sensitive: bool = False) -> List[Dict[str, Any]]:
+        """Filtered and ordered rows of the current scan"""
         processes = self.processes
         
-        if sort_by and sort_by != self.sort_by:
+        # Apply text filters through the index, then order only the matches
+        filters = {field: value for field, value in
+                   (('name', name), ('username', username), ('cmdline', cmdline)) if value}
+        if filters:
+            pids = self.index.search(filters, match, case_sensitive)
+            processes = sorted(
+                (self._by_pid[pid] for pid in pids if pid in self._by_pid),
+                key=lambda x: x.get(sort_by or self.sort_by, 0),
+                reverse=self.sort_desc
+            )
+        
+        # Apply sorting if requested
+        elif sort_by and sort_by != self.sort_by:
             processes = sorted(
                 processes,
                 key=lambda x: x.get(sort_by, 0),
@@ -111,25 +357,100 @@ class ProcessMonitor:
         if min_mem_percent is not None:
             processes = [p for p in processes if p.get('memory_percent', 0) >= min_mem_percent]
         
-        # Apply top N limit if requested
-        if top is not None and top > 0:
-            processes = processes[:top]
-        
-        # Create snapshot with metadata
-        snapshot = {
-            'timestamp': time.time(),
-            'datetime': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        return processes
+    
+    def _snapshot_header(self) -> Dict[str, Any]:
+        """Snapshot metadata shared by full snapshots and pages"""
+        memory = self.get_system_memory()["memory"]
+        timestamp = self.data_timestamp if self.data_timestamp is not None else time.time()
+        header = {
+            'timestamp': timestamp,
+            'datetime': datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d %H:%M:%S'),
+            'version': self.version,
+            'stale': self.stale,
             'total_processes': len(self.processes),
-            'filtered_processes': len(processes),
             'system_memory': {
-                'total': psutil.virtual_memory().total,
-                'available': psutil.virtual_memory().available,
-                'percent': psutil.virtual_memory().percent,
+                'total': memory['total'],
+                'available': memory['available'],
+                'percent': memory['percent'],
             },
-            'processes': processes
         }
+        if self.forecaster is not None:
+            self.forecaster.observe(self)
+            header['forecast'] = self.forecaster.get_forecast()
+        return header
+    
+    def get_page(self, limit: Optional[int] = None,
+                 cursor: Optional[str] = None,
+                 fields: Optional[str] = None,
+                 sort_by: Optional[str] = None,
+                 min_mem_percent: Optional[float] = None,
+                 name: Optional[str] = None,
+                 username: Optional[str] = None,
+                 cmdline: Optional[str] = None,
+                 match: str = 'substring',
+                 case_sensitive: bool = False) -> Dict[str, Any]:
+        """One page of a snapshot, projected to the requested fields.
         
-        return snapshot
+        A cursor keeps paging through the snapshot version it was issued for, so rows
+        are neither skipped nor repeated while scans continue. Raises ValueError on a
+        bad cursor or field and CursorExpiredError once that version is no longer kept.
+        """
+        with pipeline_stats.timer("page_build"):
+            columns = parse_fields(fields)
+            params = (sort_by, min_mem_percent, name, username, cmdline, match, case_sensitive)
+            query = query_key(params)
+            
+            if cursor:
+                position = decode_cursor(cursor)
+                if position['q'] != query:
+                    raise ValueError("Cursor was issued for a different query")
+                version, offset = position['v'], position['o']
+            else:
+                version, offset = self.version, 0
+            
+            key = (version, query)
+            rows = self._views.get(key)
+            if rows is not None:
+                self._views.move_to_end(key)
+            elif version == self.version:
+                rows = self._views[key] = self._select(*params)
+                if len(self._views) > self.page_views:
+                    self._views.popitem(last=False)
+            else:
+                raise CursorExpiredError(f"Snapshot version {version} has expired")
+            
+            end = len(rows) if limit is None or limit <= 0 else offset + limit
+            page = self._snapshot_header()
+            page['version'] = version
+            page['filtered_processes'] = len(rows)
+            page['offset'] = offset
+            page['processes'] = project(rows[offset:end], columns)
+            page['next_cursor'] = encode_cursor(version, end, query) if end < len(rows) else None
+            return page
+    
+    def export_state(self) -> Dict[str, Any]:
+        """Last scan and CPU baselines, for a warm start of the next run"""
+        return {
+            'time': self.last_update,
+            'version': self.version,
+            'sys': self.system_memory,
+            'processes': self.processes,
+            'cmdlines': {pid: self.index.cmdline(pid) or '' for pid in self._by_pid},
+            'cpu_baselines': self._cpu_baselines,
+        }
+    
+    def restore_state(self, state: Dict[str, Any]) -> None:
+        """Serve a previous run's last scan, marked stale, until the first scan completes"""
+        processes = state['processes']
+        self.processes = processes
+        self._sync_index(processes, state.get('cmdlines', {}))
+        self.system_memory = state.get('sys')
+        self.data_timestamp = state['time']
+        self.version = state.get('version', 0)
+        # Let the first scan report CPU usage since the last one of the previous run
+        self._cpu_baselines = dict(state.get('cpu_baselines', {}))
+        self.stale = True
     
     async def kill_process(self, pid: int, force: bool = False) -> Dict[str, Any]:
         """Attempt to terminate a process by PID"""
@@ -0,0 +1,76 @@
+import json
+import base64
+import hashlib
+from typing import List, Dict, Any, Optional, Sequence
+
+# Fields a client may request with fields=
+PROCESS_FIELDS = (
+    'pid', 'name', 'username', 'status', 'memory_rss', 'memory_rss_mb',
+    'memory_percent', 'cpu_percent', 'create_time', 'start_time'
+)
+
+
+class CursorExpiredError(Exception):
+    """The snapshot version a cursor points into is no longer retained"""
+
+
+def parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    """Parse a comma-separated projection; pid is always included. Raises ValueError."""
+    if not fields:
+        return None
+    requested = [field.strip() for field in fields.split(",") if field.strip()]
+    unknown = [field for field in requested if field not in PROCESS_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown field(s): {', '.join(unknown)}. Use any of {', '.join(PROCESS_FIELDS)}")
+    return ['pid'] + [field for field in dict.fromkeys(requested) if field != 'pid']
+
+
+def query_key(params: Sequence[Any]) -> str:
+    """Short digest of the query a cursor belongs to"""
+    return hashlib.sha1(json.dumps(list(params)).encode('utf-8')).hexdigest()[:12]
+
+
+def encode_cursor(version: int, offset: int, query: str) -> str:
+    payload = json.dumps({'v': version, 'o': offset, 'q': query}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Dict[str, Any]:
+    """Decode a cursor into {'v', 'o', 'q'}; raises ValueError if it is malformed"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        if not isinstance(data, dict) or not isinstance(data.get('q'), str):
+            raise ValueError
+        if not isinstance(data['v'], int) or not isinstance(data['o'], int) or data['o'] < 0:
+            raise ValueError
+        return data
+    except (ValueError, KeyError, TypeError, UnicodeError):
+        raise ValueError("Invalid cursor")
+
+
+def encode_keyset_cursor(position: Sequence[Any], query: str) -> str:
+    """Cursor holding the sort key of the last row returned, for keyset paging"""
+    payload = json.dumps({'k': list(position), 'q': query}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_keyset_cursor(cursor: str) -> Dict[str, Any]:
+    """Decode a keyset cursor into {'k', 'q'}; raises ValueError if it is malformed"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        if not isinstance(data, dict) or not isinstance(data.get('q'), str):
+            raise ValueError
+        if not isinstance(data['k'], list) or not all(isinstance(value, (int, float)) for value in data['k']):
+            raise ValueError
+        return data
+    except (ValueError, KeyError, TypeError, UnicodeError):
+        raise ValueError("Invalid cursor")
+
+
+def project(processes: List[Dict[str, Any]], fields: Optional[List[str]]) -> List[Dict[str, Any]]:
+    """Copy only the requested fields of each row"""
+    if fields is None:
+        return processes
+    return [{field: process.get(field) for field in fields} for process in processes]
@@ -0,0 +1,58 @@
+import sys
+import time
+import threading
+import logging
+from collections import Counter
+from typing import Dict, Any
+
+logger = logging.getLogger("memory_monitor")
+
+
+class SamplingProfiler:
+    """On-demand sampling profiler that records the hottest stacks of every thread"""
+
+    def __init__(self, max_depth: int = 40):
+        self.max_depth = max_depth
+        self._lock = threading.Lock()
+
+    def _stack_key(self, frame) -> str:
+        """Collapse a frame chain into 'outer;...;inner' form"""
+        parts = []
+        while frame is not None and len(parts) < self.max_depth:
+            code = frame.f_code
+            parts.append(f"{code.co_name} ({code.co_filename.rsplit('/', 1)[-1]}:{frame.f_lineno})")
+            frame = frame.f_back
+        return ";".join(reversed(parts))
+
+    def sample(self, seconds: float = 5.0, interval: float = 0.01, top: int = 20) -> Dict[str, Any]:
+        """Sample all threads for the given duration; blocking, run it in a worker thread"""
+        if not self._lock.acquire(blocking=False):
+            raise RuntimeError("A profiling session is already running")
+
+        try:
+            own_id = threading.get_ident()
+            thread_names = {t.ident: t.name for t in threading.enumerate()}
+            stacks: Counter = Counter()
+            samples = 0
+            deadline = time.monotonic() + seconds
+
+            while time.monotonic() < deadline:
+                for thread_id, frame in sys._current_frames().items():
+                    if thread_id == own_id:
+                        continue
+                    name = thread_names.get(thread_id, str(thread_id))
+                    stacks[f"{name};{self._stack_key(frame)}"] += 1
+                samples += 1
+                time.sleep(interval)
+
+            return {
+                'duration_seconds': seconds,
+                'interval_seconds': interval,
+                'samples': samples,
+                'stacks': [
+                    {'stack': stack, 'count': count, 'fraction': round(count / samples, 4)}
+                    for stack, count in stacks.most_common(top)
+                ],
+            }
+        finally:
+            self._lock.release()
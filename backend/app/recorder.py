@@ -0,0 +1,208 @@
+import os
+import sys
+import gzip
+import json
+import time
+import zlib
+import asyncio
+import logging
+from datetime import datetime
+from typing import List, Dict, Any, Iterator, Optional
+
+from .aggregator import AGENT_FIELDS
+from .monitor import ProcessMonitor
+
+logger = logging.getLogger("memory_monitor")
+
+RECORDING_FORMAT = 1
+
+
+class SnapshotRecorder:
+    """Appends raw monitor snapshots to a gzip-compressed JSON-lines file"""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.getenv("RECORD_FILE", "recording.jsonl.gz")
+        # Sync-flush every N frames; a crash loses at most the frames since the last flush
+        self.flush_every = int(os.getenv("RECORD_FLUSH_EVERY", "5"))
+        self.file = None
+        self.frames_written = 0
+        self.last_version: Optional[int] = None
+
+    def open(self) -> None:
+        # Append mode starts a new gzip member, so existing recordings are never rewritten
+        self.file = gzip.open(self.path, 'ab', compresslevel=6)
+        self._write_line({
+            'type': 'header',
+            'format': RECORDING_FORMAT,
+            'fields': AGENT_FIELDS,
+            'started': time.time(),
+        })
+        self.file.flush()
+        logger.info(f"Recording snapshots to {self.path}")
+
+    def close(self) -> None:
+        if self.file:
+            self.file.close()
+            self.file = None
+
+    def _write_line(self, record: Dict[str, Any]) -> None:
+        self.file.write(json.dumps(record, separators=(',', ':')).encode('utf-8') + b'\n')
+
+    def build_frame(self, monitor: ProcessMonitor) -> Optional[Dict[str, Any]]:
+        """Capture the monitor's current data, or None if it has not changed"""
+        if monitor.version == self.last_version:
+            return None
+        self.last_version = monitor.version
+        return {
+            'type': 'snapshot',
+            't': monitor.data_timestamp or monitor.last_update,
+            'v': monitor.version,
+            'sys': monitor.get_system_memory(),
+            'p': [[p.get(field) for field in AGENT_FIELDS] for p in monitor.processes],
+        }
+
+    def write_frame(self, frame: Dict[str, Any]) -> None:
+        """Compress and append one frame (blocking, call from a worker thread)"""
+        if self.file is None:
+            self.open()
+        self._write_line(frame)
+        self.frames_written += 1
+        if self.frames_written % self.flush_every == 0:
+            self.file.flush()
+
+    async def record(self, monitor: ProcessMonitor) -> None:
+        frame = self.build_frame(monitor)
+        if frame is not None:
+            await asyncio.to_thread(self.write_frame, frame)
+
+
+def read_frames(path: str) -> Iterator[Dict[str, Any]]:
+    """Yield snapshot frames, tolerating a truncated tail from an unclean shutdown"""
+    fields = AGENT_FIELDS
+    with gzip.open(path, 'rb') as f:
+        while True:
+            try:
+                line = f.readline()
+            except (EOFError, zlib.error, OSError):
+                logger.warning(f"Recording {path} ends with an incomplete frame")
+                return
+            if not line:
+                return
+            try:
+                record = json.loads(line)
+            except ValueError:
+                logger.warning(f"Skipping corrupt frame in {path}")
+                continue
+            if record.get('type') == 'header':
+                fields = record.get('fields', AGENT_FIELDS)
+            elif record.get('type') == 'snapshot':
+                record['fields'] = fields
+                yield record
+
+
+def expand_frame(frame: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Rebuild the monitor's process dicts from a compact frame"""
+    fields = frame['fields']
+    processes = []
+    for row in frame['p']:
+        process = dict(zip(fields, row))
+        rss = process.get('memory_rss') or 0
+        create_time = process.get('create_time') or 0
+        process['memory_rss_mb'] = round(rss / (1024 * 1024), 2)
+        process['start_time'] = datetime.fromtimestamp(create_time).strftime('%Y-%m-%d %H:%M:%S')
+        processes.append(process)
+    return processes
+
+
+class ReplayMonitor(ProcessMonitor):
+    """ProcessMonitor that serves frames from a recording instead of scanning the host"""
+
+    def __init__(self, path: Optional[str] = None, speed: Optional[float] = None):
+        super().__init__()
+        self.path = path or os.getenv("REPLAY_FILE")
+        # 1.0 = real time, 10 = ten times faster, 0 = one frame per update as fast as possible
+        self.speed = float(os.getenv("REPLAY_SPEED", "1.0")) if speed is None else speed
+        self.loop_replay = os.getenv("REPLAY_LOOP", "false").lower() == "true"
+        self.finished = False
+        self._frames: Optional[Iterator[Dict[str, Any]]] = None
+        self._next: Optional[Dict[str, Any]] = None
+        self._record_start: float = 0
+        self._wall_start: float = 0
+
+    def _rewind(self) -> None:
+        self._frames = read_frames(self.path)
+        self._next = next(self._frames, None)
+        self._record_start = self._next['t'] if self._next else 0
+        self._wall_start = time.time()
+
+    def _due(self, frame: Dict[str, Any]) -> bool:
+        if self.speed <= 0:
+            return True
+        return (frame['t'] - self._record_start) / self.speed <= time.time() - self._wall_start
+
+    async def update(self) -> None:
+        """Advance to the next recorded frame once it is due"""
+        if self._frames is None:
+            logger.info(f"Replaying {self.path} at speed {self.speed}")
+            self._rewind()
+
+        if self._next is None:
+            if self.loop_replay:
+                self._rewind()
+            if self._next is None:
+                if not self.finished:
+                    logger.info("Replay finished")
+                    self.finished = True
+                return
+
+        if not self._due(self._next):
+            return
+
+        frame = self._next
+        self._next = next(self._frames, None)
+
+        processes = expand_frame(frame)
+        processes.sort(key=lambda x: x.get(self.sort_by, 0), reverse=self.sort_desc)
+        self.processes = processes
+        # Recordings carry no command lines, so only name and username are searchable
+        self._sync_index(processes, {})
+        self.system_memory = frame['sys']
+        self.data_timestamp = frame['t']
+        self.last_update = time.time()
+        self.version += 1
+
+        # Pace the background loop to the gap before the next frame
+        if self._next is not None and self.speed > 0:
+            self.update_interval = max(0.0, (self._next['t'] - frame['t']) / self.speed)
+        elif self.speed <= 0:
+            self.update_interval = 0.0
+
+
+def summarize(path: str) -> Dict[str, Any]:
+    """Frame count, time range and peak memory of a recording"""
+    frames = 0
+    first = last = None
+    peak_rss = 0
+    peak_process = None
+    for frame in read_frames(path):
+        frames += 1
+        first = frame['t'] if first is None else first
+        last = frame['t']
+        rss_index = frame['fields'].index('memory_rss')
+        for row in frame['p']:
+            if (row[rss_index] or 0) > peak_rss:
+                peak_rss = row[rss_index]
+                peak_process = dict(zip(frame['fields'], row), timestamp=frame['t'])
+    return {
+        'path': path,
+        'frames': frames,
+        'start': datetime.fromtimestamp(first).strftime('%Y-%m-%d %H:%M:%S') if first else None,
+        'end': datetime.fromtimestamp(last).strftime('%Y-%m-%d %H:%M:%S') if last else None,
+        'duration_seconds': round(last - first, 3) if first else 0,
+        'peak_process': peak_process,
+    }
+
+
+if __name__ == '__main__':
+    for recording in sys.argv[1:]:
+        print(json.dumps(summarize(recording), indent=2))
@@ -0,0 +1,110 @@
+import math
+from typing import List, Dict, Any, Optional, Tuple
+
+# Bucket sizes in seconds: minutes for the edges of a window, hours for its middle
+MINUTE = 60
+HOUR = 3600
+ROLLUP_RESOLUTIONS = (MINUTE, HOUR)
+
+# Ranking expression over merged buckets for each ?by= value
+TOP_METRICS = {
+    'peak_rss': 'MAX(rss_max)',
+    'avg_rss': 'SUM(rss_sum) / SUM(samples)',
+    'peak_cpu': 'MAX(cpu_max)',
+    'avg_cpu': 'SUM(cpu_sum) / SUM(samples)',
+}
+
+
+class RollupBuffer:
+    """Per-process aggregates of the snapshots logged since the last flush.
+
+    Rows are keyed by (minute, pid, name), so a PID reused by another program is
+    ranked separately. Flushed rows are added to what is already stored, which makes a
+    flush safe at any time: on a minute boundary, before a query or on shutdown.
+    """
+
+    def __init__(self):
+        self.bucket: Optional[float] = None
+        # (pid, name) -> [username, samples, rss_max, rss_sum, cpu_max, cpu_sum, first_seen, last_seen]
+        self.rows: Dict[Tuple[int, str], list] = {}
+
+    def rolls_over(self, timestamp: float) -> bool:
+        """True if a snapshot at timestamp starts a new minute while rows are pending"""
+        return bool(self.rows) and bucket_start(timestamp, MINUTE) != self.bucket
+
+    def add(self, timestamp: float, processes: List[Dict[str, Any]]) -> None:
+        self.bucket = bucket_start(timestamp, MINUTE)
+        rows = self.rows
+        for process in processes:
+            key = (process.get('pid'), process.get('name'))
+            rss = process.get('memory_rss') or 0
+            cpu = process.get('cpu_percent') or 0.0
+            row = rows.get(key)
+            if row is None:
+                rows[key] = [process.get('username'), 1, rss, rss, cpu, cpu, timestamp, timestamp]
+                continue
+            row[1] += 1
+            if rss > row[2]:
+                row[2] = rss
+            row[3] += rss
+            if cpu > row[4]:
+                row[4] = cpu
+            row[5] += cpu
+            row[7] = timestamp
+
+    def drain(self) -> List[tuple]:
+        """Pending rows as (resolution, bucket, pid, name, ...) for every resolution"""
+        if not self.rows:
+            return []
+        rows = []
+        for resolution in ROLLUP_RESOLUTIONS:
+            bucket = bucket_start(self.bucket, resolution)
+            rows.extend((resolution, bucket, pid, name, *values)
+                        for (pid, name), values in self.rows.items())
+        self.rows = {}
+        return rows
+
+
+def bucket_start(timestamp: float, resolution: int) -> float:
+    return math.floor(timestamp / resolution) * resolution
+
+
+def plan_window(start: float, end: float) -> List[Tuple[int, float, float]]:
+    """(resolution, first bucket, last bucket) ranges that cover [start, end].
+
+    Whole hours inside the window are read from hourly rows and the rest from minute
+    rows, so a query touches at most ~120 minute buckets per process regardless of its
+    length. The window is widened to the enclosing minutes.
+    """
+    first_minute = bucket_start(start, MINUTE)
+    first_hour = math.ceil(first_minute / HOUR) * HOUR
+    end_hour = bucket_start(end, HOUR)
+    if end - end_hour >= HOUR - MINUTE:
+        # The last hour is complete once its final minute has started
+        end_hour += HOUR
+    if end_hour <= first_hour:
+        return [(MINUTE, first_minute, end)]
+    ranges = [(HOUR, first_hour, end_hour - HOUR)]
+    if first_minute < first_hour:
+        ranges.append((MINUTE, first_minute, first_hour - MINUTE))
+    if end_hour <= end:
+        ranges.append((MINUTE, end_hour, end))
+    return ranges
+
+
+def rollup_row(row: tuple) -> Dict[str, Any]:
+    """Response entry from (pid, name, username, samples, rss_max, rss_sum, cpu_max, cpu_sum, first, last)"""
+    pid, name, username, samples, rss_max, rss_sum, cpu_max, cpu_sum, first_seen, last_seen = row
+    return {
+        'pid': pid,
+        'name': name,
+        'username': username,
+        'samples': samples,
+        'peak_rss': rss_max,
+        'peak_rss_mb': round(rss_max / (1024 * 1024), 2) if rss_max else 0.0,
+        'avg_rss': int(rss_sum / samples) if samples else 0,
+        'peak_cpu': round(cpu_max, 2),
+        'avg_cpu': round(cpu_sum / samples, 2) if samples else 0.0,
+        'first_seen': first_seen,
+        'last_seen': last_seen,
+    }
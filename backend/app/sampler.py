@@ -0,0 +1,327 @@
+import os
+import math
+import time
+import asyncio
+import logging
+from array import array
+from typing import List, Dict, Any, Optional
+
+import psutil
+
+from .stats import pipeline_stats
+
+logger = logging.getLogger("memory_monitor")
+
+# Columns of every sample. Sizes are bytes, *_rate are per second, psi_* are percentages.
+SAMPLE_FIELDS = [
+    'time',
+    'mem_total', 'mem_available', 'mem_used', 'mem_free', 'mem_percent',
+    'cached', 'buffers', 'dirty', 'writeback', 'anon', 'shmem', 'slab',
+    'swap_total', 'swap_used', 'swap_free', 'swap_percent',
+    'pgfault_rate', 'pgmajfault_rate', 'pswpin_rate', 'pswpout_rate',
+    'pgscan_rate', 'pgsteal_rate', 'refault_rate', 'oom_kills',
+    'psi_some_avg10', 'psi_some_avg60', 'psi_full_avg10', 'psi_full_avg60',
+    'psi_some_stall_rate', 'psi_full_stall_rate',
+]
+_COLUMN = {field: i for i, field in enumerate(SAMPLE_FIELDS)}
+
+# /proc/vmstat counters turned into rates
+VMSTAT_COUNTERS = {
+    'pgfault_rate': ('pgfault',),
+    'pgmajfault_rate': ('pgmajfault',),
+    'pswpin_rate': ('pswpin',),
+    'pswpout_rate': ('pswpout',),
+    'pgscan_rate': ('pgscan_kswapd', 'pgscan_direct'),
+    'pgsteal_rate': ('pgsteal_kswapd', 'pgsteal_direct'),
+    'refault_rate': ('workingset_refault_anon', 'workingset_refault_file', 'workingset_refault'),
+}
+
+VMSTAT_NAMES = frozenset(name for names in VMSTAT_COUNTERS.values() for name in names) | {'oom_kill'}
+
+_MISSING = float('nan')
+
+
+def read_meminfo(path: str = '/proc/meminfo') -> Dict[str, int]:
+    """Parse /proc/meminfo into bytes"""
+    values = {}
+    with open(path, 'rb') as f:
+        for line in f:
+            key, _, rest = line.partition(b':')
+            parts = rest.split()
+            if parts:
+                value = int(parts[0])
+                values[key.decode()] = value * 1024 if len(parts) > 1 else value
+    return values
+
+
+def read_vmstat(path: str = '/proc/vmstat', names=None) -> Dict[str, int]:
+    """Parse /proc/vmstat, keeping only the given counters if names is set"""
+    values = {}
+    with open(path, 'rb') as f:
+        for line in f:
+            key, _, value = line.partition(b' ')
+            key = key.decode()
+            if names is None or key in names:
+                values[key] = int(value)
+    return values
+
+
+def read_pressure(path: str = '/proc/pressure/memory') -> Dict[str, float]:
+    """Parse PSI into {'some_avg10': ..., 'full_total': ...} (total in microseconds)"""
+    values = {}
+    with open(path) as f:
+        for line in f:
+            kind, *pairs = line.split()
+            for pair in pairs:
+                key, _, value = pair.partition('=')
+                values[f"{kind}_{key}"] = float(value)
+    return values
+
+
+class SampleBuffer:
+    """Fixed-size ring buffer of samples stored column by column"""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.columns = [array('d', [_MISSING]) * capacity for _ in SAMPLE_FIELDS]
+        self.head = 0
+        self.count = 0
+
+    def append(self, row: List[float]) -> None:
+        for column, value in zip(self.columns, row):
+            column[self.head] = value
+        self.head = (self.head + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+
+    def _indexes(self, since: Optional[float] = None) -> range:
+        """Positions from oldest to newest, starting at the first sample at or after since"""
+        start = (self.head - self.count) % self.capacity
+        times = self.columns[0]
+        skip = 0
+        if since is not None:
+            # Times are increasing, so binary search over the logical order
+            low, high = 0, self.count
+            while low < high:
+                middle = (low + high) // 2
+                if times[(start + middle) % self.capacity] < since:
+                    low = middle + 1
+                else:
+                    high = middle
+            skip = low
+        return range(start + skip, start + self.count)
+
+    def rows(self, since: Optional[float] = None, fields: Optional[List[str]] = None) -> List[List[Optional[float]]]:
+        columns = [self.columns[_COLUMN[field]] for field in fields or SAMPLE_FIELDS]
+        rows = []
+        for position in self._indexes(since):
+            index = position % self.capacity
+            rows.append([None if math.isnan(column[index]) else column[index] for column in columns])
+        return rows
+
+    def latest(self) -> Optional[Dict[str, Optional[float]]]:
+        if not self.count:
+            return None
+        index = (self.head - 1) % self.capacity
+        return {field: None if math.isnan(column[index]) else column[index]
+                for field, column in zip(SAMPLE_FIELDS, self.columns)}
+
+
+class SystemSampler:
+    """Samples /proc/meminfo, /proc/vmstat and memory PSI at a high rate into a ring buffer"""
+
+    def __init__(self, interval: Optional[float] = None, capacity: Optional[int] = None, proc_root: str = '/proc'):
+        self.interval = interval if interval is not None else \
+            float(os.getenv("SYSTEM_SAMPLE_INTERVAL_MS", "250")) / 1000
+        self.capacity = capacity or int(os.getenv("SYSTEM_SAMPLE_BUFFER", "14400"))
+        self.proc_root = proc_root
+        self.buffer = SampleBuffer(self.capacity)
+        self.has_procfs = os.path.exists(os.path.join(proc_root, 'meminfo'))
+        self.has_pressure = os.path.exists(os.path.join(proc_root, 'pressure', 'memory'))
+        self._previous: Optional[Dict[str, float]] = None
+        self._previous_time: Optional[float] = None
+        self._system_memory: Optional[Dict[str, Any]] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is None:
+            logger.info(f"Sampling system memory every {self.interval * 1000:.0f} ms")
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                self.sample()
+            except Exception as e:
+                pipeline_stats.incr("system_sample_errors")
+                logger.error(f"Error sampling system memory: {e}")
+            await asyncio.sleep(self.interval)
+
+    def sample(self) -> None:
+        """Take one reading and append it to the buffer"""
+        start = time.perf_counter()
+        now = time.time()
+        row = [_MISSING] * len(SAMPLE_FIELDS)
+        row[0] = now
+
+        counters: Dict[str, float] = {}
+        if self.has_procfs:
+            self._fill_meminfo(row)
+            vmstat = read_vmstat(os.path.join(self.proc_root, 'vmstat'), VMSTAT_NAMES)
+            for field, names in VMSTAT_COUNTERS.items():
+                present = [vmstat[name] for name in names if name in vmstat]
+                if present:
+                    counters[field] = sum(present)
+            if 'oom_kill' in vmstat:
+                counters['oom_kills'] = vmstat['oom_kill']
+        else:
+            self._fill_psutil(row)
+
+        if self.has_pressure:
+            try:
+                pressure = read_pressure(os.path.join(self.proc_root, 'pressure', 'memory'))
+            except OSError:
+                # The file exists but PSI is disabled on the kernel command line
+                logger.info("Memory pressure (PSI) is not available")
+                self.has_pressure = False
+                pressure = {}
+            for kind in ('some', 'full'):
+                for window in ('avg10', 'avg60'):
+                    row[_COLUMN[f'psi_{kind}_{window}']] = pressure.get(f'{kind}_{window}', _MISSING)
+                if f'{kind}_total' in pressure:
+                    # Stalled microseconds per second, as a percentage of wall time
+                    counters[f'psi_{kind}_stall_rate'] = pressure[f'{kind}_total'] / 1e4
+
+        if self._previous is not None:
+            elapsed = now - self._previous_time
+            for field, value in counters.items():
+                if field in self._previous and elapsed > 0:
+                    delta = value - self._previous[field]
+                    # oom_kills counts events since the previous sample, the rest are per second
+                    row[_COLUMN[field]] = delta if field == 'oom_kills' else round(delta / elapsed, 3)
+        self._previous = counters
+        self._previous_time = now
+
+        self.buffer.append(row)
+        self._system_memory = None
+        pipeline_stats.observe("system_sample", (time.perf_counter() - start) * 1000)
+
+    def _fill_meminfo(self, row: List[float]) -> None:
+        info = read_meminfo(os.path.join(self.proc_root, 'meminfo'))
+        total = info.get('MemTotal', 0)
+        free = info.get('MemFree', 0)
+        cached = info.get('Cached', 0) + info.get('SReclaimable', 0)
+        buffers = info.get('Buffers', 0)
+        available = info.get('MemAvailable', free + cached + buffers)
+        # Same definitions psutil uses on Linux
+        used = total - free - cached - buffers
+        if used < 0:
+            used = total - free
+        swap_total = info.get('SwapTotal', 0)
+        swap_free = info.get('SwapFree', 0)
+        swap_used = swap_total - swap_free
+        values = {
+            'mem_total': total, 'mem_available': available, 'mem_used': used, 'mem_free': free,
+            'mem_percent': round((total - available) / total * 100, 1) if total else 0.0,
+            'cached': cached, 'buffers': buffers, 'dirty': info.get('Dirty', _MISSING),
+            'writeback': info.get('Writeback', _MISSING), 'anon': info.get('AnonPages', _MISSING),
+            'shmem': info.get('Shmem', _MISSING), 'slab': info.get('Slab', _MISSING),
+            'swap_total': swap_total, 'swap_used': swap_used, 'swap_free': swap_free,
+            'swap_percent': round(swap_used / swap_total * 100, 1) if swap_total else 0.0,
+        }
+        for field, value in values.items():
+            row[_COLUMN[field]] = value
+
+    def _fill_psutil(self, row: List[float]) -> None:
+        """Fallback for systems without procfs"""
+        memory = psutil.virtual_memory()
+        swap = psutil.swap_memory()
+        values = {
+            'mem_total': memory.total, 'mem_available': memory.available, 'mem_used': memory.used,
+            'mem_free': memory.free, 'mem_percent': memory.percent,
+            'swap_total': swap.total, 'swap_used': swap.used, 'swap_free': swap.free,
+            'swap_percent': swap.percent,
+        }
+        for field, value in values.items():
+            row[_COLUMN[field]] = value
+
+    def latest(self) -> Optional[Dict[str, Optional[float]]]:
+        return self.buffer.latest()
+
+    def system_memory(self) -> Optional[Dict[str, Any]]:
+        """Latest sample in the shape of ProcessMonitor.get_system_memory, built once per sample"""
+        if self._system_memory is None:
+            sample = self.latest()
+            if sample is None:
+                return None
+            self._system_memory = {
+                "memory": {
+                    "total": int(sample['mem_total']),
+                    "available": int(sample['mem_available']),
+                    "used": int(sample['mem_used']),
+                    "free": int(sample['mem_free']),
+                    "percent": sample['mem_percent'],
+                },
+                "swap": {
+                    "total": int(sample['swap_total']),
+                    "used": int(sample['swap_used']),
+                    "free": int(sample['swap_free']),
+                    "percent": sample['swap_percent'],
+                },
+                "sampled_at": sample['time'],
+            }
+            if self.has_pressure:
+                self._system_memory["pressure"] = {
+                    "some_avg10": sample['psi_some_avg10'],
+                    "some_avg60": sample['psi_some_avg60'],
+                    "full_avg10": sample['psi_full_avg10'],
+                    "full_avg60": sample['psi_full_avg60'],
+                }
+        return self._system_memory
+
+    @staticmethod
+    def check_fields(fields: Optional[List[str]]) -> None:
+        unknown = [field for field in fields or [] if field not in _COLUMN]
+        if unknown:
+            raise ValueError(f"Unknown field(s): {', '.join(unknown)}")
+
+    def history(self, seconds: Optional[float] = None, fields: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Samples from the last N seconds (all retained samples if None) as compact rows"""
+        self.check_fields(fields)
+        fields = ['time'] + [field for field in fields or SAMPLE_FIELDS[1:] if field != 'time']
+        since = time.time() - seconds if seconds else None
+        return {
+            'interval': self.interval,
+            'capacity': self.capacity,
+            'fields': fields,
+            'rows': self.buffer.rows(since, fields),
+        }
+
+    def stats(self, seconds: Optional[float] = None, fields: Optional[List[str]] = None) -> Dict[str, Any]:
+        """min/max/mean/p95/last of each field over the last N seconds"""
+        self.check_fields(fields)
+        fields = [field for field in fields or SAMPLE_FIELDS[1:] if field != 'time']
+        since = time.time() - seconds if seconds else None
+        rows = self.buffer.rows(since, fields)
+        result = {}
+        for i, field in enumerate(fields):
+            values = sorted(row[i] for row in rows if row[i] is not None)
+            if not values:
+                result[field] = None
+                continue
+            result[field] = {
+                'min': values[0],
+                'max': values[-1],
+                'mean': round(sum(values) / len(values), 3),
+                'p95': values[min(len(values) - 1, int(round(0.95 * (len(values) - 1))))],
+                'last': next((row[i] for row in reversed(rows) if row[i] is not None), None),
+            }
+        return {'samples': len(rows), 'seconds': seconds, 'fields': result}
@@ -0,0 +1,159 @@
+import re
+import bisect
+import logging
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger("memory_monitor")
+
+SEARCH_FIELDS = ('name', 'username', 'cmdline')
+MATCH_MODES = ('substring', 'prefix', 'regex')
+
+
+def make_matcher(pattern: str, mode: str = 'substring', case_sensitive: bool = False) -> Callable[[str], bool]:
+    """Build a predicate for a single string; raises ValueError on a bad mode or regex"""
+    if mode not in MATCH_MODES:
+        raise ValueError(f"Invalid match mode: {mode}. Use one of {', '.join(MATCH_MODES)}")
+
+    if mode == 'regex':
+        try:
+            compiled = re.compile(pattern, 0 if case_sensitive else re.IGNORECASE)
+        except re.error as e:
+            raise ValueError(f"Invalid regular expression: {e}")
+        return lambda value: compiled.search(value) is not None
+
+    needle = pattern if case_sensitive else pattern.lower()
+    fold = (lambda value: value) if case_sensitive else (lambda value: value.lower())
+    if mode == 'prefix':
+        return lambda value: fold(value).startswith(needle)
+    return lambda value: needle in fold(value)
+
+
+class _FieldIndex:
+    """Distinct values of one field mapped to the PIDs that have them"""
+
+    def __init__(self):
+        self.pids: Dict[str, Set[int]] = {}
+        # Bumped whenever a distinct value appears or disappears
+        self.generation = 0
+        self._sorted_folded: Optional[List[Tuple[str, str]]] = None
+
+    def add(self, value: str, pid: int) -> None:
+        pids = self.pids.get(value)
+        if pids is None:
+            self.pids[value] = {pid}
+            self.generation += 1
+            self._sorted_folded = None
+        else:
+            pids.add(pid)
+
+    def remove(self, value: str, pid: int) -> None:
+        pids = self.pids.get(value)
+        if pids is None:
+            return
+        pids.discard(pid)
+        if not pids:
+            del self.pids[value]
+            self.generation += 1
+            self._sorted_folded = None
+
+    def prefix_values(self, prefix: str, case_sensitive: bool) -> List[str]:
+        """Distinct values starting with prefix, via binary search on the sorted values"""
+        if case_sensitive:
+            keys = sorted(self.pids)
+            start = bisect.bisect_left(keys, prefix)
+            end = bisect.bisect_left(keys, prefix + '\U0010ffff')
+            return keys[start:end]
+
+        if self._sorted_folded is None:
+            self._sorted_folded = sorted((value.lower(), value) for value in self.pids)
+        folded = prefix.lower()
+        start = bisect.bisect_left(self._sorted_folded, (folded,))
+        end = bisect.bisect_left(self._sorted_folded, (folded + '\U0010ffff',))
+        return [value for _, value in self._sorted_folded[start:end]]
+
+
+class ProcessIndex:
+    """Incrementally maintained search index over process name, username and command line.
+
+    Processes share names and users, so matching runs over the distinct values of a field
+    rather than over every process, and results are cached until a distinct value changes.
+    """
+
+    def __init__(self, cache_size: int = 256):
+        self.fields: Dict[str, _FieldIndex] = {field: _FieldIndex() for field in SEARCH_FIELDS}
+        # pid -> (create_time, name, username, cmdline)
+        self.entries: Dict[int, Tuple[float, str, str, str]] = {}
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[tuple, Tuple[int, Set[int]]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def needs_refresh(self, pid: int, create_time: float, name: str, username: str) -> bool:
+        """True if the pid is new, was reused, exec'd into a different program or changed user"""
+        entry = self.entries.get(pid)
+        return (entry is None or entry[0] != create_time
+                or entry[1] != (name or '') or entry[2] != (username or ''))
+
+    def add(self, pid: int, create_time: float, name: str, username: str, cmdline: str) -> None:
+        if pid in self.entries:
+            self.remove(pid)
+        entry = (create_time, name or '', username or '', cmdline or '')
+        self.entries[pid] = entry
+        for field, value in zip(SEARCH_FIELDS, entry[1:]):
+            self.fields[field].add(value, pid)
+
+    def remove(self, pid: int) -> None:
+        entry = self.entries.pop(pid, None)
+        if entry is None:
+            return
+        for field, value in zip(SEARCH_FIELDS, entry[1:]):
+            self.fields[field].remove(value, pid)
+
+    def retain(self, live_pids: Set[int]) -> None:
+        """Drop every pid that is no longer running"""
+        for pid in [pid for pid in self.entries if pid not in live_pids]:
+            self.remove(pid)
+
+    def cmdline(self, pid: int) -> Optional[str]:
+        entry = self.entries.get(pid)
+        return entry[3] if entry else None
+
+    def match(self, field: str, pattern: str, mode: str = 'substring',
+              case_sensitive: bool = False) -> Set[int]:
+        """PIDs whose field matches the pattern"""
+        if field not in self.fields:
+            raise ValueError(f"Invalid search field: {field}")
+
+        index = self.fields[field]
+        key = (field, pattern, mode, case_sensitive)
+        cached = self._cache.get(key)
+        if cached is not None and cached[0] == index.generation:
+            self._cache.move_to_end(key)
+            values = cached[1]
+        else:
+            if mode == 'prefix':
+                values = set(index.prefix_values(pattern, case_sensitive))
+            else:
+                matcher = make_matcher(pattern, mode, case_sensitive)
+                values = {value for value in index.pids if matcher(value)}
+            self._cache[key] = (index.generation, values)
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+        pids: Set[int] = set()
+        for value in values:
+            pids |= index.pids.get(value, set())
+        return pids
+
+    def search(self, filters: Dict[str, str], mode: str = 'substring',
+               case_sensitive: bool = False) -> Set[int]:
+        """PIDs matching every given field filter"""
+        result: Optional[Set[int]] = None
+        for field, pattern in filters.items():
+            pids = self.match(field, pattern, mode, case_sensitive)
+            result = pids if result is None else result & pids
+            if not result:
+                break
+        return result if result is not None else set(self.entries)
@@ -0,0 +1,189 @@
+import os
+import json
+import time
+import struct
+import logging
+import tempfile
+from multiprocessing import shared_memory, resource_tracker
+from typing import Optional
+
+from .aggregator import AGENT_FIELDS
+from .monitor import ProcessMonitor
+from .recorder import expand_frame
+from .stats import pipeline_stats
+
+try:
+    import fcntl
+except ImportError:  # Windows: no election, every worker collects for itself
+    fcntl = None
+
+logger = logging.getLogger("memory_monitor")
+
+# seq (odd while a write is in progress), version, payload length, publish time
+HEADER = struct.Struct('<QQQd')
+SHARED_FIELDS = AGENT_FIELDS + ['cmdline']
+
+
+class SharedSnapshotMonitor(ProcessMonitor):
+    """ProcessMonitor shared by uvicorn workers through one shared-memory segment.
+
+    The worker holding an exclusive lock on the lock file is the collector: it scans the
+    host and publishes each snapshot into the segment under a seqlock. Every other worker
+    only checks the version counter and decodes a snapshot once per version. If the
+    collector exits its lock is released and the next worker to update takes over.
+    """
+
+    def __init__(self, name: Optional[str] = None, size: Optional[int] = None,
+                 lock_path: Optional[str] = None):
+        super().__init__()
+        self.name = name or os.getenv("SHARED_SNAPSHOT_NAME", "memory_monitor_snapshot")
+        self.size = size or int(os.getenv("SHARED_SNAPSHOT_SIZE_MB", "64")) * 1024 * 1024
+        self.lock_path = lock_path or os.getenv(
+            "SHARED_SNAPSHOT_LOCK", os.path.join(tempfile.gettempdir(), f"{self.name}.lock"))
+        self.is_collector = False
+        self.segment: Optional[shared_memory.SharedMemory] = None
+        self._lock_file = None
+        self._seen_version = 0
+        self._seen_at = 0.0
+        # Restore the previous run's state on winning the collector lock (set by main)
+        self.warm_start = False
+        self.warm_start_file: Optional[str] = None
+
+    def _try_become_collector(self) -> bool:
+        if fcntl is None:
+            self.is_collector = True
+            return True
+        if self._lock_file is None:
+            self._lock_file = open(self.lock_path, 'a+')
+        try:
+            fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            return False
+
+        self._detach()
+        try:
+            self.segment = shared_memory.SharedMemory(self.name, create=True, size=self.size)
+        except FileExistsError:
+            # Left behind by a previous collector; reuse it if it is large enough
+            segment = shared_memory.SharedMemory(self.name)
+            if segment.size >= self.size:
+                self.segment = segment
+            else:
+                segment.close()
+                segment.unlink()
+                self.segment = shared_memory.SharedMemory(self.name, create=True, size=self.size)
+        # Only a worker without data restores; one taking over from a collector has newer scans
+        restored = False
+        if self.warm_start and not self.processes:
+            from .warmstart import restore
+            restored = restore(self, self.warm_start_file)
+        # Continue the version sequence so readers never see it go backwards
+        _, version, _, _ = HEADER.unpack_from(self.segment.buf, 0)
+        self.version = max(self.version, version)
+        self.is_collector = True
+        logger.info(f"Worker {os.getpid()} is the snapshot collector")
+        if restored:
+            self._publish()
+        return True
+
+    def _attach(self) -> bool:
+        if self.segment is not None:
+            return True
+        try:
+            self.segment = shared_memory.SharedMemory(self.name)
+        except FileNotFoundError:
+            return False
+        # Readers must not unlink the collector's segment when they exit
+        resource_tracker.unregister(self.segment._name, 'shared_memory')
+        self._seen_at = time.time()
+        return True
+
+    def _detach(self) -> None:
+        if self.segment is not None:
+            self.segment.close()
+            self.segment = None
+
+    async def update(self) -> None:
+        if not self.is_collector and not self._try_become_collector():
+            self._read_shared()
+            return
+
+        version = self.version
+        await super().update()
+        if self.version != version:
+            self._publish()
+
+    def _publish(self) -> None:
+        """Write the current scan into the segment (collector only)"""
+        if self.segment is None:
+            return
+        with pipeline_stats.timer("shared_publish"):
+            frame = {
+                't': self.last_update,
+                'v': self.version,
+                'stale': self.stale,
+                'sys': self.get_system_memory(),
+                'fields': SHARED_FIELDS,
+                'p': [[p.get(field) for field in AGENT_FIELDS] + [self.index.cmdline(p['pid']) or '']
+                      for p in self.processes],
+            }
+            payload = json.dumps(frame, separators=(',', ':')).encode('utf-8')
+            if HEADER.size + len(payload) > self.segment.size:
+                pipeline_stats.incr("shared_overflows")
+                logger.warning(f"Snapshot of {len(payload)} bytes does not fit the shared segment, "
+                               f"raise SHARED_SNAPSHOT_SIZE_MB")
+                return
+
+            buf = self.segment.buf
+            seq = HEADER.unpack_from(buf, 0)[0]
+            # Odd sequence marks the payload as being rewritten
+            HEADER.pack_into(buf, 0, seq + 1, self.version, len(payload), time.time())
+            buf[HEADER.size:HEADER.size + len(payload)] = payload
+            HEADER.pack_into(buf, 0, seq + 2, self.version, len(payload), time.time())
+
+    def _read_shared(self) -> None:
+        """Load the published snapshot if its version is new (reader only)"""
+        if not self._attach():
+            return
+
+        seq, version, length, _ = HEADER.unpack_from(self.segment.buf, 0)
+        if version == self._seen_version:
+            # A collector that restarted creates a new segment; re-attach if ours went quiet
+            if self.update_interval and time.time() - self._seen_at > max(5.0, self.update_interval * 5):
+                self._detach()
+                self._seen_at = time.time()
+            return
+
+        with pipeline_stats.timer("shared_read"):
+            for _ in range(10):
+                seq, version, length, _ = HEADER.unpack_from(self.segment.buf, 0)
+                if seq % 2:
+                    time.sleep(0.001)
+                    continue
+                payload = bytes(self.segment.buf[HEADER.size:HEADER.size + length])
+                if HEADER.unpack_from(self.segment.buf, 0)[0] == seq:
+                    break
+            else:
+                pipeline_stats.incr("shared_read_retries")
+                return
+
+        frame = json.loads(payload)
+        processes = expand_frame(frame)
+        cmdlines = {process['pid']: process.pop('cmdline', '') for process in processes}
+        self.processes = processes
+        self._sync_index(processes, cmdlines)
+        self.system_memory = frame['sys']
+        self.last_update = self.data_timestamp = frame['t']
+        self.version = self._seen_version = version
+        self.stale = frame.get('stale', False)
+        self._seen_at = time.time()
+
+    async def shutdown(self):
+        await super().shutdown()
+        if self.is_collector and self.segment is not None:
+            self.segment.unlink()
+        self._detach()
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+        self.is_collector = False
@@ -0,0 +1,121 @@
+import time
+import bisect
+import threading
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, Any, List
+
+# Upper bounds of the latency buckets in milliseconds
+DEFAULT_BUCKETS_MS = [0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000]
+
+
+class Histogram:
+    """Fixed-bucket histogram with a small window of recent values for percentiles"""
+
+    def __init__(self, buckets: List[float] = None, window: int = 1024):
+        self.buckets = buckets or DEFAULT_BUCKETS_MS
+        self.bucket_counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.min = None
+        self.max = None
+        self.recent = deque(maxlen=window)
+
+    def observe(self, value: float) -> None:
+        self.bucket_counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+        self.recent.append(value)
+
+    def _percentile(self, values: List[float], q: float) -> float:
+        index = min(len(values) - 1, int(round(q * (len(values) - 1))))
+        return round(values[index], 3)
+
+    def to_dict(self) -> Dict[str, Any]:
+        recent = sorted(self.recent)
+        result = {
+            'count': self.count,
+            'sum': round(self.sum, 3),
+            'mean': round(self.sum / self.count, 3) if self.count else None,
+            'min': round(self.min, 3) if self.min is not None else None,
+            'max': round(self.max, 3) if self.max is not None else None,
+            'buckets': {
+                **{str(bound): count for bound, count in zip(self.buckets, self.bucket_counts)},
+                '+Inf': self.bucket_counts[-1],
+            },
+        }
+        if recent:
+            result['p50'] = self._percentile(recent, 0.5)
+            result['p95'] = self._percentile(recent, 0.95)
+            result['p99'] = self._percentile(recent, 0.99)
+        return result
+
+
+class PipelineStats:
+    """Counters, gauges and histograms for the monitor's own pipeline stages"""
+
+    def __init__(self):
+        self.started = time.time()
+        self.counters: Dict[str, int] = {}
+        self.gauges: Dict[str, float] = {}
+        self.histograms: Dict[str, Histogram] = {}
+        # Stages are recorded from the event loop and from worker threads (CSV writes)
+        self._lock = threading.Lock()
+
+    def incr(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def set_gauge(self, name: str, value: float) -> None:
+        self.gauges[name] = value
+
+    def observe(self, name: str, value: float, buckets: List[float] = None) -> None:
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram(buckets)
+            histogram.observe(value)
+
+    @contextmanager
+    def timer(self, name: str):
+        """Record the duration of the block in milliseconds"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, (time.perf_counter() - start) * 1000)
+
+    def reset(self) -> None:
+        with self._lock:
+            self.counters.clear()
+            self.gauges.clear()
+            self.histograms.clear()
+            self.started = time.time()
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'since': self.started,
+                'uptime_seconds': round(time.time() - self.started, 3),
+                'counters': dict(self.counters),
+                'gauges': dict(self.gauges),
+                'histograms_ms': {
+                    name: histogram.to_dict()
+                    for name, histogram in self.histograms.items()
+                    if name not in COUNT_HISTOGRAMS
+                },
+                'histograms': {
+                    name: self.histograms[name].to_dict()
+                    for name in COUNT_HISTOGRAMS if name in self.histograms
+                },
+            }
+
+
+# Histograms holding counts rather than latencies
+COUNT_HISTOGRAMS = {'processes_per_scan'}
+PROCESS_COUNT_BUCKETS = [100, 250, 500, 1000, 2500, 5000, 10000, 25000, 50000, 100000]
+
+# Shared instance used by every module
+pipeline_stats = PipelineStats()
@@ -0,0 +1,72 @@
+import os
+import time
+import asyncio
+import logging
+from typing import AsyncIterator, Optional, Tuple
+
+from .stats import pipeline_stats
+
+logger = logging.getLogger("memory_monitor")
+
+KEEPALIVE = b": keepalive\n\n"
+
+
+class SnapshotStream:
+    """Server-Sent Events fan-out of the per-tick encoded snapshot.
+
+    The background task publishes the snapshot it already encoded for WebSocket clients,
+    and it is framed once as an SSE event. Every subscriber is sent that same bytes
+    object. A snapshot carries the full state, so a client that falls behind skips to the
+    newest frame instead of queueing old ones. A client resuming with Last-Event-ID gets
+    the newest frame only if it has not seen it yet.
+    """
+
+    def __init__(self):
+        self.keepalive = float(os.getenv("SSE_KEEPALIVE_SECONDS", "15"))
+        self.retry_ms = int(os.getenv("SSE_RETRY_MS", "3000"))
+        # Event ids restart with the process; the prefix tells a resuming client it changed
+        self.epoch = f"{int(time.time()):x}"
+        self.sequence = 0
+        self.subscribers = 0
+        self.latest: Optional[Tuple[str, bytes]] = None
+        # Set and replaced on every publish; created on first use inside the running loop
+        self._published: Optional[asyncio.Event] = None
+
+    def publish(self, encoded: str) -> None:
+        """Frame an encoded snapshot as the next event and wake every subscriber"""
+        self.sequence += 1
+        event_id = f"{self.epoch}-{self.sequence}"
+        self.latest = (event_id, f"id: {event_id}\nevent: snapshot\ndata: {encoded}\n\n".encode('utf-8'))
+        published, self._published = self._published, asyncio.Event()
+        if published is not None:
+            published.set()
+
+    def expire(self) -> None:
+        """Forget the latest frame once ticks pass without publishing"""
+        self.latest = None
+
+    async def events(self, last_event_id: Optional[str] = None) -> AsyncIterator[bytes]:
+        """SSE byte chunks for one client, until the client disconnects"""
+        self.subscribers += 1
+        pipeline_stats.set_gauge("sse_clients", self.subscribers)
+        try:
+            yield f"retry: {self.retry_ms}\n\n".encode('ascii')
+            sent = last_event_id
+            while True:
+                latest = self.latest
+                if latest is not None and latest[0] != sent:
+                    sent = latest[0]
+                    yield latest[1]
+                    pipeline_stats.incr("sse_frames_sent")
+                    continue
+                if self._published is None:
+                    self._published = asyncio.Event()
+                published = self._published
+                try:
+                    await asyncio.wait_for(published.wait(), self.keepalive)
+                except asyncio.TimeoutError:
+                    # Keeps proxies from closing an idle connection
+                    yield KEEPALIVE
+        finally:
+            self.subscribers -= 1
+            pipeline_stats.set_gauge("sse_clients", self.subscribers)
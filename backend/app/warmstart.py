@@ -0,0 +1,97 @@
+import os
+import gzip
+import json
+import time
+import logging
+import tempfile
+from typing import Dict, Any, Optional
+
+import psutil
+
+from .aggregator import AGENT_FIELDS
+from .monitor import ProcessMonitor
+from .recorder import expand_frame
+
+logger = logging.getLogger("memory_monitor")
+
+STATE_FORMAT = 1
+
+
+def default_path() -> str:
+    return os.getenv("WARM_START_FILE",
+                     os.path.join(tempfile.gettempdir(), "memory_monitor_state.json.gz"))
+
+
+def save_state(monitor: ProcessMonitor, path: Optional[str] = None) -> bool:
+    """Write the monitor's last scan and CPU baselines for the next start"""
+    path = path or default_path()
+    if not monitor.processes:
+        return False
+    state = monitor.export_state()
+    record = {
+        'format': STATE_FORMAT,
+        'boot_time': psutil.boot_time(),
+        'saved_at': time.time(),
+        't': state['time'],
+        'v': state['version'],
+        'sys': state['sys'],
+        'fields': AGENT_FIELDS,
+        'p': [[p.get(field) for field in AGENT_FIELDS] for p in state['processes']],
+        'cmdlines': state['cmdlines'],
+        'cpu': state['cpu_baselines'],
+    }
+    # Write beside the target and rename, so a crash never leaves a truncated file behind
+    temporary = f"{path}.{os.getpid()}.tmp"
+    try:
+        with gzip.open(temporary, 'wt', encoding='utf-8', compresslevel=1) as f:
+            json.dump(record, f, separators=(',', ':'))
+        os.replace(temporary, path)
+    except OSError as e:
+        logger.warning(f"Could not save warm start state to {path}: {e}")
+        return False
+    logger.info(f"Saved {len(record['p'])} processes for a warm start to {path}")
+    return True
+
+
+def load_state(path: Optional[str] = None, max_age: Optional[float] = None) -> Optional[Dict[str, Any]]:
+    """State saved by save_state, or None if missing, unreadable, too old or from another boot"""
+    path = path or default_path()
+    max_age = max_age if max_age is not None else float(os.getenv("WARM_START_MAX_AGE_SECONDS", "600"))
+    try:
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            record = json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        logger.warning(f"Ignoring unreadable warm start state {path}: {e}")
+        return None
+
+    if record.get('format') != STATE_FORMAT:
+        return None
+    # PIDs and CPU times are meaningless after a reboot
+    if abs(record.get('boot_time', 0) - psutil.boot_time()) > 1:
+        logger.info("Ignoring warm start state from a previous boot")
+        return None
+    if time.time() - record.get('saved_at', 0) > max_age:
+        logger.info("Ignoring warm start state older than WARM_START_MAX_AGE_SECONDS")
+        return None
+
+    return {
+        'time': record['t'],
+        'version': record['v'],
+        'sys': record['sys'],
+        'processes': expand_frame(record),
+        'cmdlines': {int(pid): cmdline for pid, cmdline in record['cmdlines'].items()},
+        'cpu_baselines': {int(pid): tuple(baseline) for pid, baseline in record['cpu'].items()},
+    }
+
+
+def restore(monitor: ProcessMonitor, path: Optional[str] = None) -> bool:
+    """Load saved state into the monitor; True if it now serves a stale snapshot"""
+    state = load_state(path)
+    if state is None:
+        return False
+    monitor.restore_state(state)
+    logger.info(f"Warm start: serving {len(state['processes'])} processes from "
+                f"{time.time() - state['time']:.0f}s ago until the first scan completes")
+    return True
@@ -0,0 +1,283 @@
+"""Benchmark harness for the monitor pipeline.
+
+Run from the repository root:
+
+    python -m benchmarks.run --sizes 1000,10000 --output bench.json
+    python -m benchmarks.run --baseline benchmarks/baseline.json --fail-on-regression
+    python -m benchmarks.run --sizes 1000,10000 --save-baseline benchmarks/baseline.json
+    python -m benchmarks.run --sizes 1000 --startup
+
+Results are written as JSON. When a baseline is given, every benchmark whose median is
+slower than the baseline by more than ``--tolerance`` is reported as a regression.
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import logging
+import argparse
+import platform
+import statistics
+import subprocess
+import tempfile
+from contextlib import contextmanager
+from typing import Callable, Dict, Any, List, Optional
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.app.monitor import ProcessMonitor
+from backend.app.logger import ProcessLogger
+from benchmarks.synthetic import SyntheticProcessTable
+
+DEFAULT_SIZES = [1000, 10000]
+
+
+def _measure(func: Callable[[], Any], repeat: int, warmup: int) -> List[float]:
+    """Call func repeatedly and return the durations in milliseconds"""
+    for _ in range(warmup):
+        func()
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        durations.append((time.perf_counter() - start) * 1000)
+    return durations
+
+
+def _result(name: str, size: int, durations: List[float]) -> Dict[str, Any]:
+    return {
+        'name': name,
+        'size': size,
+        'repeat': len(durations),
+        'median_ms': round(statistics.median(durations), 4),
+        'mean_ms': round(statistics.mean(durations), 4),
+        'min_ms': round(min(durations), 4),
+        'max_ms': round(max(durations), 4),
+        'stdev_ms': round(statistics.stdev(durations), 4) if len(durations) > 1 else 0.0,
+    }
+
+
+@contextmanager
+def _fixture(table: SyntheticProcessTable, kind: str):
+    if kind == 'procfs':
+        with table.patch_procfs():
+            yield
+    else:
+        with table.patch_psutil():
+            yield
+
+
+def _make_monitor(loop: asyncio.AbstractEventLoop) -> ProcessMonitor:
+    monitor = ProcessMonitor()
+    # Every call must do a full scan
+    monitor.update_interval = 0
+    loop.run_until_complete(monitor.update())
+    return monitor
+
+
+def bench_monitor(size: int, repeat: int, warmup: int, fixture: str) -> List[Dict[str, Any]]:
+    """Microbenchmarks for ProcessMonitor.update and get_snapshot"""
+    results = []
+    table = SyntheticProcessTable(size)
+    loop = asyncio.new_event_loop()
+    try:
+        with _fixture(table, fixture):
+            monitor = _make_monitor(loop)
+
+            results.append(_result('monitor.update', size, _measure(
+                lambda: loop.run_until_complete(monitor.update()), repeat, warmup)))
+            results.append(_result('get_snapshot', size, _measure(
+                lambda: monitor.get_snapshot(), repeat, warmup)))
+            results.append(_result('get_snapshot.top20', size, _measure(
+                lambda: monitor.get_snapshot(top=20), repeat, warmup)))
+            results.append(_result('get_snapshot.sort_cpu', size, _measure(
+                lambda: monitor.get_snapshot(sort_by='cpu_percent'), repeat, warmup)))
+            results.append(_result('get_snapshot.min_mem', size, _measure(
+                lambda: monitor.get_snapshot(min_mem_percent=0.5), repeat, warmup)))
+            snapshot = monitor.get_snapshot()
+            results.append(_result('serialize', size, _measure(
+                lambda: json.dumps(snapshot), repeat, warmup)))
+    finally:
+        loop.close()
+    return results
+
+
+def bench_logger(size: int, repeat: int, warmup: int, history_snapshots: int) -> List[Dict[str, Any]]:
+    """SQLite write, history and windowed top-N query benchmarks"""
+    results = []
+    table = SyntheticProcessTable(size)
+    loop = asyncio.new_event_loop()
+    with tempfile.TemporaryDirectory() as tmp:
+        process_logger = ProcessLogger()
+        process_logger.storage_type = 'sqlite'
+        process_logger.db_path = os.path.join(tmp, 'bench.db')
+        try:
+            with table.patch_psutil():
+                monitor = _make_monitor(loop)
+                loop.run_until_complete(process_logger._init_sqlite())
+                process_logger.initialized = True
+
+                # Only the insert is timed; each run logs a fresh tick of the table
+                durations = []
+                for _ in range(max(1, history_snapshots)):
+                    table.step()
+                    loop.run_until_complete(monitor.update())
+                    snapshot = monitor.get_snapshot()
+                    start = time.perf_counter()
+                    loop.run_until_complete(process_logger._log_snapshot_sqlite(
+                        snapshot, snapshot['timestamp'], snapshot['datetime']))
+                    durations.append((time.perf_counter() - start) * 1000)
+                results.append(_result('logger._log_snapshot_sqlite', size, durations))
+
+                pid = monitor.processes[0]['pid']
+                results.append(_result('logger.get_process_history', size, _measure(
+                    lambda: loop.run_until_complete(process_logger.get_process_history(pid, 100)),
+                    repeat, warmup)))
+
+                now = time.time()
+                results.append(_result('logger.get_top_processes', size, _measure(
+                    lambda: loop.run_until_complete(process_logger.get_top_processes(now - 6 * 3600, now)),
+                    repeat, warmup)))
+        finally:
+            loop.run_until_complete(process_logger.shutdown())
+            loop.close()
+    return results
+
+
+def bench_tick(size: int, repeat: int, warmup: int, fixture: str) -> List[Dict[str, Any]]:
+    """End-to-end tick: scan, snapshot and encode, as in background_monitor_task"""
+    table = SyntheticProcessTable(size)
+    loop = asyncio.new_event_loop()
+    try:
+        with _fixture(table, fixture):
+            monitor = _make_monitor(loop)
+
+            def tick():
+                if fixture == 'psutil':
+                    table.step()
+                loop.run_until_complete(monitor.update())
+                json.dumps(monitor.get_snapshot())
+
+            return [_result(f'tick.{fixture}', size, _measure(tick, repeat, warmup))]
+    finally:
+        loop.close()
+
+
+def run_benchmarks(sizes: List[int], repeat: int = 5, warmup: int = 1,
+                   fixture: str = 'psutil', history_snapshots: int = 5,
+                   include_logger: bool = True) -> Dict[str, Any]:
+    """Run the whole suite and return a machine-readable report"""
+    # Keep the monitor's own logging out of the measurements
+    logging.getLogger("memory_monitor").setLevel(logging.WARNING)
+
+    results = []
+    for size in sizes:
+        results.extend(bench_monitor(size, repeat, warmup, fixture))
+        results.extend(bench_tick(size, repeat, warmup, fixture))
+        if include_logger:
+            results.extend(bench_logger(size, repeat, warmup, history_snapshots))
+
+    return {'meta': _metadata(fixture, repeat), 'results': results}
+
+
+def _metadata(fixture: str, repeat: int) -> Dict[str, Any]:
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, timeout=5
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        'timestamp': time.time(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'commit': commit,
+        'fixture': fixture,
+        'repeat': repeat,
+    }
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[Dict[str, Any]]:
+    """Compare medians against the baseline; returns one entry per shared benchmark"""
+    previous = {(r['name'], r['size']): r for r in baseline.get('results', [])}
+    comparisons = []
+    for result in report['results']:
+        base = previous.get((result['name'], result['size']))
+        if base is None or not base['median_ms']:
+            continue
+        ratio = result['median_ms'] / base['median_ms']
+        comparisons.append({
+            'name': result['name'],
+            'size': result['size'],
+            'baseline_ms': base['median_ms'],
+            'current_ms': result['median_ms'],
+            'ratio': round(ratio, 3),
+            'regression': ratio > 1 + tolerance,
+        })
+    return comparisons
+
+
+def _print_table(report: Dict[str, Any], comparisons: Optional[List[Dict[str, Any]]]) -> None:
+    by_key = {(c['name'], c['size']): c for c in comparisons or []}
+    print(f"{'benchmark':<36}{'size':>8}{'median ms':>12}{'stdev':>10}{'vs base':>10}")
+    for r in report['results']:
+        c = by_key.get((r['name'], r['size']))
+        delta = f"{c['ratio']:.2f}x" if c else ""
+        flag = "  REGRESSION" if c and c['regression'] else ""
+        print(f"{r['name']:<36}{r['size']:>8}{r['median_ms']:>12.3f}{r['stdev_ms']:>10.3f}{delta:>10}{flag}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the memory monitor pipeline")
+    parser.add_argument('--sizes', default=",".join(str(s) for s in DEFAULT_SIZES),
+                        help="Comma-separated process table sizes (e.g. 1000,10000,100000)")
+    parser.add_argument('--repeat', type=int, default=5, help="Measured runs per benchmark")
+    parser.add_argument('--warmup', type=int, default=1, help="Unmeasured runs per benchmark")
+    parser.add_argument('--fixture', choices=['psutil', 'procfs'], default='psutil',
+                        help="Fake psutil objects, or a synthetic /proc tree read by real psutil")
+    parser.add_argument('--history-snapshots', type=int, default=5,
+                        help="Snapshots written before the history query benchmark")
+    parser.add_argument('--no-logger', action='store_true', help="Skip the SQLite benchmarks")
+    parser.add_argument('--startup', action='store_true',
+                        help="Also measure cold and warm server time to first byte (spawns uvicorn)")
+    parser.add_argument('--output', help="Write the JSON report to this file")
+    parser.add_argument('--baseline', help="Compare against this JSON report")
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help="Allowed slowdown before a result counts as a regression (0.25 = 25%%)")
+    parser.add_argument('--fail-on-regression', action='store_true', help="Exit with status 1 on regressions")
+    parser.add_argument('--save-baseline', help="Write the report as the new baseline")
+    args = parser.parse_args(argv)
+
+    sizes = [int(s) for s in args.sizes.split(",") if s]
+    report = run_benchmarks(sizes, args.repeat, args.warmup, args.fixture,
+                            args.history_snapshots, not args.no_logger)
+    if args.startup:
+        from benchmarks.startup import bench_startup
+        report['results'].extend(bench_startup(args.repeat))
+
+    comparisons = None
+    if args.baseline and os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            comparisons = compare(report, json.load(f), args.tolerance)
+        report['comparison'] = {'baseline': args.baseline, 'tolerance': args.tolerance, 'results': comparisons}
+
+    _print_table(report, comparisons)
+
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, 'w') as f:
+                json.dump(report, f, indent=2)
+
+    regressions = [c for c in comparisons or [] if c['regression']]
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) above {args.tolerance:.0%} tolerance")
+        if args.fail_on_regression:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
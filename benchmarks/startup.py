@@ -0,0 +1,123 @@
+"""Time to first byte of a freshly started server, cold and warm.
+
+Spawns uvicorn and polls /api/processes?top=1 until it answers with data. A cold start has
+no saved state; a warm start follows a clean shutdown that saved the last snapshot:
+
+    python -m benchmarks.startup --repeat 5
+    python -m benchmarks.run --sizes 1000 --startup
+"""
+import os
+import sys
+import json
+import time
+import signal
+import argparse
+import tempfile
+import subprocess
+import urllib.request
+from typing import Dict, Any, List, Optional
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmarks.ws_load import BACKEND_DIR
+
+
+def _spawn(port: int, state_file: str) -> subprocess.Popen:
+    env = dict(os.environ, WARM_START="true", WARM_START_FILE=state_file)
+    return subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', 'app.main:app', '--port', str(port), '--log-level', 'warning'],
+        cwd=BACKEND_DIR, env=env
+    )
+
+
+def _poll(url: str, started: float, timeout: float = 30) -> Optional[Dict[str, Any]]:
+    """First snapshot with at least one process, and the seconds it took since started"""
+    deadline = started + timeout
+    while time.perf_counter() < deadline:
+        try:
+            with urllib.request.urlopen(url, timeout=1) as response:
+                snapshot = json.loads(response.read())
+            if snapshot.get('processes'):
+                return {'elapsed': time.perf_counter() - started, 'stale': snapshot.get('stale', False)}
+        except (OSError, ValueError):
+            pass
+        time.sleep(0.005)
+    return None
+
+
+def _stop(process: subprocess.Popen) -> None:
+    # SIGINT lets uvicorn run the shutdown handlers, which save the warm start state
+    process.send_signal(signal.SIGINT)
+    try:
+        process.wait(timeout=15)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+
+def measure_start(port: int, state_file: str) -> Dict[str, Any]:
+    """Start a server and return its time to first byte and to a fresh (non-stale) snapshot"""
+    url = f"http://127.0.0.1:{port}/api/processes?top=1"
+    started = time.perf_counter()
+    process = _spawn(port, state_file)
+    try:
+        first = _poll(url, started)
+        if first is None:
+            raise RuntimeError("Spawned server did not answer")
+        fresh = first
+        while fresh is not None and fresh['stale']:
+            fresh = _poll(url, started)
+        # Give the background task a tick to finish so the saved state is complete
+        time.sleep(0.5)
+    finally:
+        _stop(process)
+    return {
+        'ttfb_ms': first['elapsed'] * 1000,
+        'stale': first['stale'],
+        'fresh_ms': fresh['elapsed'] * 1000 if fresh else None,
+    }
+
+
+def bench_startup(repeat: int = 3, port: int = 8765) -> List[Dict[str, Any]]:
+    """Cold and warm startup results in the format of benchmarks.run"""
+    from benchmarks.run import _result
+
+    with tempfile.TemporaryDirectory() as directory:
+        state_file = os.path.join(directory, "state.json.gz")
+        cold, warm, warm_fresh = [], [], []
+        for _ in range(repeat):
+            if os.path.exists(state_file):
+                os.unlink(state_file)
+            cold.append(measure_start(port, state_file)['ttfb_ms'])
+            # The cold run saved its state on shutdown
+            run = measure_start(port, state_file)
+            if not run['stale']:
+                raise RuntimeError("Warm start did not serve the saved snapshot")
+            warm.append(run['ttfb_ms'])
+            warm_fresh.append(run['fresh_ms'])
+
+    return [
+        _result('startup.ttfb.cold', 0, cold),
+        _result('startup.ttfb.warm', 0, warm),
+        _result('startup.fresh.warm', 0, warm_fresh),
+    ]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Measure server time to first byte")
+    parser.add_argument('--repeat', type=int, default=3, help="Cold/warm start pairs")
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--output', help="Write the results as JSON to this file")
+    args = parser.parse_args(argv)
+
+    results = bench_startup(args.repeat, args.port)
+    for r in results:
+        print(f"{r['name']:<24}{r['median_ms']:>12.1f} ms  (min {r['min_ms']:.1f}, max {r['max_ms']:.1f})")
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
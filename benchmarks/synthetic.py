@@ -0,0 +1,221 @@
+"""Synthetic process tables for benchmarking the monitor without a real host.
+
+Two fixtures are provided:
+
+* ``SyntheticProcessTable.patch_psutil()`` replaces ``psutil.process_iter`` and
+  ``psutil.Process`` with in-memory fakes, so only the monitor's own code is measured.
+* ``SyntheticProcessTable.write_procfs()`` writes a minimal ``/proc`` tree and points
+  ``psutil.PROCFS_PATH`` at it, so psutil's parsing cost is included (Linux only).
+"""
+import os
+import random
+import shutil
+import tempfile
+from collections import namedtuple
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+import psutil
+
+PAGESIZE = 4096
+CLOCK_TICKS = 100
+TOTAL_MEMORY = 64 * 1024 ** 3
+
+# Process names weighted roughly like a busy server: a few names account for most processes
+BASE_NAMES = [
+    ("kworker", 30), ("python3", 20), ("postgres", 15), ("nginx", 10), ("java", 8),
+    ("node", 8), ("chrome", 6), ("sshd", 4), ("bash", 4), ("systemd", 3),
+    ("containerd-shim", 3), ("redis-server", 2), ("gunicorn", 2), ("celery", 2),
+    ("dockerd", 1), ("cron", 1), ("rsyslogd", 1), ("prometheus", 1),
+]
+USERNAMES = [("root", 40), ("www-data", 20), ("postgres", 15), ("app", 15), ("nobody", 10)]
+STATUSES = [(psutil.STATUS_SLEEPING, 85), (psutil.STATUS_RUNNING, 10), (psutil.STATUS_IDLE, 5)]
+
+pmem = namedtuple('pmem', ['rss', 'vms', 'shared', 'text', 'lib', 'data', 'dirty'])
+pcputimes = namedtuple('pcputimes', ['user', 'system', 'children_user', 'children_system', 'iowait'])
+
+
+def _weighted(rng: random.Random, choices) -> str:
+    values, weights = zip(*choices)
+    return rng.choices(values, weights=weights)[0]
+
+
+class SyntheticProcess:
+    """Stand-in for psutil.Process backed by a synthetic table entry"""
+
+    def __init__(self, table: "SyntheticProcessTable", pid: int):
+        if pid not in table.entries:
+            raise psutil.NoSuchProcess(pid)
+        self._table = table
+        self.pid = pid
+        self.info: Dict = {}
+
+    def _entry(self) -> Dict:
+        entry = self._table.entries.get(self.pid)
+        if entry is None:
+            raise psutil.NoSuchProcess(self.pid)
+        return entry
+
+    @contextmanager
+    def oneshot(self):
+        yield
+
+    def name(self) -> str:
+        return self._entry()['name']
+
+    def username(self) -> str:
+        return self._entry()['username']
+
+    def status(self) -> str:
+        return self._entry()['status']
+
+    def cmdline(self) -> List[str]:
+        return list(self._entry()['cmdline'])
+
+    def create_time(self) -> float:
+        return self._entry()['create_time']
+
+    def memory_info(self):
+        entry = self._entry()
+        return pmem(entry['rss'], entry['vms'], entry['rss'] // 4, 0, 0, entry['rss'], 0)
+
+    def memory_percent(self, memtype: str = 'rss') -> float:
+        return self._entry()['rss'] / TOTAL_MEMORY * 100
+
+    def cpu_times(self):
+        entry = self._entry()
+        return pcputimes(entry['cpu_user'], entry['cpu_system'], 0.0, 0.0, 0.0)
+
+    def cpu_percent(self, interval: Optional[float] = None) -> float:
+        return self._entry()['cpu_percent']
+
+    def is_running(self) -> bool:
+        return self.pid in self._table.entries
+
+    def as_dict(self, attrs=None, ad_value=None) -> Dict:
+        entry = self._entry()
+        return {attr: entry.get(attr, ad_value) for attr in attrs or entry}
+
+
+class SyntheticProcessTable:
+    """Deterministic, mutable process table of a configurable size"""
+
+    def __init__(self, size: int, seed: int = 42, churn: float = 0.01,
+                 boot_time: float = 1700000000.0):
+        self.rng = random.Random(seed)
+        self.churn = churn
+        self.entries: Dict[int, Dict] = {}
+        self.next_pid = 2
+        self.boot_time = boot_time
+        for _ in range(size):
+            self._spawn()
+
+    def _spawn(self) -> None:
+        rng = self.rng
+        pid = self.next_pid
+        self.next_pid += 1
+        name = _weighted(rng, BASE_NAMES)
+        rss = int(rng.lognormvariate(16, 1.5)) // PAGESIZE * PAGESIZE + PAGESIZE
+        self.entries[pid] = {
+            'pid': pid,
+            'name': name,
+            'username': _weighted(rng, USERNAMES),
+            'status': _weighted(rng, STATUSES),
+            'cmdline': [f"/usr/bin/{name}", "--worker", str(pid), f"--config=/etc/{name}.conf"],
+            'rss': rss,
+            'vms': rss * 4,
+            'cpu_percent': round(rng.expovariate(1 / 2.0), 2) if rng.random() < 0.3 else 0.0,
+            'cpu_user': rng.uniform(0, 1000),
+            'cpu_system': rng.uniform(0, 200),
+            'create_time': self.boot_time + rng.uniform(0, 86000),
+        }
+
+    def step(self) -> None:
+        """Advance one tick: some processes exit, new ones start, RSS and CPU drift"""
+        rng = self.rng
+        exits = int(len(self.entries) * self.churn)
+        for pid in rng.sample(list(self.entries), exits):
+            del self.entries[pid]
+        for _ in range(exits):
+            self._spawn()
+
+        for entry in self.entries.values():
+            if rng.random() < 0.2:
+                entry['rss'] = max(PAGESIZE, int(entry['rss'] * rng.uniform(0.95, 1.08)) // PAGESIZE * PAGESIZE)
+                entry['cpu_percent'] = round(rng.expovariate(1 / 2.0), 2)
+                entry['cpu_user'] += entry['cpu_percent'] / 100
+
+    def process_iter(self, attrs=None, ad_value=None) -> Iterator[SyntheticProcess]:
+        """Drop-in replacement for psutil.process_iter"""
+        for pid in list(self.entries):
+            proc = SyntheticProcess(self, pid)
+            if attrs:
+                entry = self.entries[pid]
+                proc.info = {attr: entry.get(attr, ad_value) for attr in attrs}
+            yield proc
+
+    @contextmanager
+    def patch_psutil(self):
+        """Route psutil.process_iter and psutil.Process to this table"""
+        original_iter = psutil.process_iter
+        original_process = psutil.Process
+        psutil.process_iter = self.process_iter
+        psutil.Process = lambda pid: SyntheticProcess(self, pid)
+        try:
+            yield self
+        finally:
+            psutil.process_iter = original_iter
+            psutil.Process = original_process
+
+    def write_procfs(self, root: str) -> None:
+        """Write a minimal /proc tree psutil can read (stat, statm, status, cmdline)"""
+        os.makedirs(root, exist_ok=True)
+        with open(os.path.join(root, "stat"), "w") as f:
+            f.write("cpu  100000 0 50000 5000000 1000 0 100 0 0 0\n")
+            f.write("cpu0 100000 0 50000 5000000 1000 0 100 0 0 0\n")
+            f.write(f"btime {int(self.boot_time)}\n")
+        with open(os.path.join(root, "meminfo"), "w") as f:
+            total_kb = TOTAL_MEMORY // 1024
+            used_kb = sum(e['rss'] for e in self.entries.values()) // 1024
+            free_kb = max(0, total_kb - used_kb)
+            f.write(f"MemTotal:       {total_kb} kB\nMemFree:        {free_kb} kB\n"
+                    f"MemAvailable:   {free_kb} kB\nBuffers:        0 kB\nCached:         0 kB\n"
+                    f"Shmem:          0 kB\nActive:         0 kB\nInactive:       0 kB\n"
+                    f"SReclaimable:   0 kB\nSwapTotal:      0 kB\nSwapFree:       0 kB\n")
+        with open(os.path.join(root, "vmstat"), "w") as f:
+            f.write("pswpin 0\npswpout 0\npgmajfault 0\n")
+
+        uids = {'root': 0, 'www-data': 33, 'postgres': 0, 'app': 0, 'nobody': 65534}
+        for pid, entry in self.entries.items():
+            directory = os.path.join(root, str(pid))
+            os.makedirs(directory, exist_ok=True)
+            state = {'running': 'R', 'sleeping': 'S', 'idle': 'I'}.get(entry['status'], 'S')
+            start_ticks = int((entry['create_time'] - self.boot_time) * CLOCK_TICKS)
+            utime = int(entry['cpu_user'] * CLOCK_TICKS)
+            stime = int(entry['cpu_system'] * CLOCK_TICKS)
+            fields = [state, "1", str(pid), str(pid), "0", "-1", "4194304", "0", "0", "0", "0",
+                      str(utime), str(stime), "0", "0", "20", "0", "1", "0", str(start_ticks),
+                      str(entry['vms']), str(entry['rss'] // PAGESIZE)] + ["0"] * 20
+            with open(os.path.join(directory, "stat"), "w") as f:
+                f.write(f"{pid} ({entry['name']}) {' '.join(fields)}\n")
+            with open(os.path.join(directory, "statm"), "w") as f:
+                f.write(f"{entry['vms'] // PAGESIZE} {entry['rss'] // PAGESIZE} 0 0 0 0 0\n")
+            uid = uids.get(entry['username'], 0)
+            with open(os.path.join(directory, "status"), "w") as f:
+                f.write(f"Name:\t{entry['name']}\nState:\t{state}\nPid:\t{pid}\nPPid:\t1\n"
+                        f"Uid:\t{uid}\t{uid}\t{uid}\t{uid}\nGid:\t0\t0\t0\t0\n")
+            with open(os.path.join(directory, "cmdline"), "w") as f:
+                f.write("\0".join(entry['cmdline']) + "\0")
+
+    @contextmanager
+    def patch_procfs(self):
+        """Write the table to a temporary /proc tree and point psutil at it"""
+        root = tempfile.mkdtemp(prefix="synthetic-proc-")
+        original = psutil.PROCFS_PATH
+        try:
+            self.write_procfs(root)
+            psutil.PROCFS_PATH = root
+            yield root
+        finally:
+            psutil.PROCFS_PATH = original
+            shutil.rmtree(root, ignore_errors=True)
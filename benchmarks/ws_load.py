@@ -0,0 +1,287 @@
+"""WebSocket fan-out load generator and soak test for /ws/processes.
+
+Opens N concurrent clients against a running server (or one it spawns), with a share of
+deliberately slow readers. It records per-client delivery latency, inter-arrival cadence
+and missed ticks, and samples the server's CPU and RSS for the whole run:
+
+    python -m benchmarks.ws_load --spawn --clients 200 --slow-fraction 0.1 --duration 60
+    python -m benchmarks.ws_load --url ws://127.0.0.1:8000/ws/processes --server-pid 1234 \\
+        --clients 50 --duration 3600 --output soak.json
+"""
+import os
+import re
+import sys
+import json
+import time
+import asyncio
+import argparse
+import statistics
+import subprocess
+import urllib.request
+from typing import Dict, Any, List, Optional
+
+import psutil
+import websockets
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+# The snapshot starts with timestamp/datetime/version, so the head of the message is enough
+_TIMESTAMP_RE = re.compile(r'"timestamp":\s*([0-9.]+)')
+_VERSION_RE = re.compile(r'"version":\s*(\d+)')
+
+
+def parse_header(message: str):
+    """Extract (timestamp, version) without decoding the whole snapshot"""
+    head = message[:512]
+    timestamp = _TIMESTAMP_RE.search(head)
+    version = _VERSION_RE.search(head)
+    return (
+        float(timestamp.group(1)) if timestamp else None,
+        int(version.group(1)) if version else None,
+    )
+
+
+def _percentiles(values: List[float]) -> Dict[str, Optional[float]]:
+    if not values:
+        return {'count': 0, 'p50': None, 'p95': None, 'p99': None, 'max': None}
+    ordered = sorted(values)
+
+    def pick(q):
+        return round(ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))], 3)
+
+    return {'count': len(ordered), 'p50': pick(0.5), 'p95': pick(0.95), 'p99': pick(0.99),
+            'max': round(ordered[-1], 3)}
+
+
+class ClientStats:
+    """What one simulated dashboard saw"""
+
+    def __init__(self, index: int, slow: bool):
+        self.index = index
+        self.slow = slow
+        self.messages = 0
+        self.bytes = 0
+        self.latencies_ms: List[float] = []
+        self.gaps_ms: List[float] = []
+        self.missed_ticks = 0
+        self.last_version: Optional[int] = None
+        self.last_arrival: Optional[float] = None
+        self.connect_ms: Optional[float] = None
+        self.error: Optional[str] = None
+
+    def record(self, message: str, arrival: float) -> None:
+        self.messages += 1
+        self.bytes += len(message)
+        timestamp, version = parse_header(message)
+        if timestamp is not None:
+            self.latencies_ms.append((arrival - timestamp) * 1000)
+        if self.last_arrival is not None:
+            self.gaps_ms.append((arrival - self.last_arrival) * 1000)
+        if version is not None and self.last_version is not None and version > self.last_version + 1:
+            self.missed_ticks += version - self.last_version - 1
+        self.last_version = version if version is not None else self.last_version
+        self.last_arrival = arrival
+
+
+async def run_client(url: str, stats: ClientStats, stop_at: float, slow_delay: float) -> None:
+    start = time.time()
+    try:
+        async with websockets.connect(url, max_size=None, ping_interval=None) as ws:
+            stats.connect_ms = (time.time() - start) * 1000
+            while time.time() < stop_at:
+                try:
+                    message = await asyncio.wait_for(ws.recv(), timeout=max(0.1, stop_at - time.time()))
+                except asyncio.TimeoutError:
+                    break
+                stats.record(message, time.time())
+                if stats.slow:
+                    # Slow readers leave messages in the socket buffer, pushing back on the server
+                    await asyncio.sleep(slow_delay)
+    except Exception as e:
+        stats.error = f"{type(e).__name__}: {e}"
+
+
+class ServerSampler:
+    """Samples CPU and RSS of the server process at a fixed interval"""
+
+    def __init__(self, pid: Optional[int], interval: float):
+        self.process = psutil.Process(pid) if pid else None
+        self.interval = interval
+        self.samples: List[Dict[str, float]] = []
+
+    async def run(self, stop_at: float) -> None:
+        if self.process is None:
+            return
+        self.process.cpu_percent(interval=None)
+        while time.time() < stop_at:
+            await asyncio.sleep(self.interval)
+            try:
+                with self.process.oneshot():
+                    self.samples.append({
+                        'time': time.time(),
+                        'cpu_percent': self.process.cpu_percent(interval=None),
+                        'rss': self.process.memory_info().rss,
+                    })
+            except psutil.NoSuchProcess:
+                break
+
+    def summary(self) -> Dict[str, Any]:
+        if not self.samples:
+            return {}
+        first, last = self.samples[0], self.samples[-1]
+        hours = max((last['time'] - first['time']) / 3600, 1e-9)
+        cpu = [s['cpu_percent'] for s in self.samples]
+        return {
+            'samples': len(self.samples),
+            'cpu_percent_mean': round(statistics.mean(cpu), 2),
+            'cpu_percent_max': round(max(cpu), 2),
+            'rss_start': first['rss'],
+            'rss_end': last['rss'],
+            'rss_max': max(s['rss'] for s in self.samples),
+            'rss_growth': last['rss'] - first['rss'],
+            'rss_growth_mb_per_hour': round((last['rss'] - first['rss']) / (1024 * 1024) / hours, 3),
+            'timeline': self.samples,
+        }
+
+
+def summarize(clients: List[ClientStats], interval: float) -> Dict[str, Any]:
+    """Aggregate per-client stats into fast/slow groups"""
+    groups = {}
+    for name, members in (('fast', [c for c in clients if not c.slow]),
+                          ('slow', [c for c in clients if c.slow])):
+        if not members:
+            continue
+        gaps = [g for c in members for g in c.gaps_ms]
+        groups[name] = {
+            'clients': len(members),
+            'errors': sum(1 for c in members if c.error),
+            'messages': sum(c.messages for c in members),
+            'bytes': sum(c.bytes for c in members),
+            'missed_ticks': sum(c.missed_ticks for c in members),
+            'latency_ms': _percentiles([l for c in members for l in c.latencies_ms]),
+            'interarrival_ms': _percentiles(gaps),
+            'connect_ms': _percentiles([c.connect_ms for c in members if c.connect_ms is not None]),
+        }
+
+    fast = groups.get('fast')
+    cadence_kept = None
+    if fast and fast['interarrival_ms']['p95'] is not None:
+        # The broadcast keeps its cadence if fast readers get a message at least every 1.5 intervals
+        cadence_kept = fast['interarrival_ms']['p95'] <= interval * 1000 * 1.5
+    return {'groups': groups, 'cadence_kept': cadence_kept,
+            'errors': [c.error for c in clients if c.error][:20]}
+
+
+def _spawn_server(port: int, interval: float) -> subprocess.Popen:
+    env = dict(os.environ, MONITOR_INTERVAL_SECONDS=str(interval))
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', 'app.main:app', '--port', str(port), '--log-level', 'warning'],
+        cwd=BACKEND_DIR, env=env
+    )
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/", timeout=1)
+            return process
+        except OSError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("Spawned server did not become ready")
+
+
+def _fetch_internal_stats(url: str) -> Optional[Dict[str, Any]]:
+    http_url = re.sub(r'^ws', 'http', url.split('/ws/')[0]) + "/api/internal/stats"
+    try:
+        with urllib.request.urlopen(http_url, timeout=5) as response:
+            stats = json.loads(response.read())
+        histograms = stats.get('histograms_ms', {})
+        return {name: histograms[name] for name in ('tick', 'broadcast', 'fanout_client', 'serialize')
+                if name in histograms}
+    except (OSError, ValueError):
+        return None
+
+
+async def run_load(url: str, clients: int, slow_fraction: float, slow_delay: float,
+                   duration: float, ramp_up: float, interval: float,
+                   server_pid: Optional[int], sample_interval: float) -> Dict[str, Any]:
+    """Run one load/soak session and return the report"""
+    slow_count = int(round(clients * slow_fraction))
+    stats = [ClientStats(i, slow=i < slow_count) for i in range(clients)]
+    stop_at = time.time() + ramp_up + duration
+    sampler = ServerSampler(server_pid, sample_interval)
+
+    async def delayed(client: ClientStats):
+        if ramp_up and clients > 1:
+            await asyncio.sleep(ramp_up * client.index / (clients - 1))
+        await run_client(url, client, stop_at, slow_delay)
+
+    started = time.time()
+    await asyncio.gather(sampler.run(stop_at), *(delayed(c) for c in stats))
+
+    return {
+        'config': {
+            'url': url, 'clients': clients, 'slow_clients': slow_count, 'slow_delay': slow_delay,
+            'duration': duration, 'ramp_up': ramp_up, 'interval': interval,
+        },
+        'elapsed_seconds': round(time.time() - started, 3),
+        'clients': summarize(stats, interval),
+        'server': sampler.summary(),
+        'server_internal_stats': _fetch_internal_stats(url),
+    }
+
+
+def _print_report(report: Dict[str, Any]) -> None:
+    print(f"elapsed {report['elapsed_seconds']}s, cadence kept: {report['clients']['cadence_kept']}")
+    for name, group in report['clients']['groups'].items():
+        latency = group['latency_ms']
+        gaps = group['interarrival_ms']
+        print(f"  {name:<5} clients={group['clients']} errors={group['errors']} messages={group['messages']} "
+              f"missed={group['missed_ticks']} latency p50/p95/max={latency['p50']}/{latency['p95']}/{latency['max']} ms "
+              f"gap p95={gaps['p95']} ms")
+    server = report['server']
+    if server:
+        print(f"  server cpu mean/max={server['cpu_percent_mean']}/{server['cpu_percent_max']}% "
+              f"rss {server['rss_start'] // 2**20} -> {server['rss_end'] // 2**20} MB "
+              f"({server['rss_growth_mb_per_hour']} MB/h)")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="WebSocket fan-out load and soak test")
+    parser.add_argument('--url', default="ws://127.0.0.1:8000/ws/processes")
+    parser.add_argument('--clients', type=int, default=50)
+    parser.add_argument('--slow-fraction', type=float, default=0.1, help="Share of clients that read slowly")
+    parser.add_argument('--slow-delay', type=float, default=2.0, help="Seconds a slow client waits between reads")
+    parser.add_argument('--duration', type=float, default=30.0, help="Measured seconds after ramp-up")
+    parser.add_argument('--ramp-up', type=float, default=5.0, help="Seconds over which clients connect")
+    parser.add_argument('--interval', type=float, default=1.0, help="Expected broadcast interval")
+    parser.add_argument('--server-pid', type=int, help="PID of the server to sample")
+    parser.add_argument('--spawn', action='store_true', help="Start a local server for the run")
+    parser.add_argument('--port', type=int, default=8765, help="Port for --spawn")
+    parser.add_argument('--sample-interval', type=float, default=1.0, help="Server sampling period")
+    parser.add_argument('--output', help="Write the JSON report to this file")
+    args = parser.parse_args(argv)
+
+    server = None
+    url, server_pid = args.url, args.server_pid
+    if args.spawn:
+        server = _spawn_server(args.port, args.interval)
+        url, server_pid = f"ws://127.0.0.1:{args.port}/ws/processes", server.pid
+
+    try:
+        report = asyncio.run(run_load(url, args.clients, args.slow_fraction, args.slow_delay,
+                                      args.duration, args.ramp_up, args.interval,
+                                      server_pid, args.sample_interval))
+    finally:
+        if server:
+            server.terminate()
+            server.wait(timeout=10)
+
+    _print_report(report)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
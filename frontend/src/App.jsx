@@ -34,6 +34,8 @@ function App() {
   // WebSocket connection
   const [wsConnected, setWsConnected] = useState(false);
   const [ws, setWs] = useState(null);
+  // Server-Sent Events stream, used when WebSockets do not get through a proxy
+  const [sseConnected, setSseConnected] = useState(false);
 
   // Initialize WebSocket connection
   useEffect(() => {
@@ -81,14 +83,43 @@ function App() {
     };
   }, []);
 
-  // Fallback to polling if WebSocket fails
+  // Fall back to the SSE stream while the WebSocket is down
+  useEffect(() => {
+    if (wsConnected || !window.EventSource) return;
+
+    // The browser reconnects on its own and resumes with Last-Event-ID
+    const source = new EventSource('/api/processes/stream');
+
+    source.onopen = () => {
+      console.log('Event stream connected');
+      setSseConnected(true);
+    };
+
+    source.addEventListener('snapshot', (event) => {
+      const data = JSON.parse(event.data);
+      setProcesses(data.processes || []);
+      setSystemMemory(data.system_memory || {});
+      setLoading(false);
+    });
+
+    source.onerror = () => {
+      setSseConnected(false);
+    };
+
+    return () => {
+      source.close();
+      setSseConnected(false);
+    };
+  }, [wsConnected]);
+
+  // Fallback to polling if both WebSocket and SSE fail
   useEffect(() => {
     let intervalId;
 
     const fetchData = async () => {
       try {
-        // Only fetch via HTTP if WebSocket is not connected
-        if (!wsConnected) {
+        // Only fetch via HTTP if no stream is connected
+        if (!wsConnected && !sseConnected) {
           setLoading(true);
           const response = await fetch(`/api/processes?top=${topN}&sort_by=${sortField}`);
           if (!response.ok) {
@@ -106,8 +137,8 @@ function App() {
       }
     };
 
-    // Only use polling if WebSocket is not connected
-    if (!wsConnected) {
+    // Only use polling if no stream is connected
+    if (!wsConnected && !sseConnected) {
       fetchData(); // Initial fetch
       intervalId = setInterval(fetchData, refreshInterval);
     }
@@ -115,7 +146,7 @@ function App() {
     return () => {
       if (intervalId) clearInterval(intervalId);
     };
-  }, [wsConnected, refreshInterval, topN, sortField]);
+  }, [wsConnected, sseConnected, refreshInterval, topN, sortField]);
 
   // Alert for high memory usage
   useEffect(() => {
@@ -244,6 +275,8 @@ function App() {
             <Navbar.Text>
               {wsConnected ? (
                 <span className="text-success">WebSocket Connected</span>
+              ) : sseConnected ? (
+                <span className="text-success">Event Stream Connected</span>
               ) : (
                 <span className="text-warning">Using HTTP Polling</span>
               )}
@@ -0,0 +1,123 @@
+import unittest
+import sys
+import os
+from fastapi.testclient import TestClient
+
+# Add the parent directory to the path so we can import the app modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.app import main
+from backend.app.agent import SnapshotAgent
+from backend.app.aggregator import HostAggregator
+
+
+def make_snapshot(rss_by_pid):
+    """Build a minimal monitor snapshot from a pid -> rss mapping"""
+    return {
+        'timestamp': 1700000000.0,
+        'total_processes': len(rss_by_pid),
+        'system_memory': {'total': 1000, 'available': 400, 'percent': 60.0},
+        'processes': [
+            {
+                'pid': pid, 'name': f"proc{pid}", 'username': 'user', 'status': 'running',
+                'memory_rss': rss, 'memory_percent': rss / 10, 'cpu_percent': 0.0,
+                'create_time': 1600000000.0,
+            }
+            for pid, rss in rss_by_pid.items()
+        ]
+    }
+
+
+class TestHostAggregator(unittest.TestCase):
+    """Test cases for the agent/aggregator snapshot exchange"""
+
+    def setUp(self):
+        """Set up test fixtures"""
+        self.aggregator = HostAggregator()
+
+    def test_full_then_delta(self):
+        """Test that a delta only carries changed and removed processes"""
+        agent = SnapshotAgent(url="http://unused", host="web-1")
+
+        payload, rows = agent.build_payload(make_snapshot({1: 100, 2: 200}))
+        self.assertIsNone(payload['base_seq'])
+        self.assertTrue(self.aggregator.apply_update(payload)['accepted'])
+        agent._acked, agent._acked_seq = rows, payload['seq']
+
+        payload, rows = agent.build_payload(make_snapshot({1: 100, 3: 300}))
+        self.assertEqual(payload['base_seq'], 1)
+        self.assertEqual([row[0] for row in payload['upserts']], [3])
+        self.assertEqual(payload['removed'], [2])
+        self.assertTrue(self.aggregator.apply_update(payload)['accepted'])
+
+        snapshot = self.aggregator.get_snapshot(host="web-1")
+        self.assertEqual(sorted(p['pid'] for p in snapshot['processes']), [1, 3])
+        self.assertEqual(snapshot['processes'][0]['host'], "web-1")
+
+    def test_resync_on_unknown_base(self):
+        """Test that a delta against unknown state asks for a full snapshot"""
+        result = self.aggregator.apply_update({
+            'host': 'web-2', 'agent_id': 'x', 'seq': 5, 'base_seq': 4, 'upserts': [], 'removed': []
+        })
+        self.assertFalse(result['accepted'])
+        self.assertTrue(result['resync'])
+
+    def test_null_timestamp(self):
+        """Test that a push with a null timestamp is stamped on arrival"""
+        agent = SnapshotAgent(url="http://unused", host="web-3")
+        snapshot = make_snapshot({1: 100})
+        snapshot['timestamp'] = None
+        payload, _ = agent.build_payload(snapshot)
+        self.assertTrue(self.aggregator.apply_update(payload)['accepted'])
+        self.assertIsNotNone(self.aggregator.hosts["web-3"].timestamp)
+
+    def test_cross_host_top_n(self):
+        """Test that the merged view ranks processes across hosts"""
+        for host, rss in (("a", {1: 100, 2: 900}), ("b", {1: 500})):
+            agent = SnapshotAgent(url="http://unused", host=host)
+            payload, _ = agent.build_payload(make_snapshot(rss))
+            self.aggregator.apply_update(payload)
+
+        snapshot = self.aggregator.get_snapshot(top=2, sort_by='memory_rss')
+        self.assertEqual(
+            [(p['host'], p['pid']) for p in snapshot['processes']],
+            [("a", 2), ("b", 1)]
+        )
+        self.assertEqual(snapshot['total_processes'], 3)
+        self.assertEqual(len(snapshot['hosts']), 2)
+
+
+class TestAggregatorAPI(unittest.TestCase):
+    """Test cases for the aggregator endpoints"""
+
+    def setUp(self):
+        """Set up test fixtures"""
+        main.process_aggregator = HostAggregator()
+        self.client = TestClient(main.app)
+
+    def tearDown(self):
+        """Tear down test fixtures"""
+        main.process_aggregator = None
+
+    def test_agents_push_and_drill_down(self):
+        """Test several agents pushing to one aggregator"""
+        for host in ("node-1", "node-2"):
+            payload, _ = SnapshotAgent(url="http://unused", host=host).build_payload(
+                make_snapshot({10: 100, 20: 200})
+            )
+            response = self.client.post("/api/agents/push", json=payload)
+            self.assertEqual(response.status_code, 200)
+            self.assertTrue(response.json()['accepted'])
+
+        hosts = self.client.get("/api/hosts").json()
+        self.assertEqual([h['host'] for h in hosts], ["node-1", "node-2"])
+
+        data = self.client.get("/api/processes?host=node-2").json()
+        self.assertEqual({p['host'] for p in data['processes']}, {"node-2"})
+
+        response = self.client.get("/api/processes?host=missing")
+        self.assertEqual(response.status_code, 404)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,4 +1,5 @@
 import unittest
+import asyncio
 import sys
 import os
 from fastapi.testclient import TestClient
@@ -7,6 +8,7 @@ from fastapi.testclient import TestClient
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 # Import the FastAPI app
+from backend.app import main
 from backend.app.main import app
 
 
@@ -63,6 +65,37 @@ class TestAPI(unittest.TestCase):
                 data['processes'][i + 1]['cpu_percent']
             )
     
+    def test_processes_search(self):
+        """Test text filters on the processes endpoint"""
+        response = self.client.get("/api/processes?name=python&match=substring")
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertGreater(len(data['processes']), 0)
+        for process in data['processes']:
+            self.assertIn('python', process['name'].lower())
+        
+        # Invalid regular expressions and match modes are rejected
+        response = self.client.get("/api/processes?name=(&match=regex")
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get("/api/processes?name=x&match=fuzzy")
+        self.assertEqual(response.status_code, 400)
+    
+    def test_processes_pagination(self):
+        """Test cursor pagination and field projection"""
+        response = self.client.get("/api/processes?limit=2&fields=name,memory_rss")
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(len(data['processes']), 2)
+        self.assertEqual(set(data['processes'][0]), {'pid', 'name', 'memory_rss'})
+        self.assertIsNotNone(data['next_cursor'])
+        
+        response = self.client.get(f"/api/processes?limit=2&fields=name,memory_rss&cursor={data['next_cursor']}")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['offset'], 2)
+        
+        self.assertEqual(self.client.get("/api/processes?cursor=bogus").status_code, 400)
+        self.assertEqual(self.client.get("/api/processes?fields=nope").status_code, 400)
+    
     def test_system_memory_endpoint(self):
         """Test the system memory endpoint"""
         response = self.client.get("/api/system/memory")
@@ -88,6 +121,70 @@ class TestAPI(unittest.TestCase):
         self.assertIn('cpu_count', data)
         self.assertIn('boot_time', data)
     
+    def test_metrics_endpoint(self):
+        """Test the Prometheus metrics endpoint"""
+        response = self.client.get("/metrics")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.headers['content-type'].startswith('text/plain'))
+        body = response.text
+        self.assertIn('memory_monitor_system_memory_bytes{type="total"}', body)
+        self.assertIn('memory_monitor_swap_percent', body)
+        self.assertIn('memory_monitor_process_rss_bytes{pid="other"', body)
+
+        # OpenMetrics clients get the terminating EOF marker
+        response = self.client.get("/metrics", headers={"Accept": "application/openmetrics-text"})
+        self.assertTrue(response.text.endswith("# EOF\n"))
+
+    def test_internal_stats_endpoint(self):
+        """Test the self-instrumentation endpoint"""
+        self.client.get("/api/processes")
+        response = self.client.get("/api/internal/stats")
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertIn('counters', data)
+        self.assertIn('snapshot_build', data['histograms_ms'])
+        self.assertIn('p95', data['histograms_ms']['snapshot_build'])
+        
+        # The profiler is opt-in
+        response = self.client.get("/api/internal/profile?seconds=0.1")
+        self.assertEqual(response.status_code, 404)
+    
+    def test_history_top_requires_logging(self):
+        """Test that windowed top-N queries need process logging"""
+        response = self.client.get("/api/history/top?seconds=3600&by=peak_rss")
+        self.assertEqual(response.status_code, 404)
+    
+    def test_forecast_endpoint(self):
+        """Test the forecast after startup: no estimate before FORECAST_MIN_SAMPLES scans"""
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        warm_start, main.warm_start = main.warm_start, False
+        try:
+            with TestClient(app) as client:
+                response = client.get("/api/forecast?top=3")
+                self.assertEqual(response.status_code, 200)
+                forecast = response.json()
+                self.assertEqual(set(forecast), {'confidence', 'half_life_seconds', 'system', 'processes'})
+                self.assertLess(forecast['system']['samples'], main.memory_forecaster.min_samples)
+                self.assertIsNone(forecast['system']['seconds'])
+                self.assertEqual(forecast['processes'], [])
+                self.assertIn('forecast', client.get("/api/processes?top=1").json())
+        finally:
+            main.warm_start = warm_start
+            main.process_monitor.forecaster = main.memory_forecaster = None
+            main.process_monitor.system_sampler = main.system_sampler = None
+            main.burst_capture = None
+            # Stop the background monitor task started by startup
+            tasks = asyncio.all_tasks(loop)
+            for task in tasks:
+                task.cancel()
+            loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+            loop.close()
+            asyncio.set_event_loop(asyncio.new_event_loop())
+        
+        response = self.client.get("/api/forecast")
+        self.assertEqual(response.status_code, 404)
+    
     def test_kill_process_validation(self):
         """Test process kill endpoint validation"""
         # Test with invalid data (missing pid)
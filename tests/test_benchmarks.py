@@ -0,0 +1,96 @@
+import unittest
+import asyncio
+import sys
+import os
+
+# Add the parent directory to the path so we can import the app modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.app.monitor import ProcessMonitor
+from benchmarks.synthetic import SyntheticProcessTable
+from benchmarks.run import run_benchmarks, compare
+from benchmarks.ws_load import ClientStats, parse_header, summarize
+
+
+class TestSyntheticProcessTable(unittest.TestCase):
+    """Test cases for the synthetic benchmark fixture"""
+    
+    def setUp(self):
+        """Set up test fixtures"""
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+    
+    def tearDown(self):
+        """Tear down test fixtures"""
+        self.loop.close()
+    
+    def test_table_is_deterministic(self):
+        """Test that the same seed produces the same table"""
+        first = SyntheticProcessTable(100, seed=7)
+        second = SyntheticProcessTable(100, seed=7)
+        self.assertEqual(first.entries, second.entries)
+    
+    def test_monitor_scans_synthetic_table(self):
+        """Test that the monitor sees exactly the synthetic processes"""
+        table = SyntheticProcessTable(500)
+        with table.patch_psutil():
+            monitor = ProcessMonitor()
+            self.loop.run_until_complete(monitor.update())
+        
+        self.assertEqual(len(monitor.processes), 500)
+        self.assertEqual({p['pid'] for p in monitor.processes}, set(table.entries))
+        for i in range(len(monitor.processes) - 1):
+            self.assertGreaterEqual(
+                monitor.processes[i]['memory_percent'],
+                monitor.processes[i + 1]['memory_percent']
+            )
+    
+    def test_step_churns_processes(self):
+        """Test that a tick replaces a share of the processes"""
+        table = SyntheticProcessTable(1000, churn=0.05)
+        before = set(table.entries)
+        table.step()
+        self.assertEqual(len(table.entries), 1000)
+        self.assertEqual(len(before - set(table.entries)), 50)
+
+
+class TestBenchmarkHarness(unittest.TestCase):
+    """Test cases for the benchmark runner"""
+    
+    def test_report_and_regression_check(self):
+        """Test a small run and the baseline comparison"""
+        report = run_benchmarks([200], repeat=2, warmup=0, history_snapshots=2)
+        names = {r['name'] for r in report['results']}
+        self.assertIn('monitor.update', names)
+        self.assertIn('logger._log_snapshot_sqlite', names)
+        
+        # A baseline twice as fast as the current run is a regression
+        baseline = {'results': [dict(r, median_ms=r['median_ms'] / 2) for r in report['results']]}
+        comparisons = compare(report, baseline, tolerance=0.25)
+        self.assertTrue(all(c['regression'] for c in comparisons))
+        self.assertFalse(any(c['regression'] for c in compare(report, report, tolerance=0.25)))
+
+
+
+class TestWebSocketLoad(unittest.TestCase):
+    """Test cases for the WebSocket load generator bookkeeping"""
+    
+    def test_parse_header(self):
+        """Test reading timestamp and version from the head of a snapshot"""
+        message = '{"timestamp": 1700000000.5, "datetime": "x", "version": 42, "processes": []}'
+        self.assertEqual(parse_header(message), (1700000000.5, 42))
+    
+    def test_missed_ticks_and_cadence(self):
+        """Test that version gaps count as missed ticks"""
+        client = ClientStats(0, slow=False)
+        for arrival, version in ((10.0, 1), (11.0, 2), (13.0, 4)):
+            client.record(f'{{"timestamp": {arrival - 0.01}, "version": {version}}}', arrival)
+        
+        self.assertEqual(client.missed_ticks, 1)
+        report = summarize([client], interval=1.0)
+        self.assertEqual(report['groups']['fast']['messages'], 3)
+        self.assertFalse(report['cadence_kept'])
+
+
+if __name__ == '__main__':
+    unittest.main()
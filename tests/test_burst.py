@@ -0,0 +1,116 @@
+import unittest
+import asyncio
+import sys
+import os
+
+# Add the parent directory to the path so we can import the app modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.app.burst import BurstCapture
+
+MB = 1024 * 1024
+
+
+class FakeMonitor:
+    """Just enough of ProcessMonitor for the triggers"""
+
+    def __init__(self):
+        self.version = 0
+        self.processes = []
+        self.memory_percent = 40.0
+
+    def scan(self, rss_by_pid):
+        self.version += 1
+        self.processes = [{'pid': pid, 'name': f"proc-{pid}", 'memory_rss': rss}
+                          for pid, rss in rss_by_pid.items()]
+
+    def get_system_memory(self):
+        return {'memory': {'percent': self.memory_percent}}
+
+
+class TestBurstCapture(unittest.TestCase):
+    """Test cases for pressure-triggered high-resolution capture"""
+
+    def setUp(self):
+        """Set up test fixtures"""
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.events = []
+
+        async def on_burst(event):
+            self.events.append(event)
+
+        self.capture = BurstCapture(on_burst=on_burst)
+        self.capture.duration = 0.3
+        self.capture.interval = 0.02
+        self.capture.cooldown = 3600
+        self.monitor = FakeMonitor()
+        # A real PID so the burst can read it
+        self.pid = os.getpid()
+
+    def tearDown(self):
+        """Tear down test fixtures"""
+        self.loop.run_until_complete(self.capture.stop())
+        self.loop.close()
+
+    def finish(self):
+        self.loop.run_until_complete(self.capture._task)
+
+    def test_rss_growth_triggers_one_burst(self):
+        """Test that RSS growth between scans starts a burst logged as one event"""
+        async def scans():
+            self.monitor.scan({self.pid: 100 * MB, 1: 10 * MB})
+            self.assertIsNone(self.capture.check(self.monitor))
+            self.monitor.scan({self.pid: 400 * MB, 1: 10 * MB})
+            return self.capture.check(self.monitor)
+
+        trigger = self.loop.run_until_complete(scans())
+        self.assertEqual(trigger['reason'], 'rss_growth')
+        self.assertEqual(trigger['pid'], self.pid)
+        self.assertTrue(self.capture.active)
+        self.finish()
+
+        self.assertEqual(len(self.events), 1)
+        event = self.events[0]
+        self.assertGreater(event['samples'], 3)
+        tracked = {p['pid']: p for p in event['processes']}
+        self.assertEqual(len(tracked[self.pid]['rss']), event['samples'])
+        self.assertGreater(tracked[self.pid]['rss'][0], 0)
+        self.assertEqual(len(event['system']['mem_available']), event['samples'])
+        self.assertIn(self.pid, [details['pid'] for details in event['maps_start']])
+        self.assertEqual(self.capture.get_recent(), self.events)
+
+    def test_cooldown_and_memory_percent_trigger(self):
+        """Test the system memory trigger and that bursts respect the cooldown"""
+        async def scan():
+            self.monitor.scan({self.pid: 100 * MB})
+            return self.capture.check(self.monitor)
+
+        self.monitor.memory_percent = 95.0
+        trigger = self.loop.run_until_complete(scan())
+        self.assertEqual(trigger['reason'], 'memory_percent')
+        self.finish()
+        self.assertIsNone(self.loop.run_until_complete(scan()))
+        self.assertEqual(len(self.events), 1)
+
+    def test_cpu_budget_stretches_interval(self):
+        """Test that a tiny CPU budget throttles sampling and limits the map captures"""
+        self.capture.cpu_budget = 1e-6
+
+        async def scan():
+            self.monitor.memory_percent = 99.0
+            self.monitor.scan({self.pid: 100 * MB})
+            return self.capture.check(self.monitor)
+
+        self.loop.run_until_complete(scan())
+        self.finish()
+        event = self.events[0]
+        self.assertGreater(event['throttled_samples'], 0)
+        self.assertLess(event['samples'], 0.3 / 0.02)
+        self.assertIsNone(event['maps_end'])
+        # The opening maps are limited by the budget too
+        self.assertEqual(event['maps_start'], [])
+
+
+if __name__ == '__main__':
+    unittest.main()
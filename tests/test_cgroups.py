@@ -0,0 +1,128 @@
+import unittest
+import asyncio
+import tempfile
+import sys
+import os
+
+# Add the parent directory to the path so we can import the app modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.app.cgroups import CgroupCollector, classify
+
+
+def write_cgroup(root, path, current, limit='max', pids=(), oom_kill=0):
+    directory = os.path.join(root, path.strip('/'))
+    os.makedirs(directory, exist_ok=True)
+    files = {
+        'memory.current': f"{current}\n",
+        'memory.max': f"{limit}\n",
+        'memory.stat': f"anon {current // 2}\nfile {current // 2}\nshmem 0\npgmajfault 3\nunknown_key 9\n",
+        'memory.events': f"low 0\nhigh 0\nmax 2\noom 1\noom_kill {oom_kill}\n",
+        'cgroup.procs': "".join(f"{pid}\n" for pid in pids),
+    }
+    for name, content in files.items():
+        with open(os.path.join(directory, name), 'w') as f:
+            f.write(content)
+
+
+class TestCgroupCollector(unittest.TestCase):
+    """Test cases for cgroup v2 memory accounting"""
+
+    def setUp(self):
+        """Set up test fixtures"""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        with open(os.path.join(self.root, 'cgroup.controllers'), 'w') as f:
+            f.write("cpu io memory pids\n")
+        write_cgroup(self.root, 'system.slice', 900)
+        write_cgroup(self.root, 'system.slice/nginx.service', 300, pids=[10, 11])
+        write_cgroup(self.root, 'system.slice/docker-0123456789abcdef0123.scope', 500, limit=1000,
+                     pids=[20], oom_kill=1)
+        self.processes = {
+            10: {'pid': 10, 'name': 'nginx', 'memory_rss': 100, 'memory_percent': 0.1},
+            11: {'pid': 11, 'name': 'nginx', 'memory_rss': 150, 'memory_percent': 0.2},
+            20: {'pid': 20, 'name': 'java', 'memory_rss': 400, 'memory_percent': 0.4},
+        }
+
+    def tearDown(self):
+        """Tear down test fixtures"""
+        self.tmp.cleanup()
+
+    def test_classify(self):
+        """Test naming of containers, services and slices"""
+        self.assertEqual(classify('/system.slice/docker-0123456789abcdef0123.scope'),
+                         ('container', '0123456789ab'))
+        self.assertEqual(classify('/system.slice/nginx.service'), ('service', 'nginx'))
+        self.assertEqual(classify('/user.slice/user-1000.slice'), ('user', 'user-1000'))
+        self.assertEqual(classify('/init'), ('other', 'init'))
+
+    def test_collect_and_join(self):
+        """Test reading the hierarchy and joining it with the process table"""
+        collector = CgroupCollector(self.root)
+        self.assertTrue(collector.available)
+        loop = asyncio.new_event_loop()
+        try:
+            loop.run_until_complete(collector.refresh())
+        finally:
+            loop.close()
+
+        view = collector.get_view(self.processes)
+        self.assertEqual(view['total_cgroups'], 3)
+        self.assertEqual([c['memory_current'] for c in view['cgroups']], [900, 500, 300])
+
+        containers = collector.get_view(self.processes, kind='container')['cgroups']
+        self.assertEqual(len(containers), 1)
+        container = containers[0]
+        self.assertEqual(container['memory_limit_percent'], 50.0)
+        self.assertEqual(container['events']['oom_kill'], 1)
+        self.assertEqual(container['stat'], {'anon': 250, 'file': 250, 'shmem': 0, 'pgmajfault': 3})
+        self.assertEqual(container['processes_rss'], 400)
+
+        service = collector.get_cgroup('system.slice/nginx.service', self.processes)
+        self.assertIsNone(service['memory_max'])
+        self.assertEqual(service['process_count'], 2)
+        self.assertEqual([p['pid'] for p in service['processes']], [11, 10])
+        # A parent counts the processes of its whole subtree, like memory.current
+        system = collector.get_cgroup('system.slice', self.processes)
+        self.assertEqual(system['process_count'], 3)
+        self.assertEqual(system['direct_process_count'], 0)
+        self.assertEqual(system['processes_rss'], 650)
+        self.assertEqual([p['pid'] for p in system['processes']], [20, 11, 10])
+        self.assertEqual(collector.cgroup_of(20), '/system.slice/docker-0123456789abcdef0123.scope')
+        self.assertIsNone(collector.get_cgroup('missing', self.processes))
+
+
+    def test_unreadable_values(self):
+        """Test that malformed files are skipped and a failed read keeps the cached view"""
+        directory = os.path.join(self.root, 'system.slice/nginx.service')
+        with open(os.path.join(directory, 'memory.stat'), 'w') as f:
+            f.write("anon 12\nfile \nshmem x\n")
+        with open(os.path.join(directory, 'memory.max'), 'w') as f:
+            f.write("10")
+        write_cgroup(self.root, 'system.slice/broken.service', 0)
+        with open(os.path.join(self.root, 'system.slice/broken.service/memory.current'), 'w') as f:
+            f.write("")
+
+        collector = CgroupCollector(self.root)
+        loop = asyncio.new_event_loop()
+        try:
+            loop.run_until_complete(collector.refresh())
+            service = collector.get_cgroup('system.slice/nginx.service', self.processes)
+            self.assertEqual(service['stat'], {'anon': 12})
+            self.assertEqual(service['memory_max'], 10)
+            self.assertIsNone(collector.get_cgroup('system.slice/broken.service', self.processes))
+            self.assertEqual(len(collector.cgroups), 3)
+
+            def fail():
+                raise ValueError("invalid literal for int()")
+
+            collector.collect = fail
+            collector.last_attempt = 0
+            loop.run_until_complete(collector.refresh())
+            self.assertEqual(len(collector.cgroups), 3)
+        finally:
+            loop.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
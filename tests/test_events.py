@@ -0,0 +1,167 @@
+import unittest
+import asyncio
+import base64
+import sqlite3
+import sys
+import os
+import tempfile
+from fastapi.testclient import TestClient
+
+# Add the parent directory to the path so we can import the app modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.app import main
+from backend.app.logger import ProcessLogger
+
+
+class TestEventQueries(unittest.TestCase):
+    """Test cases for filtered, paged event queries"""
+
+    def setUp(self):
+        """Set up test fixtures"""
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.directory = tempfile.TemporaryDirectory()
+        self.logger = ProcessLogger()
+        self.logger.db_path = os.path.join(self.directory.name, "events.db")
+        self.logger.csv_dir = self.directory.name
+
+    def tearDown(self):
+        """Tear down test fixtures"""
+        self.loop.run_until_complete(self.logger.shutdown())
+        self.loop.close()
+        self.directory.cleanup()
+
+    def log_events(self):
+        self.loop.run_until_complete(self.logger._init_sqlite() if self.logger.storage_type == 'sqlite'
+                                     else self.logger._init_csv())
+        self.logger.initialized = True
+        for i in range(5):
+            self.loop.run_until_complete(self.logger.log_events(
+                "process_exit", [{'pid': pid, 'name': f"proc-{pid}"} for pid in range(10)]))
+            self.loop.run_until_complete(self.logger.log_event(
+                "process_kill", {'pid': 3, 'success': i % 2 == 0, 'message': ''}))
+
+    def query(self, *args, **kwargs):
+        return self.loop.run_until_complete(self.logger.get_events(*args, **kwargs))
+
+    def page_through(self, limit, **filters):
+        events, cursor = [], None
+        while True:
+            page = self.query(limit=limit, cursor=cursor, **filters)
+            events.extend(page['events'])
+            cursor = page['next_cursor']
+            if cursor is None:
+                return events
+
+    def check_filters(self):
+        everything = self.page_through(7)
+        self.assertEqual(len(everything), 55)
+        self.assertEqual(len({event['id'] for event in everything}), 55)
+        keys = [(event['timestamp'], event['id']) for event in everything]
+        self.assertEqual(keys, sorted(keys, reverse=True))
+
+        kills = self.page_through(2, event_types=['process_kill'])
+        self.assertEqual(len(kills), 5)
+        self.assertEqual(kills[0]['data']['success'], True)
+
+        for_pid = self.page_through(4, pid=3)
+        self.assertEqual(len(for_pid), 10)
+        self.assertTrue(all(event['pid'] == 3 for event in for_pid))
+
+        both = self.query(['process_exit', 'process_kill'], pid=3, limit=100)
+        self.assertEqual(len(both['events']), 10)
+        self.assertIsNone(both['next_cursor'])
+        self.assertEqual(self.query(start=everything[0]['timestamp'] + 1)['events'], [])
+
+        cursor = self.query(limit=1)['next_cursor']
+        with self.assertRaises(ValueError):
+            self.query(pid=3, cursor=cursor)
+        with self.assertRaises(ValueError):
+            self.query(cursor="not-a-cursor")
+        # Valid encoding, but no query digest
+        with self.assertRaises(ValueError):
+            self.query(cursor=base64.urlsafe_b64encode(b'{"k": [1, 1]}').decode())
+
+    def test_sqlite_filters_and_paging(self):
+        """Test type, PID and time filters with keyset pages over SQLite"""
+        self.log_events()
+        self.check_filters()
+
+    def test_csv_filters_and_paging(self):
+        """Test that CSV storage answers the same queries by scanning the file"""
+        self.logger.storage_type = 'csv'
+        self.log_events()
+        self.check_filters()
+
+    def test_migrates_existing_events(self):
+        """Test that events logged before the pid column existed can be found by PID"""
+        connection = sqlite3.connect(self.logger.db_path)
+        connection.execute("""
+            CREATE TABLE events (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                timestamp REAL NOT NULL,
+                datetime TEXT NOT NULL,
+                event_type TEXT NOT NULL,
+                data TEXT NOT NULL
+            )
+        """)
+        connection.execute("INSERT INTO events (timestamp, datetime, event_type, data) "
+                           "VALUES (1, '', 'process_kill', '{\"pid\": 42, \"success\": true}')")
+        connection.commit()
+        connection.close()
+
+        self.loop.run_until_complete(self.logger._init_sqlite())
+        self.logger.initialized = True
+        events = self.query(pid=42)['events']
+        self.assertEqual(len(events), 1)
+        self.assertEqual(events[0]['data'], {'pid': 42, 'success': True})
+
+
+class TestEventsAPI(unittest.TestCase):
+    """Test cases for the events endpoint"""
+
+    def setUp(self):
+        """Set up test fixtures"""
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.directory = tempfile.TemporaryDirectory()
+        self.client = TestClient(main.app)
+
+    def tearDown(self):
+        """Tear down test fixtures"""
+        main.process_logger = None
+        self.loop.close()
+        self.directory.cleanup()
+
+    def test_events_endpoint(self):
+        """Test filtering and paging events over HTTP"""
+        response = self.client.get("/api/events")
+        self.assertEqual(response.status_code, 404)
+
+        process_logger = ProcessLogger()
+        process_logger.storage_type = 'csv'
+        process_logger.csv_dir = self.directory.name
+        self.loop.run_until_complete(process_logger._init_csv())
+        process_logger.initialized = True
+        self.loop.run_until_complete(process_logger.log_events("process_exit", [{'pid': 1}, {'pid': 2}]))
+        self.loop.run_until_complete(process_logger.log_event("process_kill", {'pid': 2, 'success': False}))
+        main.process_logger = process_logger
+
+        response = self.client.get("/api/events?type=process_exit&type=process_kill&pid=2&limit=1")
+        self.assertEqual(response.status_code, 200)
+        page = response.json()
+        self.assertEqual(page['events'][0]['event_type'], 'process_kill')
+
+        response = self.client.get(f"/api/events?type=process_exit&type=process_kill&pid=2&limit=1"
+                                   f"&cursor={page['next_cursor']}")
+        page = response.json()
+        self.assertEqual(page['events'][0]['event_type'], 'process_exit')
+        self.assertIsNone(page['next_cursor'])
+
+        response = self.client.get("/api/events?cursor=bogus")
+        self.assertEqual(response.status_code, 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
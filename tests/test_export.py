@@ -0,0 +1,151 @@
+import unittest
+import asyncio
+import csv
+import io
+import json
+import sys
+import os
+import tempfile
+from fastapi.testclient import TestClient
+
+# Add the parent directory to the path so we can import the app modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.app import main
+from backend.app.logger import ProcessLogger
+from backend.app.export import stream_export, check_export, pyarrow
+
+START = 1700000000.0
+
+
+def snapshot(i):
+    return {'timestamp': START + i, 'datetime': '2023-11-14 22:13:20', 'processes': [
+        {'pid': pid, 'name': f"proc-{pid}", 'username': 'root', 'status': 'running',
+         'memory_rss': pid * 1024, 'memory_percent': 0.5, 'cpu_percent': 1.5}
+        for pid in range(1, 11)
+    ]}
+
+
+class TestExport(unittest.TestCase):
+    """Test cases for streaming exports of logged data"""
+
+    def setUp(self):
+        """Set up test fixtures"""
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        """Tear down test fixtures"""
+        self.loop.close()
+        self.directory.cleanup()
+
+    def make_logger(self, storage_type):
+        process_logger = ProcessLogger()
+        process_logger.storage_type = storage_type
+        process_logger.db_path = os.path.join(self.directory.name, "export.db")
+        process_logger.csv_dir = self.directory.name
+        init = process_logger._init_sqlite() if storage_type == 'sqlite' else process_logger._init_csv()
+        self.loop.run_until_complete(init)
+        process_logger.initialized = True
+        for i in range(30):
+            self.loop.run_until_complete(process_logger.log_snapshot(snapshot(i)))
+        return process_logger
+
+    def export(self, process_logger, table, fmt, start, end, chunk_size):
+        async def collect():
+            return [chunk async for chunk in stream_export(process_logger, table, fmt, start, end, chunk_size)]
+        return self.loop.run_until_complete(collect())
+
+    def test_sqlite_chunks_cover_range_once(self):
+        """Test that keyset chunks return every row in the range exactly once"""
+        process_logger = self.make_logger('sqlite')
+        try:
+            chunks = self.export(process_logger, 'process_snapshots', 'csv', START + 5, START + 25, 7)
+            rows = list(csv.reader(io.StringIO(b''.join(chunks).decode())))
+            self.assertEqual(rows[0][:3], ['timestamp', 'datetime', 'pid'])
+            self.assertEqual(len(rows) - 1, 20 * 10)
+            self.assertEqual(len({(r[0], r[2]) for r in rows[1:]}), 200)
+            # Header plus one chunk per 7 rows
+            self.assertEqual(len(chunks), 29)
+
+            self.loop.run_until_complete(process_logger.log_event("process_exit", {"pid": 3}))
+            lines = b''.join(self.export(process_logger, 'events', 'ndjson', 0, START * 2, 100)).splitlines()
+            self.assertEqual(json.loads(lines[-1])['data'], {"pid": 3})
+        finally:
+            self.loop.run_until_complete(process_logger.shutdown())
+
+    def test_csv_storage_export(self):
+        """Test that CSV storage streams typed rows"""
+        process_logger = self.make_logger('csv')
+        lines = b''.join(self.export(process_logger, 'process_snapshots', 'ndjson', START, START + 2, 4)).splitlines()
+        self.assertEqual(len(lines), 20)
+        record = json.loads(lines[0])
+        self.assertEqual(record['pid'], 1)
+        self.assertEqual(record['memory_rss'], 1024)
+        self.assertEqual(record['cpu_percent'], 1.5)
+
+    @unittest.skipIf(pyarrow is None, "pyarrow is not installed")
+    def test_arrow_stream(self):
+        """Test that the Arrow IPC stream has one record batch per chunk"""
+        process_logger = self.make_logger('sqlite')
+        try:
+            data = b''.join(self.export(process_logger, 'process_snapshots', 'arrow', START, START + 30, 120))
+        finally:
+            self.loop.run_until_complete(process_logger.shutdown())
+        reader = pyarrow.ipc.open_stream(data)
+        table = reader.read_all()
+        self.assertEqual(table.num_rows, 300)
+        self.assertEqual(table.schema.field('memory_rss').type, pyarrow.int64())
+
+    def test_check_export(self):
+        """Test validation of table and format"""
+        check_export('events', 'ndjson')
+        with self.assertRaises(ValueError):
+            check_export('users', 'csv')
+        with self.assertRaises(ValueError):
+            check_export('events', 'xml')
+
+
+class TestExportAPI(unittest.TestCase):
+    """Test cases for the export endpoint"""
+
+    def setUp(self):
+        """Set up test fixtures"""
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.directory = tempfile.TemporaryDirectory()
+        self.client = TestClient(main.app)
+
+    def tearDown(self):
+        """Tear down test fixtures"""
+        main.process_logger = None
+        self.loop.close()
+        self.directory.cleanup()
+
+    def test_export_endpoint(self):
+        """Test streaming a CSV export over HTTP"""
+        response = self.client.get("/api/export")
+        self.assertEqual(response.status_code, 404)
+
+        process_logger = ProcessLogger()
+        process_logger.storage_type = 'csv'
+        process_logger.csv_dir = self.directory.name
+        self.loop.run_until_complete(process_logger._init_csv())
+        process_logger.initialized = True
+        for i in range(3):
+            self.loop.run_until_complete(process_logger.log_snapshot(snapshot(i)))
+        main.process_logger = process_logger
+
+        response = self.client.get(f"/api/export?format=csv&start={START}")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.headers['content-type'].startswith('text/csv'))
+        self.assertIn('process_snapshots.csv', response.headers['content-disposition'])
+        self.assertEqual(len(response.text.strip().splitlines()), 31)
+
+        response = self.client.get("/api/export?format=xml")
+        self.assertEqual(response.status_code, 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
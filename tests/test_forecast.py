@@ -0,0 +1,111 @@
+import unittest
+import random
+import sys
+import os
+
+# Add the parent directory to the path so we can import the app modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.app.forecast import TrendEstimator, MemoryForecaster
+
+MB = 1024 * 1024
+START = 1700000000.0
+
+
+class FakeMonitor:
+    """Just enough of ProcessMonitor for the forecaster"""
+
+    def __init__(self):
+        self.version = 0
+        self.stale = False
+        self.processes = []
+        self.data_timestamp = START
+        self.available = 0
+
+    def scan(self, timestamp, available, rss_by_pid, create_time=1.0):
+        self.version += 1
+        self.data_timestamp = timestamp
+        self.available = available
+        self.processes = [{'pid': pid, 'name': f"proc-{pid}", 'memory_rss': rss, 'create_time': create_time}
+                          for pid, rss in rss_by_pid.items()]
+
+    def get_system_memory(self):
+        return {'memory': {'available': self.available}}
+
+
+class TestTrendEstimator(unittest.TestCase):
+    """Test cases for the exponentially weighted trend"""
+
+    def test_exact_line(self):
+        """Test that a noiseless line gives its slope and level"""
+        estimator = TrendEstimator(half_life=60)
+        for i in range(20):
+            estimator.add(START + i * 5, 1000 - 3 * i * 5)
+        self.assertAlmostEqual(estimator.slope(), -3.0)
+        self.assertAlmostEqual(estimator.level(), 1000 - 3 * 95)
+        self.assertAlmostEqual(estimator.slope_error(), 0.0, places=6)
+
+    def test_recent_samples_dominate(self):
+        """Test that a change of trend wins after enough half-lives"""
+        estimator = TrendEstimator(half_life=30)
+        value = 0
+        for i in range(450):
+            value += 10 if i < 150 else -10
+            estimator.add(START + i, value)
+        self.assertLess(estimator.slope(), -9)
+        self.assertLess(estimator.effective_samples(), 100)
+
+
+class TestMemoryForecaster(unittest.TestCase):
+    """Test cases for time-to-exhaustion forecasts"""
+
+    def setUp(self):
+        """Set up test fixtures"""
+        self.forecaster = MemoryForecaster()
+        self.monitor = FakeMonitor()
+
+    def observe(self, timestamp, available, rss_by_pid, create_time=1.0):
+        self.monitor.scan(timestamp, available, rss_by_pid, create_time)
+        self.forecaster.observe(self.monitor)
+
+    def test_declining_memory(self):
+        """Test that a steady leak is forecast within its confidence bounds"""
+        rng = random.Random(1)
+        # Available memory drops 1 MB/s with noise; PID 2 leaks, PID 3 is flat
+        for i in range(120):
+            noise = rng.gauss(0, 5 * MB)
+            self.observe(START + i, 4096 * MB - i * MB + noise, {2: 100 * MB + i * MB + noise, 3: 50 * MB})
+
+        system = self.forecaster.get_forecast()['system']
+        self.assertAlmostEqual(system['trend_bytes_per_second'] / MB, -1.0, delta=0.15)
+        # About 4096 - 119 seconds remain
+        self.assertAlmostEqual(system['seconds'], 3977, delta=400)
+        self.assertLess(system['lower'], system['seconds'])
+        self.assertGreater(system['upper'], system['seconds'])
+
+        processes = self.forecaster.get_forecast()['processes']
+        self.assertEqual([p['pid'] for p in processes], [2])
+        self.assertAlmostEqual(processes[0]['seconds'], 3977, delta=400)
+
+    def test_flat_memory_has_no_deadline(self):
+        """Test that stable memory gives no forecast and restored snapshots are ignored"""
+        for i in range(30):
+            self.observe(START + i, 2048 * MB, {2: 100 * MB})
+        forecast = self.forecaster.get_forecast()
+        self.assertIsNone(forecast['system']['seconds'])
+        self.assertEqual(forecast['processes'], [])
+
+        self.monitor.stale = True
+        self.observe(START + 31, 10 * MB, {2: 100 * MB})
+        self.assertEqual(self.forecaster.system.samples, 30)
+
+    def test_reused_pid_starts_new_trend(self):
+        """Test that a PID with a new create time does not inherit the old trend"""
+        for i in range(30):
+            self.observe(START + i, 2048 * MB, {2: i * 10 * MB})
+        self.observe(START + 30, 2048 * MB, {2: MB}, create_time=2.0)
+        self.assertEqual(self.forecaster._processes[2][2].samples, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,138 @@
+import unittest
+import asyncio
+import sys
+import os
+import tempfile
+import time
+
+# Add the parent directory to the path so we can import the app modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.app.logger import ProcessLogger
+from backend.app.stats import pipeline_stats
+from backend.app.rollups import plan_window, MINUTE, HOUR
+
+# On an hour boundary, recent enough to be within the retention period
+START = time.time() // HOUR * HOUR - 4 * HOUR
+
+
+def snapshot(timestamp, processes):
+    return {'timestamp': timestamp, 'datetime': '', 'processes': processes}
+
+
+def process(pid, name, rss, cpu):
+    return {'pid': pid, 'name': name, 'username': 'root', 'status': 'running',
+            'memory_rss': rss, 'memory_percent': 1.0, 'cpu_percent': cpu}
+
+
+class TestHistoryTop(unittest.TestCase):
+    """Test cases for windowed top-N queries over the rollup tables"""
+
+    def setUp(self):
+        """Set up test fixtures"""
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.directory = tempfile.TemporaryDirectory()
+        self.logger = ProcessLogger()
+        self.logger.db_path = os.path.join(self.directory.name, "history.db")
+        self.logger.csv_dir = self.directory.name
+
+    def tearDown(self):
+        """Tear down test fixtures"""
+        self.loop.run_until_complete(self.logger.shutdown())
+        self.loop.close()
+        self.directory.cleanup()
+
+    def log_three_hours(self):
+        """One snapshot every 5 minutes; 'spike' peaks once in the second hour"""
+        self.loop.run_until_complete(self.logger._init_sqlite() if self.logger.storage_type == 'sqlite'
+                                     else self.logger._init_csv())
+        self.logger.initialized = True
+        for i in range(36):
+            timestamp = START + i * 300
+            processes = [
+                process(10, 'steady', 500 * 1024 * 1024, 10.0),
+                process(20, 'spike', (2048 if i == 15 else 100) * 1024 * 1024, 90.0 if i == 15 else 1.0),
+                process(30, 'late', 50 * 1024 * 1024 * (i + 1), 5.0),
+            ]
+            self.loop.run_until_complete(self.logger.log_snapshot(snapshot(timestamp, processes)))
+
+    def top(self, start, end, by='peak_rss', limit=10):
+        return self.loop.run_until_complete(self.logger.get_top_processes(start, end, by, limit))
+
+    def test_plan_window(self):
+        """Test that whole hours come from hourly rows and the edges from minute rows"""
+        self.assertEqual(plan_window(START + 90, START + 1800), [(MINUTE, START + 60, START + 1800)])
+        self.assertEqual(plan_window(START + 1800, START + 3 * HOUR + 600), [
+            (HOUR, START + HOUR, START + 2 * HOUR),
+            (MINUTE, START + 1800, START + HOUR - MINUTE),
+            (MINUTE, START + 3 * HOUR, START + 3 * HOUR + 600),
+        ])
+        # A window ending in the last minute of an hour covers that hour
+        self.assertEqual(plan_window(START, START + HOUR - 30), [(HOUR, START, START)])
+
+    def test_top_by_peak_and_average(self):
+        """Test peaks and averages over windows that mix hourly and minute rows"""
+        self.log_three_hours()
+
+        top = self.top(START, START + 3 * HOUR)
+        self.assertEqual([p['name'] for p in top], ['spike', 'late', 'steady'])
+        self.assertEqual(top[0]['peak_rss'], 2048 * 1024 * 1024)
+        self.assertEqual(top[0]['samples'], 36)
+        self.assertEqual(top[0]['first_seen'], START)
+
+        by_avg = self.top(START, START + 3 * HOUR, 'avg_rss')
+        self.assertEqual(by_avg[0]['name'], 'late')
+        self.assertEqual(by_avg[0]['avg_rss'], 50 * 1024 * 1024 * 37 // 2)
+
+        # The spike at 75 minutes is outside the first hour
+        first_hour = self.top(START, START + HOUR - 1, 'peak_cpu', limit=1)
+        self.assertEqual(first_hour[0]['name'], 'steady')
+        self.assertEqual(self.top(START + 4200, START + 5000, 'peak_cpu', limit=1)[0]['name'], 'spike')
+
+        with self.assertRaises(ValueError):
+            self.top(START, START + HOUR, 'median_rss')
+
+    def test_aggregates_survive_restart(self):
+        """Test that aggregates flushed on shutdown add up with later snapshots"""
+        self.log_three_hours()
+        self.loop.run_until_complete(self.logger.shutdown())
+        self.loop.run_until_complete(self.logger.log_snapshot(
+            snapshot(START + 3 * HOUR - 200, [process(20, 'spike', 1024, 1.0)])))
+
+        top = self.top(START, START + 3 * HOUR)
+        spike = next(p for p in top if p['name'] == 'spike')
+        self.assertEqual(spike['samples'], 37)
+
+    def test_csv_storage_scans_the_log(self):
+        """Test that CSV storage answers the same query from the raw log"""
+        self.logger.storage_type = 'csv'
+        self.log_three_hours()
+        top = self.top(START, START + 3 * HOUR, 'peak_cpu')
+        self.assertEqual([p['name'] for p in top], ['spike', 'steady', 'late'])
+        self.assertEqual(top[0]['peak_cpu'], 90.0)
+
+
+    def test_retention_waits_for_snapshot_writes(self):
+        """Test that VACUUM in the retention pass never runs inside a snapshot insert"""
+        self.loop.run_until_complete(self.logger._init_sqlite())
+        self.logger.initialized = True
+        processes = [process(pid, f"proc-{pid}", 1024, 1.0) for pid in range(500)]
+        errors = pipeline_stats.counters.get('retention_errors', 0)
+        runs = pipeline_stats.counters.get('retention_runs', 0)
+
+        async def write_while_retaining():
+            write = asyncio.ensure_future(self.logger.log_snapshot(snapshot(time.time(), processes)))
+            await asyncio.sleep(0)
+            retention = asyncio.ensure_future(self.logger._retention_task())
+            await write
+            while (pipeline_stats.counters.get('retention_runs', 0) == runs
+                   and pipeline_stats.counters.get('retention_errors', 0) == errors):
+                await asyncio.sleep(0.01)
+            retention.cancel()
+
+        self.loop.run_until_complete(asyncio.wait_for(write_while_retaining(), 10))
+        self.assertEqual(pipeline_stats.counters.get('retention_errors', 0), errors)
+
+if __name__ == '__main__':
+    unittest.main()
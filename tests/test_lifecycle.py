@@ -0,0 +1,108 @@
+import unittest
+import asyncio
+import struct
+import sys
+import os
+
+# Add the parent directory to the path so we can import the app modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.app.monitor import ProcessMonitor
+from backend.app.lifecycle import (
+    LifecycleTracker, parse_events, NLMSG_HEADER, CN_MSG_HEADER, PROC_EVENT_HEADER,
+    PROC_EVENT_FORK, PROC_EVENT_EXEC, PROC_EVENT_EXIT
+)
+from benchmarks.synthetic import SyntheticProcessTable
+
+
+def message(what, *fields):
+    """Build one proc connector datagram"""
+    event = PROC_EVENT_HEADER.pack(what, 0, 0) + struct.pack(f'={len(fields)}I', *fields)
+    cn_msg = CN_MSG_HEADER.pack(1, 1, 0, 0, len(event), 0) + event
+    return NLMSG_HEADER.pack(NLMSG_HEADER.size + len(cn_msg), 3, 0, 0, 0) + cn_msg
+
+
+class UnavailableConnector:
+    sock = None
+
+    def open(self):
+        raise PermissionError(1, "Operation not permitted")
+
+
+class TestLifecycle(unittest.TestCase):
+    """Test cases for event-driven process lifecycle tracking"""
+
+    def setUp(self):
+        """Set up test fixtures"""
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+
+    def tearDown(self):
+        """Tear down test fixtures"""
+        self.loop.close()
+
+    def test_parse_events(self):
+        """Test decoding of fork, exec and exit events, skipping threads"""
+        data = (message(PROC_EVENT_FORK, 1, 1, 100, 100)
+                + message(PROC_EVENT_FORK, 100, 100, 101, 100)  # a thread of 100
+                + message(PROC_EVENT_EXEC, 100, 100)
+                + message(PROC_EVENT_EXIT, 100, 100, 9, 9)
+                + message(PROC_EVENT_EXIT, 101, 100, 0, 0))
+        self.assertEqual(parse_events(data), [('fork', 100), ('exec', 100), ('exit', 100, 9)])
+
+    def test_fallback_without_privileges(self):
+        """Test that a missing capability leaves the monitor on full rescans"""
+        tracker = LifecycleTracker()
+
+        async def start():
+            return tracker.start(UnavailableConnector())
+
+        self.assertFalse(self.loop.run_until_complete(start()))
+        self.assertFalse(tracker.active)
+
+    def test_incremental_tracking(self):
+        """Test that events keep the live set current and exits keep their last memory"""
+        table = SyntheticProcessTable(200, churn=0)
+        with table.patch_psutil():
+            monitor = ProcessMonitor()
+            monitor.update_interval = 0
+            tracker = LifecycleTracker(rescan_interval=3600, probe_interval=1)
+            monitor.lifecycle = tracker
+
+            # The first update is a full rescan that seeds the live set
+            self.loop.run_until_complete(monitor.update())
+            self.assertEqual(set(tracker.procs), set(table.entries))
+            self.assertFalse(tracker.needs_rescan(0))
+            last = dict(monitor.get_process_map()[2])
+
+            # A new process, an exit with an event and one without
+            table._spawn()
+            started = table.next_pid - 1
+            del table.entries[2]
+            del table.entries[3]
+            # A short-lived hog that starts and exits between two scans
+            table._spawn()
+            hog = table.next_pid - 1
+            table.entries[hog]['rss'] = 8 * 1024 ** 3
+            tracker.apply([('fork', started), ('exit', 2, 137), ('fork', hog)])
+            # Events only record the pids; the probe loop reads them off the event loop
+            self.assertNotIn(started, tracker.procs)
+            self.loop.run_until_complete(tracker.probe())
+            self.assertIn(started, tracker.procs)
+            del table.entries[hog]
+            tracker.apply([('exit', hog, 9)])
+
+            self.loop.run_until_complete(monitor.update())
+            self.assertIn(started, monitor.get_process_map())
+            exits = {e['pid']: e for e in monitor.drain_exits()}
+            self.assertEqual(set(exits), {2, 3, hog})
+            self.assertEqual(exits[2]['exit_code'], 137)
+            self.assertEqual(exits[2]['memory_rss'], last['memory_rss'])
+            self.assertIsNone(exits[3]['exit_code'])
+            self.assertFalse(exits[hog]['seen_in_scan'])
+            self.assertEqual(exits[hog]['peak_rss'], 8 * 1024 ** 3)
+            self.assertEqual(monitor.drain_exits(), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+import unittest
+import asyncio
+import base64
+import json
+import sys
+import os
+
+# Add the parent directory to the path so we can import the app modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.app.monitor import ProcessMonitor
+from backend.app.pagination import CursorExpiredError, decode_cursor, encode_cursor, parse_fields
+from benchmarks.synthetic import SyntheticProcessTable
+
+
+class TestPagination(unittest.TestCase):
+    """Test cases for cursor pagination and field projection"""
+
+    def setUp(self):
+        """Set up test fixtures"""
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.table = SyntheticProcessTable(1000, churn=0.2)
+
+    def tearDown(self):
+        """Tear down test fixtures"""
+        self.loop.close()
+
+    def scan(self, monitor):
+        self.table.step()
+        self.loop.run_until_complete(monitor.update())
+
+    def test_pages_stable_across_scans(self):
+        """Test that a cursor walks one snapshot version even while new scans land"""
+        with self.table.patch_psutil():
+            monitor = ProcessMonitor()
+            monitor.update_interval = 0
+            self.scan(monitor)
+            expected = [p['pid'] for p in monitor.get_snapshot(sort_by='cpu_percent')['processes']]
+
+            pids = []
+            page = monitor.get_page(limit=300, fields='name,memory_rss', sort_by='cpu_percent')
+            version = page['version']
+            while True:
+                self.assertEqual(page['version'], version)
+                self.assertEqual(set(page['processes'][0]), {'pid', 'name', 'memory_rss'})
+                pids.extend(p['pid'] for p in page['processes'])
+                if page['next_cursor'] is None:
+                    break
+                # The table churns between page requests
+                self.scan(monitor)
+                page = monitor.get_page(limit=300, cursor=page['next_cursor'], fields='name,memory_rss',
+                                        sort_by='cpu_percent')
+
+            self.assertEqual(pids, expected)
+            self.assertNotEqual(monitor.version, version)
+
+    def test_cursor_errors(self):
+        """Test invalid, mismatched and expired cursors"""
+        with self.table.patch_psutil():
+            monitor = ProcessMonitor()
+            monitor.update_interval = 0
+            monitor.page_views = 1
+            self.scan(monitor)
+            page = monitor.get_page(limit=10)
+
+            with self.assertRaises(ValueError):
+                monitor.get_page(limit=10, cursor='not-a-cursor')
+            with self.assertRaises(ValueError):
+                monitor.get_page(limit=10, cursor=page['next_cursor'], sort_by='cpu_percent')
+
+            # A newer query evicts the only retained view
+            self.scan(monitor)
+            monitor.get_page(limit=10)
+            with self.assertRaises(CursorExpiredError):
+                monitor.get_page(limit=10, cursor=page['next_cursor'])
+
+    def test_helpers(self):
+        """Test field parsing and cursor round-trips"""
+        self.assertEqual(parse_fields('name,pid,name'), ['pid', 'name'])
+        self.assertIsNone(parse_fields(''))
+        with self.assertRaises(ValueError):
+            parse_fields('name,cmdline_secret')
+        self.assertEqual(decode_cursor(encode_cursor(7, 50, 'abc')), {'v': 7, 'o': 50, 'q': 'abc'})
+
+        # Well-formed base64 and JSON, but not a cursor
+        for payload in ({'v': 1, 'o': 0}, {'v': 1, 'o': 0, 'q': 5}, [1, 0, 'abc'], 'abc'):
+            cursor = base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip('=')
+            with self.assertRaises(ValueError):
+                decode_cursor(cursor)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+import unittest
+import asyncio
+import tempfile
+import sys
+import os
+
+# Add the parent directory to the path so we can import the app modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.app.sampler import SystemSampler, SampleBuffer, SAMPLE_FIELDS
+from backend.app.monitor import ProcessMonitor
+
+MEMINFO = """MemTotal:        8000000 kB
+MemFree:         2000000 kB
+MemAvailable:    5000000 kB
+Buffers:          100000 kB
+Cached:          1500000 kB
+SReclaimable:     100000 kB
+Dirty:               500 kB
+SwapTotal:       1000000 kB
+SwapFree:         750000 kB
+"""
+
+
+class TestSystemSampler(unittest.TestCase):
+    """Test cases for the high-rate system memory sampler"""
+
+    def setUp(self):
+        """Set up test fixtures"""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        os.makedirs(os.path.join(self.root, 'pressure'))
+        with open(os.path.join(self.root, 'meminfo'), 'w') as f:
+            f.write(MEMINFO)
+        self.write_counters(pgmajfault=100, pswpout=0, psi_total=0)
+
+    def tearDown(self):
+        """Tear down test fixtures"""
+        self.tmp.cleanup()
+
+    def write_counters(self, pgmajfault, pswpout, psi_total):
+        with open(os.path.join(self.root, 'vmstat'), 'w') as f:
+            f.write(f"pgfault 1000\npgmajfault {pgmajfault}\npswpin 0\npswpout {pswpout}\noom_kill 0\n")
+        with open(os.path.join(self.root, 'pressure', 'memory'), 'w') as f:
+            f.write(f"some avg10=1.50 avg60=0.50 avg300=0.10 total={psi_total}\n"
+                    f"full avg10=0.25 avg60=0.00 avg300=0.00 total={psi_total // 2}\n")
+
+    def test_sample_and_rates(self):
+        """Test meminfo parsing and counter rates"""
+        sampler = SystemSampler(interval=0.25, capacity=10, proc_root=self.root)
+        sampler.sample()
+        first = sampler.latest()
+        self.assertEqual(first['mem_total'], 8000000 * 1024)
+        self.assertEqual(first['mem_percent'], 37.5)
+        self.assertEqual(first['swap_used'], 250000 * 1024)
+        self.assertEqual(first['psi_some_avg10'], 1.5)
+        # Rates need two samples
+        self.assertIsNone(first['pgmajfault_rate'])
+
+        self.write_counters(pgmajfault=200, pswpout=50, psi_total=100000)
+        sampler._previous_time -= 1.0
+        sampler.sample()
+        latest = sampler.latest()
+        self.assertAlmostEqual(latest['pgmajfault_rate'], 100, delta=1)
+        self.assertAlmostEqual(latest['pswpout_rate'], 50, delta=1)
+        self.assertAlmostEqual(latest['psi_some_stall_rate'], 10, delta=0.5)
+
+        memory = sampler.system_memory()
+        self.assertEqual(memory['memory']['available'], 5000000 * 1024)
+        self.assertEqual(memory['pressure']['full_avg10'], 0.25)
+
+    def test_ring_buffer(self):
+        """Test wrap-around, time-ranged reads and stats"""
+        buffer = SampleBuffer(4)
+        for t in range(10):
+            buffer.append([float(t)] + [float(t * 10)] * (len(SAMPLE_FIELDS) - 1))
+        self.assertEqual([row[0] for row in buffer.rows()], [6.0, 7.0, 8.0, 9.0])
+        self.assertEqual([row[0] for row in buffer.rows(since=7.5)], [8.0, 9.0])
+        self.assertEqual(buffer.rows(since=7.5, fields=['mem_total']), [[80.0], [90.0]])
+
+        sampler = SystemSampler(interval=0.25, capacity=4, proc_root=self.root)
+        for _ in range(6):
+            sampler.sample()
+        history = sampler.history(fields=['mem_available'])
+        self.assertEqual(history['fields'], ['time', 'mem_available'])
+        self.assertEqual(len(history['rows']), 4)
+        stats = sampler.stats(60, ['mem_percent'])
+        self.assertEqual(stats['fields']['mem_percent']['max'], 37.5)
+        with self.assertRaises(ValueError):
+            sampler.history(fields=['bogus'])
+
+    def test_monitor_reuses_latest_sample(self):
+        """Test that the monitor takes system memory from the sampler"""
+        sampler = SystemSampler(interval=0.25, capacity=4, proc_root=self.root)
+        sampler.sample()
+        monitor = ProcessMonitor()
+        monitor.system_sampler = sampler
+        loop = asyncio.new_event_loop()
+        try:
+            loop.run_until_complete(monitor.update())
+        finally:
+            loop.close()
+        snapshot = monitor.get_snapshot(top=1)
+        self.assertEqual(snapshot['system_memory']['total'], 8000000 * 1024)
+        self.assertIs(monitor.get_system_memory(), sampler.system_memory())
+
+
+if __name__ == '__main__':
+    unittest.main()
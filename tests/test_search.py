@@ -0,0 +1,99 @@
+import unittest
+import asyncio
+import sys
+import os
+
+# Add the parent directory to the path so we can import the app modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.app.monitor import ProcessMonitor
+from backend.app.search import ProcessIndex, make_matcher
+from benchmarks.synthetic import SyntheticProcessTable
+
+
+class TestProcessIndex(unittest.TestCase):
+    """Test cases for the process search index"""
+
+    def setUp(self):
+        """Set up test fixtures"""
+        self.index = ProcessIndex()
+        self.index.add(1, 100.0, 'nginx', 'www-data', '/usr/sbin/nginx -g daemon off;')
+        self.index.add(2, 101.0, 'nginx', 'www-data', 'nginx: worker process')
+        self.index.add(3, 102.0, 'Postgres', 'postgres', '/usr/lib/postgresql/bin/postgres -D /data')
+        self.index.add(4, 103.0, 'python3', 'alice', 'python3 -m http.server')
+
+    def test_match_modes(self):
+        """Test substring, prefix and regex matching"""
+        self.assertEqual(self.index.match('name', 'gin'), {1, 2})
+        self.assertEqual(self.index.match('name', 'post', 'prefix'), {3})
+        self.assertEqual(self.index.match('name', 'post', 'prefix', case_sensitive=True), set())
+        self.assertEqual(self.index.match('cmdline', r'-[gD] ', 'regex'), {1, 3})
+        self.assertEqual(self.index.search({'name': 'nginx', 'cmdline': 'worker'}), {2})
+        self.assertEqual(self.index.search({}), {1, 2, 3, 4})
+
+    def test_invalid_patterns(self):
+        """Test that bad regexes and modes raise ValueError"""
+        with self.assertRaises(ValueError):
+            self.index.match('name', '(', 'regex')
+        with self.assertRaises(ValueError):
+            make_matcher('x', 'fuzzy')
+        with self.assertRaises(ValueError):
+            self.index.match('status', 'x')
+
+    def test_incremental_updates(self):
+        """Test that exits, pid reuse and cached results stay consistent"""
+        self.assertEqual(self.index.match('name', 'nginx'), {1, 2})
+        self.index.retain({2, 3, 4})
+        self.assertEqual(self.index.match('name', 'nginx'), {2})
+
+        # The last nginx exits: the cached result must not survive
+        self.index.remove(2)
+        self.assertEqual(self.index.match('name', 'nginx'), set())
+
+        # PID reused by a different program
+        self.assertTrue(self.index.needs_refresh(4, 200.0, 'nginx', 'root'))
+        self.index.add(4, 200.0, 'nginx', 'root', 'nginx')
+        self.assertEqual(self.index.match('name', 'nginx'), {4})
+        self.assertEqual(self.index.match('name', 'python'), set())
+        self.assertFalse(self.index.needs_refresh(4, 200.0, 'nginx', 'root'))
+
+
+class TestMonitorSearch(unittest.TestCase):
+    """Test cases for searching through ProcessMonitor.get_snapshot"""
+
+    def setUp(self):
+        """Set up test fixtures"""
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+
+    def tearDown(self):
+        """Tear down test fixtures"""
+        self.loop.close()
+
+    def test_search_follows_churn(self):
+        """Test that indexed results match a linear scan while processes come and go"""
+        table = SyntheticProcessTable(2000, churn=0.05)
+        with table.patch_psutil():
+            monitor = ProcessMonitor()
+            monitor.update_interval = 0
+            for _ in range(5):
+                table.step()
+                self.loop.run_until_complete(monitor.update())
+
+                self.assertEqual(set(monitor.index.entries), {p['pid'] for p in monitor.processes})
+                name = monitor.processes[0]['name']
+                snapshot = monitor.get_snapshot(name=name[:3], match='prefix')
+                expected = {p['pid'] for p in monitor.processes if p['name'].lower().startswith(name[:3].lower())}
+                self.assertEqual({p['pid'] for p in snapshot['processes']}, expected)
+
+                snapshot = monitor.get_snapshot(cmdline='--worker', top=10, sort_by='cpu_percent')
+                self.assertEqual(len(snapshot['processes']), 10)
+                cpu = [p['cpu_percent'] for p in snapshot['processes']]
+                self.assertEqual(cpu, sorted(cpu, reverse=True))
+
+            with self.assertRaises(ValueError):
+                monitor.get_snapshot(name='[', match='regex')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+import unittest
+import asyncio
+import tempfile
+import sys
+import os
+
+# Add the parent directory to the path so we can import the app modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.app.monitor import ProcessMonitor
+from backend.app.shared import SharedSnapshotMonitor
+from backend.app.warmstart import save_state
+from benchmarks.synthetic import SyntheticProcessTable
+
+
+class TestSharedSnapshot(unittest.TestCase):
+    """Test cases for sharing one collector between workers"""
+
+    def setUp(self):
+        """Set up test fixtures"""
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.tmp = tempfile.TemporaryDirectory()
+        self.options = dict(name=f"mm_test_{os.getpid()}", size=4 * 1024 * 1024,
+                            lock_path=os.path.join(self.tmp.name, "collector.lock"))
+
+    def tearDown(self):
+        """Tear down test fixtures"""
+        self.loop.close()
+        self.tmp.cleanup()
+
+    def make_worker(self):
+        monitor = SharedSnapshotMonitor(**self.options)
+        monitor.update_interval = 0
+        return monitor
+
+    def test_reader_follows_collector(self):
+        """Test that a second worker serves the collector's scans without scanning"""
+        table = SyntheticProcessTable(500, churn=0.1)
+        with table.patch_psutil():
+            collector = self.make_worker()
+            reader = self.make_worker()
+            try:
+                self.loop.run_until_complete(collector.update())
+                self.loop.run_until_complete(reader.update())
+                self.assertTrue(collector.is_collector)
+                self.assertFalse(reader.is_collector)
+
+                for _ in range(3):
+                    table.step()
+                    self.loop.run_until_complete(collector.update())
+                    self.loop.run_until_complete(reader.update())
+                    self.assertEqual(reader.version, collector.version)
+                    self.assertEqual([p['pid'] for p in reader.processes],
+                                     [p['pid'] for p in collector.processes])
+                    self.assertEqual(reader.get_snapshot(top=5)['processes'][0]['memory_rss'],
+                                     collector.get_snapshot(top=5)['processes'][0]['memory_rss'])
+
+                # Command lines travel with the snapshot, so search works in every worker
+                self.assertEqual(reader.get_snapshot(cmdline='--worker')['filtered_processes'],
+                                 len(collector.processes))
+
+                # The reader takes over once the collector goes away
+                version = collector.version
+                self.loop.run_until_complete(collector.shutdown())
+                table.step()
+                self.loop.run_until_complete(reader.update())
+                self.assertTrue(reader.is_collector)
+                self.assertGreater(reader.version, version)
+            finally:
+                self.loop.run_until_complete(reader.shutdown())
+
+
+    def test_collector_warm_starts_on_election(self):
+        """Test that the elected collector restores saved state and shares it as stale"""
+        table = SyntheticProcessTable(100)
+        path = os.path.join(self.tmp.name, "state.json.gz")
+        with table.patch_psutil():
+            previous = ProcessMonitor()
+            self.loop.run_until_complete(previous.update())
+            save_state(previous, path)
+
+            collector = self.make_worker()
+            collector.warm_start = True
+            collector.warm_start_file = path
+            reader = self.make_worker()
+            reader.warm_start = True
+            reader.warm_start_file = path
+            try:
+                self.assertTrue(collector._try_become_collector())
+                self.assertTrue(collector.stale)
+                self.loop.run_until_complete(reader.update())
+                self.assertFalse(reader.is_collector)
+                self.assertTrue(reader.stale)
+                self.assertEqual(len(reader.processes), len(previous.processes))
+
+                self.loop.run_until_complete(collector.update())
+                self.loop.run_until_complete(reader.update())
+                self.assertFalse(reader.stale)
+                self.assertEqual(reader.version, previous.version + 1)
+            finally:
+                self.loop.run_until_complete(collector.shutdown())
+                self.loop.run_until_complete(reader.shutdown())
+
+if __name__ == '__main__':
+    unittest.main()
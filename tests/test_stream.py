@@ -0,0 +1,143 @@
+import unittest
+import asyncio
+import json
+import sys
+import os
+
+# Add the parent directory to the path so we can import the app modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.app import main, api
+from backend.app.stream import SnapshotStream, KEEPALIVE
+
+
+class TestSnapshotStream(unittest.TestCase):
+    """Test cases for the shared Server-Sent Events stream"""
+
+    def setUp(self):
+        """Set up test fixtures"""
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.stream = SnapshotStream()
+        self.stream.keepalive = 0.05
+
+    def tearDown(self):
+        """Tear down test fixtures"""
+        self.loop.close()
+
+    def take(self, events, count):
+        async def collect():
+            return [await events.__anext__() for _ in range(count)]
+        return self.loop.run_until_complete(collect())
+
+    def test_subscribers_share_one_frame(self):
+        """Test that every client is sent the same encoded frame"""
+        self.stream.publish('{"version": 1}')
+        first, second = self.stream.events(), self.stream.events()
+        retry, frame = self.take(first, 2)
+        self.assertTrue(retry.startswith(b"retry:"))
+        self.assertEqual(frame, f'id: {self.stream.epoch}-1\nevent: snapshot\ndata: {{"version": 1}}\n\n'.encode())
+        self.assertIs(self.take(second, 2)[1], frame)
+        self.assertEqual(self.stream.subscribers, 2)
+
+        # A client that missed ticks skips straight to the newest frame
+        self.stream.publish('{"version": 2}')
+        self.stream.publish('{"version": 3}')
+        self.assertIn(b'"version": 3', self.take(first, 1)[0])
+
+        self.loop.run_until_complete(first.aclose())
+        self.loop.run_until_complete(second.aclose())
+        self.assertEqual(self.stream.subscribers, 0)
+
+    def test_resume_with_last_event_id(self):
+        """Test that a resuming client is not sent the frame it already has"""
+        self.stream.publish('{"version": 1}')
+        latest_id = self.stream.latest[0]
+
+        resumed = self.stream.events(last_event_id=latest_id)
+        self.take(resumed, 1)
+        # Nothing new: a keepalive comment instead of the same snapshot
+        self.assertEqual(self.take(resumed, 1), [KEEPALIVE])
+
+        async def publish_later():
+            await asyncio.sleep(0.01)
+            self.stream.publish('{"version": 2}')
+
+        self.stream.keepalive = 5
+        self.loop.create_task(publish_later())
+        self.assertIn(b'"version": 2', self.take(resumed, 1)[0])
+        self.loop.run_until_complete(resumed.aclose())
+
+        # An id from before a restart gets the current frame
+        restarted = self.stream.events(last_event_id="0-2")
+        self.assertIn(b'"version": 2', self.take(restarted, 2)[1])
+        self.loop.run_until_complete(restarted.aclose())
+
+
+
+class FakeWebSocket:
+    """WebSocket client that only records what it is sent"""
+
+    query_params: dict = {}
+
+    def __init__(self):
+        self.messages = []
+
+    async def send_text(self, text):
+        self.messages.append(text)
+
+
+class FakeMonitor:
+    """Monitor whose snapshot only carries a version"""
+
+    def __init__(self, version):
+        self.version = version
+
+    async def update(self):
+        pass
+
+    def get_snapshot(self):
+        return {'version': self.version, 'processes': []}
+
+
+class TestStreamWithWebSockets(unittest.TestCase):
+    """Test cases for SSE clients joining while only WebSocket clients are connected"""
+
+    def setUp(self):
+        """Set up test fixtures"""
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.original_stream = main.snapshot_stream
+        self.stream = main.snapshot_stream = SnapshotStream()
+        self.websocket = FakeWebSocket()
+        main.active_connections.append(self.websocket)
+
+    def tearDown(self):
+        """Tear down test fixtures"""
+        main.active_connections.remove(self.websocket)
+        main.snapshot_stream = self.original_stream
+        self.loop.close()
+
+    def test_new_client_gets_current_snapshot(self):
+        """Test that a frame from an earlier SSE session is not served after WebSocket-only ticks"""
+        # Left over from a client that has since disconnected
+        self.stream.publish(json.dumps({'version': 1, 'processes': []}))
+
+        self.loop.run_until_complete(main.deliver_snapshot({'version': 2, 'processes': []}))
+        self.assertEqual(json.loads(self.websocket.messages[-1])['version'], 2)
+
+        async def first_event():
+            response = await api.stream_processes(None, FakeMonitor(2), None, self.stream)
+            events = response.body_iterator
+            await events.__anext__()
+            frame = await events.__anext__()
+            await events.aclose()
+            return frame
+
+        frame = self.loop.run_until_complete(first_event()).decode()
+        data = frame.split("data: ", 1)[1]
+        self.assertEqual(json.loads(data)['version'], 2)
+        self.assertNotIn(f"id: {self.stream.epoch}-1\n", frame)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,126 @@
+import unittest
+import asyncio
+import gzip
+import json
+import sys
+import os
+import tempfile
+
+# Add the parent directory to the path so we can import the app modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.app.monitor import ProcessMonitor
+from backend.app.warmstart import save_state, load_state, restore
+from benchmarks.synthetic import SyntheticProcessTable
+
+
+class TestWarmStart(unittest.TestCase):
+    """Test cases for serving the previous run's snapshot on startup"""
+
+    def setUp(self):
+        """Set up test fixtures"""
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "state.json.gz")
+        self.table = SyntheticProcessTable(200)
+
+    def tearDown(self):
+        """Tear down test fixtures"""
+        self.loop.close()
+        self.directory.cleanup()
+
+    def scanned_monitor(self):
+        monitor = ProcessMonitor()
+        monitor.update_interval = 0
+        self.loop.run_until_complete(monitor.update())
+        return monitor
+
+    def test_restore_serves_stale_snapshot(self):
+        """Test that a restored snapshot is served as stale until the first scan"""
+        with self.table.patch_psutil():
+            previous = self.scanned_monitor()
+            self.assertTrue(save_state(previous, self.path))
+
+            monitor = ProcessMonitor()
+            self.assertTrue(restore(monitor, self.path))
+            snapshot = monitor.get_snapshot(top=5)
+            self.assertTrue(snapshot['stale'])
+            self.assertEqual(snapshot['version'], previous.version)
+            self.assertEqual(snapshot['total_processes'], len(previous.processes))
+            self.assertEqual(snapshot['processes'][0]['pid'], previous.processes[0]['pid'])
+            self.assertEqual(monitor.get_snapshot(cmdline="--worker")['filtered_processes'],
+                             len(previous.processes))
+
+            monitor.update_interval = 0
+            self.loop.run_until_complete(monitor.update())
+            snapshot = monitor.get_snapshot()
+            self.assertFalse(snapshot['stale'])
+            self.assertEqual(snapshot['version'], previous.version + 1)
+
+    def test_cpu_baselines_survive_restart(self):
+        """Test that the first scan after a restart reports CPU usage"""
+        with self.table.patch_psutil():
+            save_state(self.scanned_monitor(), self.path)
+            pid = next(iter(self.table.entries))
+            self.table.entries[pid]['cpu_user'] += 5.0
+
+            cold = self.scanned_monitor()
+            self.assertTrue(all(p['cpu_percent'] == 0 for p in cold.processes))
+
+            warm = ProcessMonitor()
+            restore(warm, self.path)
+            warm.update_interval = 0
+            self.loop.run_until_complete(warm.update())
+            self.assertGreater(warm.get_process_map()[pid]['cpu_percent'], 0)
+
+    def test_first_scan_reports_no_exits_from_previous_run(self):
+        """Test that processes gone during the restart are not logged as exits"""
+        with self.table.patch_psutil():
+            save_state(self.scanned_monitor(), self.path)
+            gone = next(iter(self.table.entries))
+            del self.table.entries[gone]
+
+            monitor = ProcessMonitor()
+            restore(monitor, self.path)
+            monitor.update_interval = 0
+            self.loop.run_until_complete(monitor.update())
+            self.assertEqual(monitor.drain_exits(), [])
+            self.assertNotIn(gone, monitor.get_process_map())
+
+            # Exits after the first scan are reported again
+            exited = next(iter(self.table.entries))
+            del self.table.entries[exited]
+            self.loop.run_until_complete(monitor.update())
+            self.assertEqual([e['pid'] for e in monitor.drain_exits()], [exited])
+
+    def test_rejects_other_boot_and_old_state(self):
+        """Test that state from another boot or past the age limit is ignored"""
+        with self.table.patch_psutil():
+            save_state(self.scanned_monitor(), self.path)
+        self.assertIsNotNone(load_state(self.path))
+        self.assertIsNone(load_state(self.path, max_age=0))
+
+        with gzip.open(self.path, 'rt') as f:
+            record = json.load(f)
+        record['boot_time'] -= 3600
+        with gzip.open(self.path, 'wt') as f:
+            json.dump(record, f)
+        self.assertIsNone(load_state(self.path))
+        self.assertIsNone(load_state(os.path.join(self.directory.name, "missing.json.gz")))
+
+    def test_requests_wait_for_first_scan_only_without_data(self):
+        """Test that concurrent updates during a cold first scan share its result"""
+        with self.table.patch_psutil():
+            monitor = ProcessMonitor()
+
+            async def concurrent_updates():
+                await asyncio.gather(monitor.update(), monitor.update(), monitor.update())
+
+            self.loop.run_until_complete(concurrent_updates())
+            self.assertEqual(monitor.version, 1)
+            self.assertEqual(len(monitor.processes), len(self.table.entries))
+
+
+if __name__ == '__main__':
+    unittest.main()